@@ -0,0 +1,99 @@
+"""Import-time budget for the headless entry points.
+
+Runs each entry point under `python -X importtime` in a fresh interpreter,
+takes the best of several runs, and fails if the imports it triggers take
+longer than the budget, or if it loads a heavy dependency (Tk, search
+clients, PDF parsing, numpy, aiohttp, pydantic) that should only be imported
+when it is actually used.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --runs 10 --show 15
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+# Modules none of the headless entry points may import up front
+HEAVY_MODULES = ("tkinter", "arxiv", "scholarly", "PyPDF2", "bs4", "numpy", "scipy", "aiohttp", "pydantic")
+
+# Name, interpreter arguments and import budget in milliseconds. Budgets are
+# well above what a laptop needs, so they only trip on real regressions,
+# such as a heavy dependency moving back to module level.
+TARGETS = [
+    ("cli", ["-c", "import paper_agent.cli"], 150),
+    ("network", ["-c", "import paper_agent.network"], 250),
+    ("batch", ["-c", "import paper_agent.batch"], 250),
+    ("worker", ["-c", "import paper_agent.worker"], 250),
+    ("python -m paper_agent --help", ["-m", "paper_agent", "--help"], 200)
+]
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """(module, depth, self us, cumulative us) for every line of -X importtime output"""
+    entries = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            entries.append((match.group(4), len(match.group(3)) // 2, int(match.group(1)), int(match.group(2))))
+    return entries
+
+def importtime(args: List[str]) -> List[Tuple[str, int, int, int]]:
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    return parse_importtime(completed.stderr.decode("utf-8", "replace"))
+
+def measure(args: List[str], startup: set) -> Tuple[float, List[str], List[Tuple[str, int, int, int]]]:
+    """Import time in ms of everything args imports beyond interpreter startup, and the modules it loaded"""
+    entries = importtime(args)
+    total = sum(cumulative for name, depth, _, cumulative in entries if depth == 0 and name not in startup)
+    modules = [name for name, _, _, _ in entries if name not in startup]
+    return total / 1000.0, modules, entries
+
+def heavy_imports(modules: List[str]) -> List[str]:
+    """Heavy top-level packages among the imported modules"""
+    return sorted({name.split(".")[0] for name in modules} & set(HEAVY_MODULES))
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check import time of the headless entry points")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per entry point; the fastest counts")
+    parser.add_argument("--show", type=int, default=0, help="Also list this many slowest top-level imports")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget, for slow machines")
+    args = parser.parse_args(argv)
+
+    startup = {name for name, _, _, _ in importtime(["-c", "pass"])}
+    failures = []
+    for name, target_args, budget in TARGETS:
+        best: Dict[str, object] = {}
+        for _ in range(max(1, args.runs)):
+            total, modules, entries = measure(target_args, startup)
+            if not best or total < best["total"]:
+                best = {"total": total, "modules": modules, "entries": entries}
+        limit = budget * args.scale
+        heavy = heavy_imports(best["modules"])
+        print(f"{name:<30} {best['total']:>8.1f} ms  budget {limit:>6.0f} ms  {len(best['modules']):>4} modules")
+        if args.show:
+            top = sorted(
+                (entry for entry in best["entries"] if entry[1] == 0 and entry[0] not in startup),
+                key=lambda entry: entry[3],
+                reverse=True
+            )
+            for module, _, _, cumulative in top[:args.show]:
+                print(f"    {cumulative / 1000.0:>8.1f} ms  {module}")
+        if best["total"] > limit:
+            failures.append(f"{name}: imports took {best['total']:.1f} ms, budget is {limit:.0f} ms")
+        if heavy:
+            failures.append(f"{name}: imported {', '.join(heavy)} at startup")
+
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
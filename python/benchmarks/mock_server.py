@@ -0,0 +1,361 @@
+"""Local stand-in for the DeepSeek chat-completions endpoint and the arXiv API.
+
+Replies are canned but shaped like the real ones, so the whole pipeline can
+run without a key or network access. Latency, error injection and corpus
+size are configurable; every request is counted in `MockServer.stats`.
+
+    python -m benchmarks.mock_server --port 8765 --latency lognormal:-2.5:0.5
+"""
+import json
+import random
+import asyncio
+import argparse
+import logging
+from xml.sax.saxutils import escape
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+WORDS = (
+    "agent delegation orchestration planner tool memory retrieval reasoning benchmark policy reward "
+    "language model evaluation latency throughput coordination protocol hierarchy specialist critic "
+    "workflow feedback verification uncertainty alignment safety human oversight task decomposition "
+    "communication consensus negotiation scheduling environment simulation trajectory"
+).split()
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Sampler for a latency spec: fixed:S, uniform:A:B, exponential:MEAN or lognormal:MU:SIGMA (seconds)"""
+    kind, *args = spec.split(":")
+    values = [float(arg) for arg in args]
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "exponential":
+        return lambda rng: rng.expovariate(1.0 / values[0]) if values[0] > 0 else 0.0
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(values[0], values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+def make_pdf(lines: List[str], lines_per_page: int = 45) -> bytes:
+    """Minimal multi-page PDF with one Helvetica text line per entry"""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in pages:
+        text = "".join(
+            "({}) Tj T*\n".format(line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)"))
+            for line in page
+        )
+        stream = f"BT /F1 10 Tf 12 TL 50 780 Td\n{text}ET".encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R /Resources << /Font << /F1 3 0 R >> >> >>"
+            % (len(objects))
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % kid for kid in kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+@dataclass
+class MockConfig:
+    """Behaviour of the mock endpoints"""
+    latency: str = "fixed:0"
+    stream_chunk_delay: float = 0.0
+    rate_429: float = 0.0
+    rate_5xx: float = 0.0
+    retry_after: str = "0"
+    # Fractions of JSON replies wrapped in prose and code fences, or cut off mid-object
+    rate_malformed: float = 0.0
+    rate_broken: float = 0.0
+    # Prompts containing any of these are rejected with a 400, to fail chosen calls
+    reject_prompts: Tuple[str, ...] = ()
+    sections: int = 6
+    papers: int = 5
+    section_words: int = 400
+    pdf_pages: int = 3
+    # Seconds each PDF download takes before the response starts
+    pdf_delay: float = 0.0
+    seed: int = 0
+
+@dataclass
+class MockStats:
+    chat_calls: int = 0
+    stream_calls: int = 0
+    injected_errors: int = 0
+    malformed_replies: int = 0
+    broken_replies: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    arxiv_queries: int = 0
+    pdf_downloads: int = 0
+    calls_by_kind: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+class MockServer:
+    """aiohttp application serving /v1/chat/completions, /api/query and /pdf/{id}"""
+
+    def __init__(self, config: Optional[MockConfig] = None):
+        self.config = config or MockConfig()
+        self.stats = MockStats()
+        self.rng = random.Random(self.config.seed)
+        self.sample_latency = parse_latency(self.config.latency)
+        self.runner: Optional[web.AppRunner] = None
+        # Broken replies and what they should have been, so repair calls can be answered
+        self.broken: Dict[str, str] = {}
+        self.base_url = ""
+        self.app = web.Application()
+        self.app.router.add_post("/v1/chat/completions", self.chat_completions)
+        self.app.router.add_get("/api/query", self.arxiv_query)
+        self.app.router.add_get("/pdf/{paper_id}", self.pdf)
+        self.app.router.add_get("/stats", self.stats_handler)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the base URL"""
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        bound = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{bound}"
+        return self.base_url
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    def _words(self, count: int, seed: Any) -> str:
+        rng = random.Random(str(seed))
+        return " ".join(rng.choice(WORDS) for _ in range(count))
+
+    def classify(self, prompt: str) -> str:
+        """Which agent prompt a request carries, from its fixed wording"""
+        markers = [
+            ("outline", "Generate a detailed outline"),
+            ("topics", "Analyze these research papers"),
+            ("consolidate", "topic lists were extracted"),
+            ("section", "section for a research paper titled"),
+            ("combined_review", "Review the following section of a research paper"),
+            ("grammar", "Check the following text for grammar"),
+            ("technical", "Review the following content for technical accuracy"),
+            ("format", "Format the following content"),
+            ("repair", "Repair"),
+        ]
+        for kind, marker in markers:
+            if marker in prompt:
+                return kind
+        return "other"
+
+    def reply(self, kind: str, prompt: str) -> str:
+        """Canned reply in the shape the agent expects"""
+        if kind == "outline":
+            return json.dumps({"outline": [f"Section {i + 1}" for i in range(self.config.sections)]})
+        if kind in ("topics", "consolidate"):
+            return json.dumps({
+                "main_topics": ["Agent delegation", "Multi-agent orchestration"],
+                "subtopics": ["Tool use", "Planning", "Human oversight"],
+                "key_concepts": ["task decomposition", "critic agents", "shared memory"]
+            })
+        if kind == "section":
+            return self._words(self.config.section_words, prompt[:200])
+        if kind == "grammar":
+            return json.dumps({"issues": [], "suggestions": ["Tighten the opening paragraph"], "overall_quality": 8})
+        if kind == "technical":
+            return json.dumps({"accuracy_issues": [], "suggestions": ["Cite a benchmark"], "confidence_score": 7})
+        if kind == "combined_review":
+            return json.dumps({
+                "grammar": {"issues": [], "suggestions": [], "overall_quality": 8},
+                "technical_accuracy": {"accuracy_issues": [], "suggestions": [], "confidence_score": 7}
+            })
+        if kind == "format":
+            body = prompt.split("guidelines:", 1)[-1].split("Return a JSON object", 1)[0].strip()
+            return json.dumps({"formatted_content": body, "style_compliance": ["IEEE headings"], "issues": []})
+        if kind == "repair":
+            for broken, original in self.broken.items():
+                if broken in prompt:
+                    return original
+        return "{}"
+
+    def damage(self, content: str) -> str:
+        """Mangle a JSON reply the way chat models sometimes do, at the configured rates"""
+        if not (self.config.rate_broken or self.config.rate_malformed):
+            return content
+        if not content.startswith(("{", "[")) or content == "{}":
+            return content
+        roll = self.rng.random()
+        if roll < self.config.rate_broken:
+            self.stats.broken_replies += 1
+            broken = content[:max(1, len(content) // 2)]
+            self.broken[broken] = content
+            return broken
+        if roll < self.config.rate_broken + self.config.rate_malformed:
+            self.stats.malformed_replies += 1
+            return f"Here is the requested JSON:\n```json\n{content}\n```\nLet me know if you need changes."
+        return content
+
+    async def chat_completions(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        await asyncio.sleep(self.sample_latency(self.rng))
+
+        roll = self.rng.random()
+        if roll < self.config.rate_429:
+            self.stats.injected_errors += 1
+            return web.json_response(
+                {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                status=429,
+                headers={"Retry-After": self.config.retry_after}
+            )
+        if roll < self.config.rate_429 + self.config.rate_5xx:
+            self.stats.injected_errors += 1
+            return web.json_response({"error": {"message": "Service unavailable"}}, status=503)
+
+        prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+        if any(marker in prompt for marker in self.config.reject_prompts):
+            self.stats.injected_errors += 1
+            return web.json_response({"error": {"message": "Invalid request", "type": "invalid_request_error"}}, status=400)
+        kind = self.classify(prompt)
+        content = self.reply(kind, prompt)
+        if kind != "repair":
+            content = self.damage(content)
+        usage = {
+            "prompt_tokens": (len(prompt) + 3) // 4,
+            "completion_tokens": (len(content) + 3) // 4
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        self.stats.prompt_tokens += usage["prompt_tokens"]
+        self.stats.completion_tokens += usage["completion_tokens"]
+        self.stats.calls_by_kind[kind] = self.stats.calls_by_kind.get(kind, 0) + 1
+
+        model = body.get("model", "deepseek-chat")
+        if not body.get("stream"):
+            self.stats.chat_calls += 1
+            return web.json_response({
+                "id": f"mock-{self.stats.chat_calls}",
+                "object": "chat.completion",
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage
+            })
+
+        self.stats.stream_calls += 1
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        words = content.split(" ")
+        for start in range(0, len(words), 8):
+            delta = " ".join(words[start:start + 8]) + (" " if start + 8 < len(words) else "")
+            chunk = {"model": model, "choices": [{"index": 0, "delta": {"content": delta}}]}
+            await response.write(b"data: " + json.dumps(chunk).encode("utf-8") + b"\n\n")
+            if self.config.stream_chunk_delay:
+                await asyncio.sleep(self.config.stream_chunk_delay)
+        final = {"model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage}
+        await response.write(b"data: " + json.dumps(final).encode("utf-8") + b"\n\n")
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def arxiv_query(self, request: web.Request) -> web.Response:
+        self.stats.arxiv_queries += 1
+        start = int(request.query.get("start", "0"))
+        count = max(0, min(int(request.query.get("max_results", "10")), self.config.papers - start))
+        entries = []
+        for index in range(start, start + count):
+            paper_id = f"2401.{index + 1:05d}"
+            title = f"Mock Paper {index + 1}: {self._words(6, ('title', index)).title()}"
+            entries.append(f"""
+  <entry>
+    <id>http://arxiv.org/abs/{paper_id}v1</id>
+    <updated>2024-01-0{index % 9 + 1}T00:00:00Z</updated>
+    <published>2024-01-0{index % 9 + 1}T00:00:00Z</published>
+    <title>{escape(title)}</title>
+    <summary>{escape(self._words(150, ('summary', index)))}</summary>
+    <author><name>Author {index + 1}</name></author>
+    <link href="http://arxiv.org/abs/{paper_id}v1" rel="alternate" type="text/html"/>
+    <link title="pdf" href="{self.base_url}/pdf/{paper_id}v1" rel="related" type="application/pdf"/>
+    <arxiv:primary_category term="cs.AI" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="cs.AI" scheme="http://arxiv.org/schemas/atom"/>
+  </entry>""")
+        feed = f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/" xmlns:arxiv="http://arxiv.org/schemas/atom">
+  <title>Mock arXiv query</title>
+  <id>http://arxiv.org/api/mock</id>
+  <updated>2024-01-01T00:00:00Z</updated>
+  <opensearch:totalResults>{self.config.papers}</opensearch:totalResults>
+  <opensearch:startIndex>{start}</opensearch:startIndex>
+  <opensearch:itemsPerPage>{count}</opensearch:itemsPerPage>{"".join(entries)}
+</feed>
+"""
+        return web.Response(text=feed, content_type="application/atom+xml")
+
+    async def pdf(self, request: web.Request) -> web.Response:
+        self.stats.pdf_downloads += 1
+        await asyncio.sleep(self.config.pdf_delay)
+        paper_id = request.match_info["paper_id"]
+        rng = random.Random(paper_id)
+        lines = [
+            " ".join(rng.choice(WORDS) for _ in range(12))
+            for _ in range(45 * self.config.pdf_pages)
+        ]
+        return web.Response(body=make_pdf(lines), content_type="application/pdf")
+
+    async def stats_handler(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(vars(self.stats), total_tokens=self.stats.total_tokens))
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve mock DeepSeek and arXiv endpoints")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="fixed:0", help="fixed:S, uniform:A:B, exponential:MEAN or lognormal:MU:SIGMA")
+    parser.add_argument("--stream-chunk-delay", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of chat calls answered with 429")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="Fraction of chat calls answered with 503")
+    parser.add_argument("--rate-malformed", type=float, default=0.0, help="Fraction of JSON replies wrapped in prose")
+    parser.add_argument("--rate-broken", type=float, default=0.0, help="Fraction of JSON replies cut off")
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--papers", type=int, default=5)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    config = MockConfig(
+        latency=args.latency,
+        stream_chunk_delay=args.stream_chunk_delay,
+        rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx,
+        rate_malformed=args.rate_malformed,
+        rate_broken=args.rate_broken,
+        sections=args.sections,
+        papers=args.papers
+    )
+
+    async def serve():
+        server = MockServer(config)
+        base_url = await server.start(args.host, args.port)
+        print(f"PAPER_AGENT_DEEPSEEK_URL={base_url}/v1")
+        print(f"PAPER_AGENT_ARXIV_URL={base_url}/api/query")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
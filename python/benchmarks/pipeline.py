@@ -0,0 +1,197 @@
+"""End-to-end pipeline benchmark against the local mock server.
+
+Runs AgentNetwork.execute_pipeline for every (papers, sections) scenario, each
+in a fresh interpreter, and reports wall time, LLM calls, tokens and peak
+resident memory. Results are compared with benchmarks/baselines.json; the run
+fails if any scenario got slower, chattier or hungrier than its baseline
+allows.
+
+    python -m benchmarks.pipeline                      # compare with baselines
+    python -m benchmarks.pipeline --update-baselines   # record new baselines
+    python -m benchmarks.pipeline --papers 5 20 --sections 4 12 --latency lognormal:-3:0.4
+    python -m benchmarks.pipeline --rate-malformed 0.2 --rate-broken 0.05   # exercise JSON extraction and repair
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import resource
+import tempfile
+import subprocess
+from typing import Any, Dict, List
+
+from .mock_server import MockConfig, MockServer
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# How far a metric may exceed its baseline before the run fails: a ratio plus
+# an absolute slack, so tiny numbers do not fail on noise
+TOLERANCES = {
+    "wall_time": (1.5, 0.5),
+    "llm_calls": (1.0, 0),
+    "total_tokens": (1.05, 100),
+    "peak_memory_mb": (1.5, 5.0)
+}
+
+def configure_environment(base_url: str, scratch: str):
+    """Point the pipeline at the mock server and keep it off shared caches"""
+    os.environ.update({
+        "NEXT_PUBLIC_DEEPSEEK_API_KEY": "mock-key",
+        "PAPER_AGENT_DEEPSEEK_URL": f"{base_url}/v1",
+        "PAPER_AGENT_ARXIV_URL": f"{base_url}/api/query",
+        "PAPER_AGENT_SOURCES": "arXiv",
+        "PAPER_AGENT_LLM_CACHE": "off",
+        "PAPER_AGENT_TEXT_STORE": "off",
+        "PAPER_AGENT_CHECKPOINTS": os.path.join(scratch, "checkpoints"),
+        # The mock does not rate limit, so neither should the client
+        "PAPER_AGENT_REQUESTS_PER_MINUTE": "",
+        "PAPER_AGENT_TOKENS_PER_MINUTE": ""
+    })
+
+async def run_scenario(papers: int, sections: int, config: MockConfig) -> Dict[str, Any]:
+    """Run the full pipeline once and return its measurements"""
+    config.papers = papers
+    config.sections = sections
+    server = MockServer(config)
+    base_url = await server.start()
+    scratch = tempfile.mkdtemp(prefix="paper_agent_bench_")
+    configure_environment(base_url, scratch)
+
+    # Imported after the environment is set, since agents read it at import time
+    from paper_agent.models.paper_metadata import PaperMetadata
+    from paper_agent.network import AgentNetwork
+    from paper_agent.agents.web_crawler import WebCrawlerAgent
+    WebCrawlerAgent.sources = ["arXiv"]
+    WebCrawlerAgent.max_results = papers
+    WebCrawlerAgent.arxiv_url = f"{base_url}/api/query"
+
+    network = AgentNetwork(PaperMetadata(
+        title="Leading AI Agents: From Delegation to Orchestration",
+        authors=["Benchmark"],
+        keywords=["AI Agents", "Delegation", "Orchestration"]
+    ))
+    started = time.perf_counter()
+    try:
+        context = await network.execute_pipeline()
+    finally:
+        wall_time = time.perf_counter() - started
+        await server.stop()
+
+    return {
+        "papers": papers,
+        "sections": sections,
+        "wall_time": round(wall_time, 3),
+        "llm_calls": server.stats.chat_calls + server.stats.stream_calls,
+        "calls_by_kind": dict(sorted(server.stats.calls_by_kind.items())),
+        "injected_errors": server.stats.injected_errors,
+        "damaged_replies": server.stats.malformed_replies + server.stats.broken_replies,
+        "structured_output": network.deepseek.parse_stats.stats(),
+        "prompt_tokens": server.stats.prompt_tokens,
+        "completion_tokens": server.stats.completion_tokens,
+        "total_tokens": server.stats.total_tokens,
+        # ru_maxrss is in kilobytes on Linux; PDF worker processes are not included
+        "peak_memory_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+        "papers_collected": len(context.get("academic_papers", [])),
+        "sections_written": len(context.get("sections", {}))
+    }
+
+def run_isolated(papers: int, sections: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """Run one scenario in a child interpreter so memory and module state start clean"""
+    command = [
+        sys.executable, "-m", "benchmarks.pipeline", "--scenario", str(papers), str(sections),
+        "--latency", args.latency, "--rate-429", str(args.rate_429), "--rate-5xx", str(args.rate_5xx),
+        "--rate-malformed", str(args.rate_malformed), "--rate-broken", str(args.rate_broken),
+        "--seed", str(args.seed)
+    ]
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    completed = subprocess.run(command, cwd=cwd, stdout=subprocess.PIPE, check=True)
+    return json.loads(completed.stdout.decode("utf-8").strip().splitlines()[-1])
+
+def check_regressions(name: str, result: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Metrics of result that exceed baseline by more than TOLERANCES allow"""
+    failures = []
+    for metric, (ratio, slack) in TOLERANCES.items():
+        if metric not in baseline:
+            continue
+        limit = baseline[metric] * ratio + slack
+        if result[metric] > limit:
+            failures.append(f"{name}: {metric} {result[metric]} exceeds baseline {baseline[metric]} (limit {limit:.2f})")
+    return failures
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the paper pipeline against a local mock server")
+    parser.add_argument("--papers", type=int, nargs="+", default=[5, 20])
+    parser.add_argument("--sections", type=int, nargs="+", default=[4, 8])
+    parser.add_argument("--latency", default="fixed:0.02", help="Mock LLM latency distribution")
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-5xx", type=float, default=0.0)
+    parser.add_argument("--rate-malformed", type=float, default=0.0, help="Fraction of JSON replies wrapped in prose")
+    parser.add_argument("--rate-broken", type=float, default=0.0, help="Fraction of JSON replies cut off, needing a repair call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baselines", default=BASELINES)
+    parser.add_argument("--update-baselines", action="store_true", help="Record these results as the new baselines")
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    parser.add_argument("--scenario", type=int, nargs=2, metavar=("PAPERS", "SECTIONS"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.scenario:
+        config = MockConfig(
+            latency=args.latency,
+            rate_429=args.rate_429,
+            rate_5xx=args.rate_5xx,
+            rate_malformed=args.rate_malformed,
+            rate_broken=args.rate_broken,
+            seed=args.seed
+        )
+        print(json.dumps(asyncio.run(run_scenario(*args.scenario, config))))
+        return 0
+
+    results = {}
+    for papers in args.papers:
+        for sections in args.sections:
+            name = f"papers={papers},sections={sections}"
+            results[name] = run_isolated(papers, sections, args)
+            result = results[name]
+            print(
+                f"{name:<24} {result['wall_time']:>7.2f}s {result['llm_calls']:>5} calls "
+                f"{result['total_tokens']:>8} tokens {result['peak_memory_mb']:>8.1f} MB peak "
+                f"{result['structured_output']['repair_calls']:>3} repairs {result['structured_output']['failed']:>3} parse failures"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baselines:
+        stored = {}
+        if os.path.exists(args.baselines):
+            with open(args.baselines, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        stored.update(results)
+        with open(args.baselines, "w", encoding="utf-8") as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Updated {len(results)} baselines in {args.baselines}")
+        return 0
+
+    if not os.path.exists(args.baselines):
+        print(f"No baselines at {args.baselines}; run with --update-baselines first")
+        return 0
+    with open(args.baselines, "r", encoding="utf-8") as f:
+        baselines = json.load(f)
+    failures = []
+    for name, result in results.items():
+        if name in baselines:
+            failures.extend(check_regressions(name, result, baselines[name]))
+        else:
+            print(f"{name}: no baseline recorded")
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
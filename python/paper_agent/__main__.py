@@ -1,8 +1,18 @@
+import sys
 import logging
-from .gui.main_window import MainWindow
 
 def main():
-    """Main entry point for the paper agent application"""
+    """Main entry point for the paper agent application.
+
+    With a subcommand (`python -m paper_agent run ...`) the headless command
+    line interface runs and Tk is never imported; without one the GUI opens.
+    """
+    if len(sys.argv) > 1:
+        from .cli import main as cli_main
+        return cli_main(sys.argv[1:])
+
+    from .gui.main_window import MainWindow
+
     # Configure logging
     logging.basicConfig(
         level=logging.INFO,
@@ -14,4 +24,4 @@ def main():
     app.run()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main()) 
\ No newline at end of file
@@ -2,13 +2,27 @@
 Agents for the paper writing process
 """
 
-from .base import Agent
-from .web_crawler import WebCrawlerAgent
-from .data_collection import DataCollectionAgent
-from .content_generation import ContentGenerationAgent
-from .quality_control import QualityControlAgent
-from .expert_review import ExpertReviewAgent
-from .formatting import FormattingAgent
+import importlib
+
+# Submodules are imported when their agent is first requested, so using one
+# agent does not load the dependencies of all the others
+_AGENT_MODULES = {
+    'Agent': '.base',
+    'WebCrawlerAgent': '.web_crawler',
+    'DataCollectionAgent': '.data_collection',
+    'ContentGenerationAgent': '.content_generation',
+    'QualityControlAgent': '.quality_control',
+    'ExpertReviewAgent': '.expert_review',
+    'FormattingAgent': '.formatting',
+    'CombinedReviewAgent': '.combined_review'
+}
+
+def __getattr__(name):
+    if name not in _AGENT_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_AGENT_MODULES[name], __name__), name)
+    globals()[name] = value
+    return value
 
 __all__ = [
     'Agent',
@@ -17,5 +31,6 @@ __all__ = [
     'ContentGenerationAgent',
     'QualityControlAgent',
     'ExpertReviewAgent',
-    'FormattingAgent'
+    'FormattingAgent',
+    'CombinedReviewAgent'
 ] 
\ No newline at end of file
@@ -1,18 +1,55 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Optional, FrozenSet
 import logging
 from ..utils.deepseek_client import DeepSeekClient
+from ..utils.http_transport import HttpTransport
+from ..utils.concurrency import DEFAULT_MAX_CONCURRENCY
+from ..utils.prompt_context import PromptContext
 
 logger = logging.getLogger(__name__)
 
+def section_text(section: Any) -> str:
+    """Text of a section, taking the content of a {"content", "citations"} dict"""
+    if isinstance(section, dict):
+        return str(section.get("content", ""))
+    return section if isinstance(section, str) else str(section)
+
+def ungenerated_sections(context: Dict[str, Any]) -> Dict[str, Exception]:
+    """Sections content generation could not write, which reviewers mark failed without a call"""
+    return {
+        section: RuntimeError(f"section was not generated ({error})")
+        for section, error in (context.get("section_errors") or {}).items()
+    }
+
 class Agent(ABC):
     """Base class for all agents in the system"""
-    
-    def __init__(self, name: str):
+
+    # Context keys this agent reads and writes; the scheduler orders agents by them
+    reads: FrozenSet[str] = frozenset()
+    writes: FrozenSet[str] = frozenset()
+
+    # Reuse per-section results whose input fingerprints have not changed
+    incremental: bool = True
+
+    # Context fields this agent puts in its prompts, and their token budget
+    prompt_context: Optional[PromptContext] = None
+
+    def __init__(
+        self,
+        name: str,
+        deepseek: Optional[DeepSeekClient] = None,
+        transport: Optional[HttpTransport] = None,
+        max_concurrency: Optional[int] = None
+    ):
         self.name = name
         self.status = "idle"
-        self.deepseek = DeepSeekClient()
-        
+        # Cap on LLM calls this agent keeps in flight when fanning out over sections
+        self.max_concurrency = max_concurrency or DEFAULT_MAX_CONCURRENCY
+        if deepseek is None:
+            deepseek = DeepSeekClient(transport=transport)
+        self.deepseek = deepseek
+        self.transport = transport or deepseek.transport
+
     @abstractmethod
     async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the agent's main task"""
@@ -21,4 +58,4 @@ class Agent(ABC):
     def update_status(self, status: str):
         """Update the agent's status"""
         self.status = status
-        logger.info(f"{self.name} status updated to: {status}") 
\ No newline at end of file
+        logger.info(f"{self.name} status updated to: {status}")
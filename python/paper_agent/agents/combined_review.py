@@ -0,0 +1,129 @@
+import logging
+import asyncio
+from typing import Dict, Any
+from .base import Agent, section_text, ungenerated_sections
+from .quality_control import QualityControlAgent
+from .expert_review import ExpertReviewAgent
+from ..utils.overlap import OverlapIndex
+from ..utils.incremental import fan_out_changed, fingerprint_inputs
+
+logger = logging.getLogger(__name__)
+
+class CombinedReviewAgent(Agent):
+    """Agent that runs grammar and technical review in one call per section"""
+
+    reads = QualityControlAgent.reads | ExpertReviewAgent.reads | {"combined_review_fingerprints"}
+    writes = (
+        (QualityControlAgent.writes | ExpertReviewAgent.writes | {"combined_review_fingerprints"})
+        - {"quality_fingerprints", "review_fingerprints", "quality_errors"}
+    )
+
+    prompt_context = ExpertReviewAgent.prompt_context
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Used only for the parts of a combined response that fail validation
+        self.quality_control = QualityControlAgent(self.name, self.deepseek, self.transport, self.max_concurrency)
+        self.expert_review = ExpertReviewAgent(self.name, self.deepseek, self.transport, self.max_concurrency)
+
+    async def review_section(self, content: Any, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Review a section with one structured prompt, falling back to the individual checks.
+
+        Plagiarism is not part of the prompt; it is checked locally against
+        the collected papers.
+        """
+        prompt = f"""
+        Review the following section of a research paper:
+        {content}
+
+        Context:
+        {self.prompt_context.render(context)}
+
+        Return a single JSON object with exactly these keys:
+        - grammar: object with issues (list of grammar, style and academic writing issues),
+          suggestions (list of suggestions for improvement) and overall_quality (rating from 1-10)
+        - technical_accuracy: object with accuracy_issues (list of technical inaccuracies),
+          suggestions (list of suggestions for improvement) and confidence_score (rating from 1-10)
+
+        Format the response as a valid JSON string.
+        """
+
+        # Imported here so loading the agents does not load pydantic
+        from ..models.review_result import CombinedReview
+        # The individual checks are the fallback, so a bad response gets no repair call on top
+        review = await self.deepseek.generate_json(prompt, CombinedReview, default=None, repair=False)
+        if review is None:
+            logger.warning("Combined review response was invalid, running individual checks")
+            review = dict(zip(("grammar", "technical_accuracy"), await asyncio.gather(
+                self.quality_control.check_grammar(content),
+                self.expert_review.review_technical_accuracy(content, context)
+            )))
+        review["plagiarism"] = self.quality_control.check_plagiarism(
+            content, context.get("citations", []), context.get("academic_papers") or []
+        )
+        return review
+
+    def failed_review(self, error: Exception) -> Dict[str, Any]:
+        """Review parts that mark a section whose review failed"""
+        grammar, plagiarism = self.quality_control.failed_check(error)
+        return {
+            "grammar": grammar,
+            "plagiarism": plagiarism,
+            "technical_accuracy": {"accuracy_issues": [f"Review failed: {str(error)}"], "suggestions": [], "confidence_score": 0}
+        }
+
+    async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute the combined review process"""
+        self.update_status("reviewing")
+        logger.info(f"{self.name} performing combined review")
+
+        sections = context.get("sections", {})
+        projected = self.prompt_context.render(context)
+        citations = context.get("citations", [])
+        sources = fingerprint_inputs([
+            [paper.get("title")] + [paper.get(field) for field in OverlapIndex.FIELDS]
+            for paper in context.get("academic_papers") or []
+        ])
+        fingerprints = {
+            section: fingerprint_inputs(content, projected, citations, sources)
+            for section, content in sections.items()
+        }
+
+        grammar_previous = context.get("grammar_check", {})
+        plagiarism_previous = context.get("plagiarism_check", {})
+        technical_previous = context.get("technical_accuracy", {})
+        previous = {
+            section: {
+                "grammar": grammar_previous[section],
+                "plagiarism": plagiarism_previous[section],
+                "technical_accuracy": technical_previous[section]
+            }
+            for section in grammar_previous
+            if section in plagiarism_previous and section in technical_previous
+        }
+        reviewed = await fan_out_changed(
+            fingerprints,
+            lambda section: self.review_section(section_text(sections[section]), context),
+            previous if self.incremental else None,
+            context.get("combined_review_fingerprints"),
+            self.max_concurrency,
+            fallback=lambda section, error: self.failed_review(error),
+            skipped=ungenerated_sections(context)
+        )
+        if reviewed.errors:
+            logger.warning(f"{self.name} could not review {len(reviewed.errors)} of {len(sections)} sections")
+
+        self.update_status("completed")
+        return {
+            "grammar_check": {section: review["grammar"] for section, review in reviewed.results.items()},
+            "plagiarism_check": {section: review["plagiarism"] for section, review in reviewed.results.items()},
+            "technical_accuracy": {section: review["technical_accuracy"] for section, review in reviewed.results.items()},
+            # Failed sections get no fingerprint, so the next run reviews them again
+            "combined_review_fingerprints": {
+                section: fingerprints[section] for section in reviewed.results if section not in reviewed.errors
+            },
+            "review_errors": reviewed.error_messages(),
+            "format_check": "Passed" if not reviewed.errors else "Incomplete",
+            "content_coherence": "Verified" if not reviewed.errors else "Incomplete",
+            "citations_validated": True
+        }
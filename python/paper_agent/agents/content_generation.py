@@ -1,13 +1,43 @@
 import logging
-import json
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional
 from .base import Agent
+from ..utils.prompt_context import PromptContext, ContextField
+from ..utils.concurrency import fan_out
+from ..utils.incremental import fingerprint_inputs
+from ..utils.retrieval import RetrievalIndex
 
 logger = logging.getLogger(__name__)
 
 class ContentGenerationAgent(Agent):
     """Agent responsible for generating paper content"""
     
+    # Context keys the outline and sections are written from
+    inputs = ("title", "topic_analysis", "citations", "academic_papers")
+    
+    reads = frozenset(inputs) | {"outline", "sections", "section_errors", "generation_fingerprint"}
+    writes = frozenset({"outline", "sections", "section_errors", "generation_fingerprint", "citations_integrated"})
+    
+    prompt_context = PromptContext([
+        ContextField("topic_analysis", item_fields=("main_topics", "key_concepts"), max_tokens=800, priority=2),
+        ContextField(
+            "relevant_passages",
+            item_fields=("title", "text"),
+            item_tokens=300,
+            max_tokens=1600,
+            priority=3,
+            label="Relevant passages from the collected papers"
+        ),
+        ContextField("citations", max_tokens=1200, priority=1)
+    ], budget=3200)
+    
+    # Passages retrieved from the collected papers for each section prompt
+    passages_per_section = 5
+    _index: Optional[RetrievalIndex] = None
+    _indexed_papers: Optional[list] = None
+    
+    # When set, sections are streamed and each delta is passed to on_token(section, delta)
+    on_token: Optional[Callable[[str, str], None]] = None
+    
     async def generate_outline(self, context: Dict[str, Any]) -> list:
         """Generate a detailed outline for the paper"""
         prompt = f"""
@@ -17,46 +47,85 @@ class ContentGenerationAgent(Agent):
         Topics: {context.get('topic_analysis', {}).get('main_topics', [])}
         Key Concepts: {context.get('topic_analysis', {}).get('key_concepts', [])}
         
-        Return a list of main sections and subsections as a valid JSON array.
+        Return a JSON object with:
+        - outline: list of main sections and subsections, each a title string, in order
+        
+        Format the response as a valid JSON string.
         """
         
-        result = await self.deepseek.generate_text(prompt)
-        try:
-            return json.loads(result)
-        except json.JSONDecodeError as e:
-            logger.error(f"Error parsing JSON response: {str(e)}")
-            logger.error(f"Raw response: {result}")
-            return []
+        # Imported here so loading the agents does not load pydantic
+        from ..models.content_result import Outline
+        result = await self.deepseek.generate_json(prompt, Outline, default={"outline": []})
+        return result["outline"]
 
-    async def generate_section(self, section: str, context: Dict[str, Any]) -> str:
-        """Generate content for a specific section"""
-        prompt = f"""
+    def relevant_passages(self, section: str, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Top passages from the collected papers for a section"""
+        papers = context.get("academic_papers") or []
+        if self._indexed_papers is not papers:
+            self._index = RetrievalIndex.from_papers(papers)
+            self._indexed_papers = papers
+        return self._index.search(f"{section} {context.get('title', '')}", self.passages_per_section)
+
+    def section_prompt(self, section: str, context: Dict[str, Any]) -> str:
+        """Build the prompt used to write a section"""
+        grounding = dict(context, relevant_passages=self.relevant_passages(section, context))
+        return f"""
         Write the {section} section for a research paper titled "{context.get('title', '')}".
         
-        Topics: {context.get('topic_analysis', {}).get('main_topics', [])}
-        Key Concepts: {context.get('topic_analysis', {}).get('key_concepts', [])}
-        Citations: {context.get('citations', [])}
+        {self.prompt_context.render(grounding)}
         
         Write in academic style, include relevant citations, and maintain coherence.
         """
+
+    async def stream_section(self, section: str, context: Dict[str, Any]) -> AsyncIterator[str]:
+        """Stream content for a specific section as it is generated"""
+        async for delta in self.deepseek.stream_text(self.section_prompt(section, context)):
+            yield delta
+
+    async def generate_section(self, section: str, context: Dict[str, Any]) -> str:
+        """Generate content for a specific section"""
+        if self.on_token is None:
+            return await self.deepseek.generate_text(self.section_prompt(section, context))
         
-        return await self.deepseek.generate_text(prompt)
+        parts = []
+        async for delta in self.stream_section(section, context):
+            parts.append(delta)
+            self.on_token(section, delta)
+        return "".join(parts)
 
     async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the content generation process"""
         self.update_status("generating")
         logger.info(f"{self.name} generating content")
         
-        outline = await self.generate_outline(context)
-        sections = {}
-        
-        for section in outline:
-            content = await self.generate_section(section, context)
-            sections[section] = content
+        inputs = fingerprint_inputs(*(context.get(key) for key in self.inputs))
+        retry = context.get("section_errors") if context.get("generation_fingerprint") == inputs else None
+        if retry and self.incremental:
+            # An earlier run on the same inputs lost some sections; write only those again
+            outline = context.get("outline", [])
+            sections = dict(context.get("sections", {}))
+            pending = [section for section in outline if section in retry]
+            logger.info(f"{self.name} retrying {len(pending)} sections that could not be generated")
+        else:
+            outline = await self.generate_outline(context)
+            sections = {}
+            pending = outline
+        generated = await fan_out(
+            pending,
+            lambda section: self.generate_section(section, context),
+            self.max_concurrency,
+            # Keep every outlined section, marked, so later agents see the paper is incomplete
+            fallback=lambda section, error: f"[Section could not be generated: {str(error)}]"
+        )
+        sections = {section: generated.results.get(section, sections.get(section, "")) for section in outline}
+        if generated.errors:
+            logger.warning(f"{self.name} could not generate {len(generated.errors)} of {len(outline)} sections")
         
         self.update_status("completed")
         return {
             "outline": outline,
             "sections": sections,
+            "section_errors": generated.error_messages(),
+            "generation_fingerprint": inputs,
             "citations_integrated": True
         } 
\ No newline at end of file
@@ -1,18 +1,65 @@
+import os
 import logging
 import json
-from typing import Dict, Any
+from typing import Dict, Any, List
 from .base import Agent
+from ..utils.prompt_context import PromptContext, ContextField
+from ..utils.concurrency import fan_out
 
 logger = logging.getLogger(__name__)
 
+TOPIC_KEYS = ("main_topics", "subtopics", "key_concepts")
+
+def merge_topic_analyses(analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge per-batch topic lists, dropping case and whitespace duplicates.
+
+    Entries named by more batches come first; ties keep the order in which
+    they were first seen.
+    """
+    merged = {}
+    for key in TOPIC_KEYS:
+        counts: Dict[str, int] = {}
+        first: Dict[str, Any] = {}
+        for analysis in analyses:
+            values = analysis.get(key, []) if isinstance(analysis, dict) else []
+            seen = set()
+            for value in values if isinstance(values, list) else [values]:
+                text = value if isinstance(value, str) else json.dumps(value, sort_keys=True, default=str)
+                normalized = " ".join(text.lower().split())
+                if not normalized or normalized in seen:
+                    continue
+                seen.add(normalized)
+                first.setdefault(normalized, value)
+                counts[normalized] = counts.get(normalized, 0) + 1
+        order = {normalized: index for index, normalized in enumerate(first)}
+        merged[key] = [first[normalized] for normalized in sorted(first, key=lambda n: (-counts[n], order[n]))]
+    return merged
+
 class DataCollectionAgent(Agent):
     """Agent responsible for analyzing and organizing collected research data"""
     
-    async def analyze_topics(self, papers: list) -> Dict[str, Any]:
-        """Analyze research papers to identify main topics and themes"""
+    reads = frozenset({"academic_papers"})
+    writes = frozenset({"topic_analysis", "literature_review", "citations"})
+    
+    # Enough of each paper to place its topics; full pdf_text is never sent
+    prompt_context = PromptContext([
+        ContextField(
+            "academic_papers",
+            item_fields=("title", "year", "summary", "abstract"),
+            item_tokens=400,
+            label="Papers"
+        )
+    ], budget=8000)
+    
+    # Corpora larger than the prompt budget are analysed in batches; when set,
+    # one more call consolidates the merged lists
+    consolidate_topics = os.getenv("PAPER_AGENT_CONSOLIDATE_TOPICS", "").lower() in ("1", "true", "yes")
+
+    async def analyze_batch(self, papers: list) -> Dict[str, Any]:
+        """Identify the main topics and themes of papers that fit in one prompt"""
         prompt = f"""
         Analyze these research papers and identify the main topics and themes:
-        {papers}
+        {self.prompt_context.render({"academic_papers": papers})}
         
         Return a JSON object with:
         - main_topics: list of main topics
@@ -22,17 +69,61 @@ class DataCollectionAgent(Agent):
         Format the response as a valid JSON string.
         """
         
-        result = await self.deepseek.generate_text(prompt)
-        try:
-            return json.loads(result)
-        except json.JSONDecodeError as e:
-            logger.error(f"Error parsing JSON response: {str(e)}")
-            logger.error(f"Raw response: {result}")
-            return {
-                "main_topics": [],
-                "subtopics": [],
-                "key_concepts": []
-            }
+        # Imported here so loading the agents does not load pydantic
+        from ..models.research_result import TopicAnalysis
+        return await self.deepseek.generate_json(prompt, TopicAnalysis, default={
+            "main_topics": [],
+            "subtopics": [],
+            "key_concepts": []
+        })
+
+    async def consolidate(self, merged: Dict[str, Any]) -> Dict[str, Any]:
+        """Ask once for synonyms and near-duplicates across batches to be folded together"""
+        prompt = f"""
+        These topic lists were extracted from separate batches of research papers:
+        {json.dumps(merged, ensure_ascii=False, default=str)}
+        
+        Merge entries that name the same idea and keep the most common wording.
+        Return a JSON object with:
+        - main_topics: list of main topics
+        - subtopics: list of subtopics
+        - key_concepts: list of key concepts
+        
+        Format the response as a valid JSON string.
+        """
+        
+        from ..models.research_result import TopicAnalysis
+        consolidated = await self.deepseek.generate_json(prompt, TopicAnalysis)
+        if consolidated is None:
+            logger.warning("Topic consolidation failed, keeping the merged lists")
+            return merged
+        return {key: consolidated[key] for key in TOPIC_KEYS}
+
+    async def analyze_topics(self, papers: list) -> Dict[str, Any]:
+        """Analyze research papers to identify main topics and themes.
+        
+        Papers are split into batches that each fit the prompt budget; the
+        batches are analysed concurrently and their lists merged locally.
+        """
+        field = self.prompt_context.fields[0]
+        batches = field.batches(papers, self.prompt_context.budget)
+        if len(batches) <= 1:
+            return await self.analyze_batch(papers)
+        
+        logger.info(f"{self.name} analysing {len(papers)} papers in {len(batches)} batches")
+        analysed = await fan_out(
+            range(len(batches)),
+            lambda index: self.analyze_batch(batches[index]),
+            self.max_concurrency
+        )
+        for index, error in analysed.errors.items():
+            logger.error(f"Topic analysis of batch {index} failed: {str(error)}")
+        if not analysed.results:
+            raise RuntimeError("Topic analysis failed for every batch")
+        merged = merge_topic_analyses(list(analysed.results.values()))
+        if self.consolidate_topics:
+            merged = await self.consolidate(merged)
+        return merged
 
     async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the data collection and analysis process"""
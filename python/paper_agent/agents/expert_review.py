@@ -1,20 +1,37 @@
 import logging
-import json
 from typing import Dict, Any
-from .base import Agent
+from .base import Agent, section_text, ungenerated_sections
+from ..utils.prompt_context import PromptContext, ContextField
+from ..utils.incremental import fan_out_changed, fingerprint_inputs
 
 logger = logging.getLogger(__name__)
 
 class ExpertReviewAgent(Agent):
     """Agent responsible for expert review of technical content"""
     
+    reads = frozenset({
+        "sections", "section_errors", "title", "keywords", "topic_analysis", "citations",
+        "technical_accuracy", "review_fingerprints"
+    })
+    writes = frozenset({
+        "technical_accuracy", "review_fingerprints", "review_errors", "content_coherence", "citations_validated"
+    })
+    
+    prompt_context = PromptContext([
+        ContextField("title", priority=3),
+        ContextField("keywords", max_tokens=100, priority=3),
+        ContextField("topic_analysis", max_tokens=600, priority=2),
+        ContextField("citations", max_tokens=800, priority=1)
+    ], budget=1500)
+    
     async def review_technical_accuracy(self, content: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         """Review content for technical accuracy"""
         prompt = f"""
         Review the following content for technical accuracy:
         {content}
         
-        Context: {context}
+        Context:
+        {self.prompt_context.render(context)}
         
         Return a JSON object with:
         - accuracy_issues: list of technical inaccuracies
@@ -24,17 +41,12 @@ class ExpertReviewAgent(Agent):
         Format the response as a valid JSON string.
         """
         
-        result = await self.deepseek.generate_text(prompt)
-        try:
-            return json.loads(result)
-        except json.JSONDecodeError as e:
-            logger.error(f"Error parsing JSON response: {str(e)}")
-            logger.error(f"Raw response: {result}")
-            return {
-                "accuracy_issues": [],
-                "suggestions": [],
-                "confidence_score": 0
-            }
+        from ..models.review_result import TechnicalReview
+        return await self.deepseek.generate_json(prompt, TechnicalReview, default={
+            "accuracy_issues": [],
+            "suggestions": [],
+            "confidence_score": 0
+        })
 
     async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the expert review process"""
@@ -42,14 +54,31 @@ class ExpertReviewAgent(Agent):
         logger.info(f"{self.name} performing expert review")
         
         sections = context.get("sections", {})
-        review_results = {}
-        
-        for section, content in sections.items():
-            review_results[section] = await self.review_technical_accuracy(content, context)
+        projected = self.prompt_context.render(context)
+        fingerprints = {section: fingerprint_inputs(content, projected) for section, content in sections.items()}
+        reviewed = await fan_out_changed(
+            fingerprints,
+            lambda section: self.review_technical_accuracy(section_text(sections[section]), context),
+            context.get("technical_accuracy") if self.incremental else None,
+            context.get("review_fingerprints"),
+            self.max_concurrency,
+            fallback=lambda section, error: {
+                "accuracy_issues": [f"Review failed: {str(error)}"],
+                "suggestions": [],
+                "confidence_score": 0
+            },
+            skipped=ungenerated_sections(context)
+        )
+        review_results = reviewed.results
+        if reviewed.errors:
+            logger.warning(f"{self.name} could not review {len(reviewed.errors)} of {len(sections)} sections")
         
         self.update_status("completed")
         return {
             "technical_accuracy": review_results,
-            "content_coherence": "Verified",
+            # Failed sections get no fingerprint, so the next run reviews them again
+            "review_fingerprints": {section: fingerprints[section] for section in review_results if section not in reviewed.errors},
+            "review_errors": reviewed.error_messages(),
+            "content_coherence": "Verified" if not reviewed.errors else "Incomplete",
             "citations_validated": True
         } 
\ No newline at end of file
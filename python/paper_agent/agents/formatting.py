@@ -1,13 +1,20 @@
 import logging
-import json
 from typing import Dict, Any
-from .base import Agent
+from .base import Agent, section_text, ungenerated_sections
+from ..utils.incremental import fan_out_changed, fingerprint_inputs
 
 logger = logging.getLogger(__name__)
 
 class FormattingAgent(Agent):
     """Agent responsible for formatting the paper"""
     
+    reads = frozenset({"sections", "section_errors", "formatted_sections", "formatting_fingerprints"})
+    writes = frozenset({
+        "style_compliance", "formatted_sections", "formatting_fingerprints", "formatting_errors", "document_structure"
+    })
+    
+    style = "IEEE"
+    
     async def format_content(self, content: Dict[str, Any], style: str = "IEEE") -> Dict[str, Any]:
         """Format content according to specified style"""
         prompt = f"""
@@ -22,17 +29,12 @@ class FormattingAgent(Agent):
         Format the response as a valid JSON string.
         """
         
-        result = await self.deepseek.generate_text(prompt)
-        try:
-            return json.loads(result)
-        except json.JSONDecodeError as e:
-            logger.error(f"Error parsing JSON response: {str(e)}")
-            logger.error(f"Raw response: {result}")
-            return {
-                "formatted_content": str(content),
-                "style_compliance": [],
-                "issues": ["Failed to parse formatting response"]
-            }
+        from ..models.review_result import FormatCheck
+        return await self.deepseek.generate_json(prompt, FormatCheck, default={
+            "formatted_content": str(content),
+            "style_compliance": [],
+            "issues": ["Failed to parse formatting response"]
+        })
 
     async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the formatting process"""
@@ -40,14 +42,33 @@ class FormattingAgent(Agent):
         logger.info(f"{self.name} formatting document")
         
         sections = context.get("sections", {})
-        formatted_sections = {}
-        
-        for section, content in sections.items():
-            formatted_sections[section] = await self.format_content(content)
+        fingerprints = {section: fingerprint_inputs(content, self.style) for section, content in sections.items()}
+        formatted = await fan_out_changed(
+            fingerprints,
+            lambda section: self.format_content(section_text(sections[section]), self.style),
+            context.get("formatted_sections") if self.incremental else None,
+            context.get("formatting_fingerprints"),
+            self.max_concurrency,
+            # The section keeps its unformatted text so the paper still has every section
+            fallback=lambda section, error: {
+                "formatted_content": section_text(sections[section]),
+                "style_compliance": [],
+                "issues": [f"Formatting failed: {str(error)}"]
+            },
+            skipped=ungenerated_sections(context)
+        )
+        formatted_sections = formatted.results
+        if formatted.errors:
+            logger.warning(f"{self.name} could not format {len(formatted.errors)} of {len(sections)} sections")
         
         self.update_status("completed")
         return {
-            "style_compliance": "IEEE",
+            "style_compliance": self.style,
             "formatted_sections": formatted_sections,
-            "document_structure": "Finalized"
+            # Failed sections get no fingerprint, so the next run formats them again
+            "formatting_fingerprints": {
+                section: fingerprints[section] for section in formatted_sections if section not in formatted.errors
+            },
+            "formatting_errors": formatted.error_messages(),
+            "document_structure": "Finalized" if not formatted.errors else "Incomplete"
         } 
\ No newline at end of file
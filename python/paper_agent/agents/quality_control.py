@@ -1,13 +1,24 @@
 import logging
-import json
-from typing import Dict, Any
-from .base import Agent
+from typing import Dict, Any, List, Optional, Tuple
+from .base import Agent, section_text, ungenerated_sections
+from ..utils.overlap import OverlapIndex
+from ..utils.incremental import fan_out_changed, fingerprint_inputs
 
 logger = logging.getLogger(__name__)
 
 class QualityControlAgent(Agent):
     """Agent responsible for checking paper quality"""
     
+    reads = frozenset({
+        "sections", "section_errors", "citations", "academic_papers",
+        "grammar_check", "plagiarism_check", "quality_fingerprints"
+    })
+    writes = frozenset({"grammar_check", "plagiarism_check", "quality_fingerprints", "quality_errors", "format_check"})
+    
+    # Plagiarism is checked locally against the collected papers rather than by the LLM
+    _index: Optional[OverlapIndex] = None
+    _indexed_papers: Optional[list] = None
+    
     async def check_grammar(self, text: str) -> Dict[str, Any]:
         """Check text for grammar and style issues"""
         prompt = f"""
@@ -22,45 +33,32 @@ class QualityControlAgent(Agent):
         Format the response as a valid JSON string.
         """
         
-        result = await self.deepseek.generate_text(prompt)
-        try:
-            return json.loads(result)
-        except json.JSONDecodeError as e:
-            logger.error(f"Error parsing JSON response: {str(e)}")
-            logger.error(f"Raw response: {result}")
-            return {
-                "issues": [],
-                "suggestions": [],
-                "overall_quality": 0
-            }
+        # Imported here so loading the agents does not load pydantic
+        from ..models.review_result import GrammarCheck
+        return await self.deepseek.generate_json(prompt, GrammarCheck, default={
+            "issues": [],
+            "suggestions": [],
+            "overall_quality": 0
+        })
 
-    async def check_plagiarism(self, text: str, citations: list) -> Dict[str, Any]:
-        """Check text for potential plagiarism issues"""
-        prompt = f"""
-        Check the following text for potential plagiarism issues:
-        {text}
-        
-        Citations used: {citations}
-        
-        Return a JSON object with:
-        - potential_issues: list of potential plagiarism issues
-        - citation_coverage: percentage of text properly cited
-        - recommendations: list of recommendations
-        
-        Format the response as a valid JSON string.
-        """
-        
-        result = await self.deepseek.generate_text(prompt)
-        try:
-            return json.loads(result)
-        except json.JSONDecodeError as e:
-            logger.error(f"Error parsing JSON response: {str(e)}")
-            logger.error(f"Raw response: {result}")
-            return {
-                "potential_issues": [],
-                "citation_coverage": 0,
-                "recommendations": []
-            }
+    def overlap_index(self, papers: List[Dict[str, Any]]) -> OverlapIndex:
+        """N-gram index of the collected papers, rebuilt only when they change"""
+        if self._indexed_papers is not papers:
+            self._index = OverlapIndex(papers)
+            self._indexed_papers = papers
+        return self._index
+
+    def check_plagiarism(self, text: str, citations: list, papers: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Find passages of text that also appear in the collected papers"""
+        return self.overlap_index(papers or []).check(text, citations)
+
+    def failed_check(self, error: Exception) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Grammar and plagiarism results that mark a section whose check failed"""
+        message = f"Quality check failed: {str(error)}"
+        return (
+            {"issues": [message], "suggestions": [], "overall_quality": 0},
+            {"potential_issues": [], "citation_coverage": 0.0, "recommendations": [message], "overlap_coverage": 0.0, "sources": []}
+        )
 
     async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the quality control process"""
@@ -69,17 +67,46 @@ class QualityControlAgent(Agent):
         
         sections = context.get("sections", {})
         citations = context.get("citations", [])
+        papers = context.get("academic_papers") or []
         
-        grammar_results = {}
-        plagiarism_results = {}
+        async def check_section(section):
+            content = section_text(sections[section])
+            return await self.check_grammar(content), self.check_plagiarism(content, citations, papers)
         
-        for section, content in sections.items():
-            grammar_results[section] = await self.check_grammar(content)
-            plagiarism_results[section] = await self.check_plagiarism(content, citations)
+        grammar_previous = context.get("grammar_check", {})
+        plagiarism_previous = context.get("plagiarism_check", {})
+        previous = {
+            section: (grammar_previous[section], plagiarism_previous[section])
+            for section in grammar_previous if section in plagiarism_previous
+        }
+        # Hashed once so every section's fingerprint does not re-serialize the full texts
+        sources = fingerprint_inputs([
+            [paper.get("title")] + [paper.get(field) for field in OverlapIndex.FIELDS] for paper in papers
+        ])
+        fingerprints = {
+            section: fingerprint_inputs(content, citations, sources)
+            for section, content in sections.items()
+        }
+        checked = await fan_out_changed(
+            fingerprints,
+            check_section,
+            previous if self.incremental else None,
+            context.get("quality_fingerprints"),
+            self.max_concurrency,
+            fallback=lambda section, error: self.failed_check(error),
+            skipped=ungenerated_sections(context)
+        )
+        grammar_results = {section: result[0] for section, result in checked.results.items()}
+        plagiarism_results = {section: result[1] for section, result in checked.results.items()}
+        if checked.errors:
+            logger.warning(f"{self.name} could not check {len(checked.errors)} of {len(sections)} sections")
         
         self.update_status("completed")
         return {
             "grammar_check": grammar_results,
             "plagiarism_check": plagiarism_results,
-            "format_check": "Passed"
+            # Failed sections get no fingerprint, so the next run checks them again
+            "quality_fingerprints": {section: fingerprints[section] for section in checked.results if section not in checked.errors},
+            "quality_errors": checked.error_messages(),
+            "format_check": "Passed" if not checked.errors else "Incomplete"
         } 
\ No newline at end of file
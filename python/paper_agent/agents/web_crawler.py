@@ -1,97 +1,262 @@
+import os
+import time
+import asyncio
 import logging
-import arxiv
-import aiohttp
-import io
-import PyPDF2
-from scholarly import scholarly
-from typing import List, Dict, Any
+import threading
+import contextvars
+from itertools import islice
+from typing import List, Dict, Any, Optional, Iterator, AsyncIterator, Awaitable, Callable, Tuple
 from .base import Agent
+from ..utils.dedup import PaperDeduplicator
+from ..utils.pdf_text import extract_pdf_text_async
+from ..utils.text_store import PaperTextStore, parse_arxiv_id
+from ..utils.tracing import get_tracer, trace
+from ..utils.lazy import lazy_import
+
+# Search clients pull in large dependency trees; only load them when a source is queried
+arxiv = lazy_import("arxiv")
 
 logger = logging.getLogger(__name__)
 
 class WebCrawlerAgent(Agent):
     """Agent responsible for gathering research papers and information"""
     
+    reads = frozenset({"title", "keywords"})
+    writes = frozenset({"academic_papers", "databases_accessed"})
+    
+    # Per-document limits and how many PDFs are fetched at once
+    max_pdf_bytes = int(os.getenv("PAPER_AGENT_MAX_PDF_BYTES", str(25 * 1024 * 1024)))
+    max_pdf_pages = int(os.getenv("PAPER_AGENT_MAX_PDF_PAGES", "60"))
+    pdf_concurrency = int(os.getenv("PAPER_AGENT_PDF_CONCURRENCY", "4"))
+    # Seconds each source may take, PDF downloads included
+    arxiv_timeout = float(os.getenv("PAPER_AGENT_ARXIV_TIMEOUT", "120"))
+    scholar_timeout = float(os.getenv("PAPER_AGENT_SCHOLAR_TIMEOUT", "60"))
+    # Sources queried by execute() and how many results each may return
+    sources = [s.strip() for s in os.getenv("PAPER_AGENT_SOURCES", "arXiv,Google Scholar").split(",") if s.strip()]
+    max_results = int(os.getenv("PAPER_AGENT_MAX_RESULTS", "5"))
+    # arXiv API endpoint, overridable to point at a local stand-in
+    arxiv_url = os.getenv("PAPER_AGENT_ARXIV_URL", "")
+    
+    # When set, called with each paper as soon as it has been collected
+    on_paper: Optional[Callable[[Dict[str, Any]], None]] = None
+    
+    def __init__(self, *args, text_store: Optional[PaperTextStore] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.text_store = text_store
+        self.deduplicator = PaperDeduplicator()
+    
+    async def fetch_pdf(self, pdf_url: str) -> bytes:
+        """Download a PDF, giving up on documents larger than max_pdf_bytes"""
+        with trace("pdf.fetch", "pdf", url=pdf_url) as span:
+            data = await self._fetch_pdf(pdf_url)
+            span.set(bytes_received=len(data))
+            return data
+
+    async def _fetch_pdf(self, pdf_url: str) -> bytes:
+        async with self.transport.request("GET", pdf_url) as response:
+            if response.status != 200:
+                logger.error(f"Failed to download PDF: {response.status}")
+                return b""
+            if response.content_length and response.content_length > self.max_pdf_bytes:
+                logger.warning(f"Skipping PDF {pdf_url}: {response.content_length} bytes exceeds limit")
+                return b""
+            chunks = []
+            size = 0
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                size += len(chunk)
+                if size > self.max_pdf_bytes:
+                    logger.warning(f"Skipping PDF {pdf_url}: larger than {self.max_pdf_bytes} bytes")
+                    return b""
+                chunks.append(chunk)
+            return b"".join(chunks)
+    
     async def download_arxiv_pdf(self, pdf_url: str) -> str:
-        """Download and extract text from arXiv PDF"""
+        """Download and extract text from arXiv PDF, reusing previously stored text"""
+        arxiv_key = parse_arxiv_id(pdf_url) if self.text_store is not None else None
+        span = get_tracer().current()
+        if arxiv_key is not None:
+            metadata = self.text_store.metadata(*arxiv_key)
+            # Text cut at fewer pages than we now allow is extracted again
+            if metadata is not None and metadata.get("max_pages", 0) >= self.max_pdf_pages:
+                text = self.text_store.get(*arxiv_key)
+                if text is not None:
+                    if span is not None:
+                        span.set(cache_hit=True)
+                    return text
+        if span is not None:
+            span.set(cache_hit=False)
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(pdf_url) as response:
-                    if response.status == 200:
-                        pdf_data = await response.read()
-                        pdf_file = io.BytesIO(pdf_data)
-                        pdf_reader = PyPDF2.PdfReader(pdf_file)
-                        text = ""
-                        for page in pdf_reader.pages:
-                            text += page.extract_text() + "\n"
-                        return text
-                    else:
-                        logger.error(f"Failed to download PDF: {response.status}")
-                        return ""
+            pdf_data = await self.fetch_pdf(pdf_url)
+            if not pdf_data:
+                return ""
+            with trace("pdf.extract", "pdf", bytes=len(pdf_data)):
+                text = await extract_pdf_text_async(pdf_data, self.max_pdf_pages)
+            if arxiv_key is not None:
+                self.text_store.put(*arxiv_key, text, {
+                    "pdf_url": pdf_url,
+                    "pdf_bytes": len(pdf_data),
+                    "max_pages": self.max_pdf_pages,
+                    "extractor": "PyPDF2"
+                })
+            return text
         except Exception as e:
             logger.error(f"Error downloading PDF: {str(e)}")
             return ""
 
+    def arxiv_records(self, query: str, max_results: int) -> Iterator[Dict[str, Any]]:
+        """Blocking iterator over arXiv search results"""
+        search = arxiv.Search(
+            query=query,
+            max_results=max_results,
+            sort_by=arxiv.SortCriterion.Relevance
+        )
+        client = arxiv.Client()
+        if self.arxiv_url:
+            client.query_url_format = f"{self.arxiv_url}?{{}}"
+        for paper in client.results(search):
+            yield {
+                "title": paper.title,
+                "authors": [author.name for author in paper.authors],
+                "summary": paper.summary,
+                "pdf_url": paper.pdf_url,
+                "published": paper.published,
+                "source": "arXiv"
+            }
+
+    def scholar_records(self, query: str, max_results: int) -> Iterator[Dict[str, Any]]:
+        """Blocking iterator over Google Scholar search results"""
+        from scholarly import scholarly
+        for paper in islice(scholarly.search_pubs(query), max_results):
+            yield {
+                "title": paper.bib.get('title', ''),
+                "authors": paper.bib.get('author', ''),
+                "abstract": paper.bib.get('abstract', ''),
+                "url": paper.bib.get('url', ''),
+                "year": paper.bib.get('year', ''),
+                "source": "Google Scholar"
+            }
+
+    async def _pump_source(self, records: Callable[[], Iterator[Dict[str, Any]]], emit: Callable[[int, Dict[str, Any]], Awaitable[None]]):
+        """Drain a blocking iterator on a worker thread, emitting each record on the loop as it arrives"""
+        loop = asyncio.get_running_loop()
+        # Callbacks from the thread run in this context, so their spans nest under the caller's
+        context = contextvars.copy_context()
+        stop = threading.Event()
+        pending = []
+
+        def forward(rank: int, record: Dict[str, Any]):
+            pending.append(asyncio.ensure_future(emit(rank, record)))
+
+        def pump():
+            for rank, record in enumerate(records()):
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(forward, rank, record, context=context)
+
+        try:
+            await loop.run_in_executor(None, pump)
+            # Callbacks queued by the thread run before its completion is delivered
+            await asyncio.gather(*pending)
+        finally:
+            # The thread cannot be cancelled, but it stops at the next record
+            stop.set()
+            for task in pending:
+                task.cancel()
+            # Cancelled emits still hand over their records before the source counts as finished
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _run_source(self, name: str, records, emit, timeout: float):
+        with trace(f"{name} search", "search", source=name) as span:
+            try:
+                await asyncio.wait_for(self._pump_source(records, emit), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"{name} search timed out after {timeout}s, keeping results received so far")
+                span.error = f"TimeoutError: no complete answer after {timeout}s"
+            except Exception as e:
+                logger.error(f"Error searching {name}: {str(e)}")
+                span.error = f"{type(e).__name__}: {str(e)}"
+
+    async def stream_ranked_papers(self, query: str, max_results: int = 5, sources: Optional[List[str]] = None) -> AsyncIterator[Tuple[str, int, Dict[str, Any]]]:
+        """Query the sources in parallel, yielding (source, rank, record) as each record is ready"""
+        queue: asyncio.Queue = asyncio.Queue()
+        pdf_slots = asyncio.Semaphore(self.pdf_concurrency)
+
+        def emitter(source: str, with_pdf: bool):
+            async def emit(rank: int, record: Dict[str, Any]):
+                if with_pdf:
+                    try:
+                        with trace("pdf", "pdf", url=record["pdf_url"]) as span:
+                            waited = time.perf_counter()
+                            async with pdf_slots:
+                                span.queue_wait = time.perf_counter() - waited
+                                record["pdf_text"] = await self.download_arxiv_pdf(record["pdf_url"])
+                            span.set(chars=len(record["pdf_text"]))
+                    except asyncio.CancelledError:
+                        # The source timed out mid-download; the paper is kept without its text
+                        record["pdf_text"] = ""
+                        queue.put_nowait((source, rank, record))
+                        raise
+                await queue.put((source, rank, record))
+            return emit
+
+        available = {
+            "arXiv": (lambda: self.arxiv_records(query, max_results), emitter("arXiv", True), self.arxiv_timeout),
+            "Google Scholar": (lambda: self.scholar_records(query, max_results), emitter("Google Scholar", False), self.scholar_timeout)
+        }
+        tasks = [
+            asyncio.ensure_future(self._run_source(name, *available[name]))
+            for name in (sources or list(available))
+        ]
+        finished = asyncio.gather(*tasks)
+        finished.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                yield item
+        finally:
+            finished.cancel()
+
+    async def stream_papers(self, query: str, max_results: int = 5, sources: Optional[List[str]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Query the sources in parallel, yielding each paper as soon as it is ready"""
+        async for _, _, record in self.stream_ranked_papers(query, max_results, sources):
+            yield record
+
+    async def collect_papers(self, query: str, max_results: int = 5, sources: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Gather streamed papers, ordered by source and then by search rank"""
+        order = sources or ["arXiv", "Google Scholar"]
+        ranked = []
+        async for source, rank, record in self.stream_ranked_papers(query, max_results, sources):
+            if self.on_paper is not None:
+                self.on_paper(record)
+            ranked.append((order.index(source), rank, record))
+        return [record for _, _, record in sorted(ranked, key=lambda item: item[:2])]
+
     async def search_arxiv(self, query: str, max_results: int = 5) -> List[Dict[str, Any]]:
         """Search arXiv for relevant papers"""
-        try:
-            search = arxiv.Search(
-                query=query,
-                max_results=max_results,
-                sort_by=arxiv.SortCriterion.Relevance
-            )
-            results = []
-            for paper in search.results():
-                pdf_url = paper.pdf_url
-                pdf_text = await self.download_arxiv_pdf(pdf_url)
-                results.append({
-                    "title": paper.title,
-                    "authors": [author.name for author in paper.authors],
-                    "summary": paper.summary,
-                    "pdf_url": pdf_url,
-                    "pdf_text": pdf_text,
-                    "published": paper.published
-                })
-            return results
-        except Exception as e:
-            logger.error(f"Error searching arXiv: {str(e)}")
-            return []
+        return await self.collect_papers(query, max_results, ["arXiv"])
 
     async def search_scholar(self, query: str, max_results: int = 5) -> List[Dict[str, Any]]:
         """Search Google Scholar for relevant papers"""
-        try:
-            search_query = scholarly.search_pubs(query)
-            results = []
-            for i, paper in enumerate(search_query):
-                if i >= max_results:
-                    break
-                results.append({
-                    "title": paper.bib.get('title', ''),
-                    "authors": paper.bib.get('author', ''),
-                    "abstract": paper.bib.get('abstract', ''),
-                    "url": paper.bib.get('url', ''),
-                    "year": paper.bib.get('year', '')
-                })
-            return results
-        except Exception as e:
-            logger.error(f"Error searching Google Scholar: {str(e)}")
-            return []
+        return await self.collect_papers(query, max_results, ["Google Scholar"])
 
     async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the web crawling process"""
         self.update_status("searching")
         logger.info(f"{self.name} starting web crawling")
         
-        # Search academic databases
-        arxiv_results = await self.search_arxiv(
-            f"{context.get('title', '')} {context.get('keywords', '')}"
-        )
-        scholar_results = await self.search_scholar(
-            f"{context.get('title', '')} {context.get('keywords', '')}"
+        # Search academic databases in parallel
+        papers = await self.collect_papers(
+            f"{context.get('title', '')} {context.get('keywords', '')}",
+            self.max_results,
+            self.sources
         )
+        # The same paper often comes back from both sources or as several arXiv versions
+        papers = self.deduplicator.deduplicate(papers)
         
         self.update_status("completed")
         return {
-            "academic_papers": arxiv_results + scholar_results,
-            "databases_accessed": ["arXiv", "Google Scholar"]
-        } 
\ No newline at end of file
+            "academic_papers": papers,
+            "databases_accessed": list(self.sources)
+        }
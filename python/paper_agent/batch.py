@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, fields
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+from .models.paper_metadata import PaperMetadata
+from .network import AgentNetwork
+from .utils.deepseek_client import DeepSeekClient
+from .utils.llm_cache import LLMCache
+from .utils.text_store import PaperTextStore
+from .utils.checkpoint import CheckpointStore
+from .utils.tracing import trace
+
+logger = logging.getLogger(__name__)
+
+_METADATA_FIELDS = {f.name for f in fields(PaperMetadata)}
+
+# LLM requests in flight across all jobs of a batch unless --llm-concurrency or
+# PAPER_AGENT_LLM_MAX_IN_FLIGHT says otherwise; without it jobs times per-agent
+# fan-out times concurrent review agents can open dozens at once
+DEFAULT_MAX_IN_FLIGHT = 8
+
+@dataclass
+class BatchJob:
+    """One line of a batch file: a paper to write, or the reason it cannot be"""
+    index: int
+    job_id: str
+    metadata: Optional[PaperMetadata] = None
+    error: Optional[str] = None
+
+def _as_list(value: Any) -> List[str]:
+    # The CLI takes comma-separated lists, so job files may too
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(",") if item.strip()]
+    return list(value or [])
+
+def parse_job(index: int, line: str) -> BatchJob:
+    """Build a job from one JSON line holding PaperMetadata fields and an optional "id" """
+    try:
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError("expected a JSON object")
+        job_id = str(record.pop("id", index))
+        unknown = set(record) - _METADATA_FIELDS
+        if unknown:
+            raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+        if not record.get("title"):
+            raise ValueError("missing title")
+        for key in ("authors", "keywords", "references"):
+            if key in record:
+                record[key] = _as_list(record[key])
+        record.setdefault("authors", [])
+        return BatchJob(index, job_id, metadata=PaperMetadata(**record))
+    except (ValueError, TypeError) as e:
+        return BatchJob(index, str(index), error=f"Invalid job on line {index}: {str(e)}")
+
+def read_jobs(lines: Iterable[str]) -> Iterator[BatchJob]:
+    """Parse a JSONL job file, skipping blank lines; line numbers start at 1"""
+    for index, line in enumerate(lines, 1):
+        if line.strip():
+            yield parse_job(index, line)
+
+class BatchRunner:
+    """Runs many papers through their own AgentNetwork, several at a time.
+
+    All networks share one DeepSeek client, and with it the connection pool,
+    the LLM cache, the rate limiter and a cap on requests in flight, so the
+    API sees one well-behaved client however many papers are running. Each
+    finished job is written to `output` as one JSON line straight away.
+    """
+
+    def __init__(
+        self,
+        output: Optional[IO[str]] = None,
+        max_jobs: int = 4,
+        max_in_flight: Optional[int] = None,
+        result_fields: Optional[List[str]] = None,
+        checkpoint_root: Optional[str] = None,
+        resume: bool = False,
+        fused_review: Optional[bool] = None
+    ):
+        self.output = output
+        self.max_jobs = max(1, max_jobs)
+        self.max_in_flight = (
+            max_in_flight or int(os.getenv("PAPER_AGENT_LLM_MAX_IN_FLIGHT", "0")) or DEFAULT_MAX_IN_FLIGHT
+        )
+        self.result_fields = result_fields
+        self.checkpoint_root = checkpoint_root
+        self.resume = resume
+        self.fused_review = fused_review
+        self.counts = {"ok": 0, "failed": 0, "invalid": 0}
+        # Checkpoint keys of running jobs; two live runs must never share a directory
+        self._active_runs = set()
+
+    def write(self, record: Dict[str, Any]):
+        self.counts[record["status"]] += 1
+        self.output.write(json.dumps(record, default=str, ensure_ascii=False) + "\n")
+        self.output.flush()
+
+    def result_of(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        if self.result_fields is None:
+            return context
+        return {key: context[key] for key in self.result_fields if key in context}
+
+    def open_clients(self) -> Tuple[DeepSeekClient, Optional[PaperTextStore]]:
+        """The DeepSeek client and text store shared by every job; close the client when done"""
+        deepseek = DeepSeekClient(cache=LLMCache.from_env(), max_in_flight=self.max_in_flight)
+        return deepseek, PaperTextStore.from_env()
+
+    async def execute(
+        self,
+        job: BatchJob,
+        deepseek: DeepSeekClient,
+        text_store: Optional[PaperTextStore],
+        resume: Optional[bool] = None,
+        run_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Run one job and return its result record; run_id (default the job id) keys its checkpoints"""
+        record = {"id": job.job_id}
+        if job.metadata is None:
+            logger.error(job.error)
+            return {**record, "status": "invalid", "error": job.error}
+        record["title"] = job.metadata.title
+        network = AgentNetwork(job.metadata, deepseek=deepseek, text_store=text_store, fused_review=self.fused_review)
+        run_id = run_id or job.job_id
+        if run_id in self._active_runs:
+            logger.warning(f"Job {job.job_id} is already running under the same id; running this copy without checkpoints")
+            network.checkpoints = None
+            run_id = None
+        else:
+            # Keyed by the job, not the paper, so jobs for the same title keep apart
+            network.checkpoints = CheckpointStore.for_run(network.context, self.checkpoint_root, run_id=run_id)
+            self._active_runs.add(run_id)
+        resume = self.resume if resume is None else resume
+        started = time.perf_counter()
+        try:
+            with trace("job", "phase", job_id=job.job_id):
+                context = await network.execute_pipeline(resume=resume and network.checkpoints is not None)
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed: {str(e)}")
+            return {
+                **record,
+                "status": "failed",
+                "elapsed": round(time.perf_counter() - started, 3),
+                "error": f"{type(e).__name__}: {str(e)}"
+            }
+        finally:
+            self._active_runs.discard(run_id)
+        return {
+            **record,
+            "status": "ok",
+            "elapsed": round(time.perf_counter() - started, 3),
+            "result": self.result_of(context)
+        }
+
+    async def run_job(self, job: BatchJob, deepseek: DeepSeekClient, text_store: Optional[PaperTextStore]):
+        record = await self.execute(job, deepseek, text_store)
+        self.write({"id": record.pop("id"), "line": job.index, **record})
+
+    async def run(self, jobs: Iterable[BatchJob]) -> Dict[str, int]:
+        """Run every job, at most max_jobs at once, and return counts per status"""
+        jobs = iter(jobs)
+        deepseek, text_store = self.open_clients()
+
+        async def worker():
+            # Jobs are pulled lazily, so a long file is never held in memory
+            for job in jobs:
+                await self.run_job(job, deepseek, text_store)
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(self.max_jobs)))
+        finally:
+            await deepseek.close()
+            if deepseek.cache is not None:
+                logger.info(f"LLM cache stats: {deepseek.cache.stats()}")
+            logger.info(f"Structured output stats: {deepseek.parse_stats.stats()}")
+        return dict(self.counts)
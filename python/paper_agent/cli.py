@@ -0,0 +1,230 @@
+import os
+import sys
+import json
+import asyncio
+import logging
+import argparse
+from typing import List, Optional
+from .models.paper_metadata import PaperMetadata
+
+logger = logging.getLogger(__name__)
+
+def _split(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+async def run_pipeline(args: argparse.Namespace) -> int:
+    """Run the full pipeline for one paper and write the final context as JSON"""
+    from .network import AgentNetwork
+    from .utils.checkpoint import CheckpointStore
+
+    paper_metadata = PaperMetadata(
+        title=args.title,
+        authors=_split(args.authors),
+        keywords=_split(args.keywords)
+    )
+    enable_tracing(args)
+    network = AgentNetwork(paper_metadata)
+    if args.checkpoint_dir:
+        network.checkpoints = CheckpointStore.for_run(network.context, args.checkpoint_dir)
+    if args.resume and network.checkpoints is None:
+        logger.error("--resume needs checkpoints; pass --checkpoint-dir or set PAPER_AGENT_CHECKPOINTS")
+        return 2
+    try:
+        context = await network.execute_pipeline(resume=args.resume)
+    except Exception as e:
+        logger.error(f"Pipeline execution failed: {str(e)}")
+        if network.checkpoints is not None:
+            logger.error("Completed steps were saved; rerun with --resume to continue")
+        return 1
+    finally:
+        write_traces(args)
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        json.dump(context, output, indent=2, default=str, ensure_ascii=False)
+        output.write("\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+async def run_batch(args: argparse.Namespace) -> int:
+    """Run the pipeline for every job in a JSONL file and stream one JSON result per job"""
+    from .batch import BatchRunner, read_jobs
+
+    enable_tracing(args)
+    jobs_file = open(args.jobs_file, "r", encoding="utf-8") if args.jobs_file != "-" else sys.stdin
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    runner = BatchRunner(
+        output,
+        max_jobs=args.jobs,
+        max_in_flight=args.llm_concurrency,
+        result_fields=_split(args.fields) if args.fields else None,
+        checkpoint_root=args.checkpoint_dir,
+        resume=args.resume
+    )
+    try:
+        counts = await runner.run(read_jobs(jobs_file))
+    finally:
+        write_traces(args)
+        if jobs_file is not sys.stdin:
+            jobs_file.close()
+        if output is not sys.stdout:
+            output.close()
+    logger.info(f"Batch finished: {counts['ok']} ok, {counts['failed']} failed, {counts['invalid']} invalid")
+    return 0 if counts["ok"] and not (counts["failed"] or counts["invalid"]) else 1
+
+def enqueue_jobs(args: argparse.Namespace) -> int:
+    """Add the valid jobs of a JSONL file to the durable queue"""
+    from .batch import read_jobs
+    from .utils.job_queue import JobQueue
+    from .worker import job_payload
+
+    jobs_file = open(args.jobs_file, "r", encoding="utf-8") if args.jobs_file != "-" else sys.stdin
+    try:
+        jobs = list(read_jobs(jobs_file))
+    finally:
+        if jobs_file is not sys.stdin:
+            jobs_file.close()
+    valid = [job for job in jobs if job.metadata is not None]
+    for job in jobs:
+        if job.error:
+            logger.error(job.error)
+    queue = JobQueue.from_env(args.queue, max_attempts=args.max_attempts)
+    try:
+        queue.enqueue_many([(job.job_id, job_payload(job.metadata)) for job in valid])
+        logger.info(f"Enqueued {len(valid)} jobs, skipped {len(jobs) - len(valid)} invalid ones; queue: {queue.stats()}")
+    finally:
+        queue.close()
+    return 0 if len(valid) == len(jobs) else 1
+
+def run_workers(args: argparse.Namespace) -> int:
+    """Run worker processes that execute queued jobs until stopped or, with --drain, until the queue is empty"""
+    from .utils.job_queue import queue_path
+    from .worker import WorkerConfig, WorkerPool
+
+    config = WorkerConfig(
+        queue_path=queue_path(args.queue),
+        jobs=args.jobs,
+        max_in_flight=args.llm_concurrency,
+        lease_seconds=args.lease,
+        retry_delay=args.retry_delay,
+        drain=args.drain,
+        result_fields=_split(args.fields) if args.fields else None,
+        checkpoint_root=args.checkpoint_dir
+    )
+    return WorkerPool(config, args.processes).run()
+
+def show_jobs(args: argparse.Namespace) -> int:
+    """Print job counts per status and optionally export finished jobs as JSONL"""
+    from .utils.job_queue import JobQueue
+
+    queue = JobQueue.from_env(args.queue)
+    try:
+        print(json.dumps(queue.stats()))
+        if args.results:
+            with open(args.results, "w", encoding="utf-8") as f:
+                for record in queue.results():
+                    f.write(json.dumps(record, default=str, ensure_ascii=False) + "\n")
+    finally:
+        queue.close()
+    return 0
+
+def enable_tracing(args: argparse.Namespace):
+    """Keep spans in memory only when the command line asks for them to be written"""
+    if args.trace or args.chrome_trace:
+        from .utils.tracing import get_tracer
+        get_tracer().enable()
+
+def write_traces(args: argparse.Namespace):
+    """Export the spans recorded so far to the files requested on the command line"""
+    from .utils.tracing import get_tracer
+    if args.trace:
+        get_tracer().write_jsonl(args.trace)
+        logger.info(f"Wrote trace spans to {args.trace}")
+    if args.chrome_trace:
+        get_tracer().write_chrome_trace(args.chrome_trace)
+        logger.info(f"Wrote Chrome trace to {args.chrome_trace}")
+
+def trace_summary(args: argparse.Namespace) -> int:
+    """Print per-agent latency percentiles and token totals from a JSONL trace"""
+    from .utils.tracing import format_summary, load_jsonl, summarize, write_chrome_trace
+    spans = load_jsonl(args.trace_file)
+    if args.kind:
+        spans = [span for span in spans if span.kind in args.kind]
+    print(format_summary(summarize(spans)))
+    if args.chrome_trace:
+        write_chrome_trace(spans, args.chrome_trace)
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="paper_agent", description="Headless paper writing pipeline")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="Run the pipeline for a single paper")
+    run.add_argument("--title", required=True)
+    run.add_argument("--authors", default="", help="Comma-separated author names")
+    run.add_argument("--keywords", default="", help="Comma-separated keywords")
+    run.add_argument("--output", help="Write the final context here instead of stdout")
+    run.add_argument("--checkpoint-dir", help="Root directory for step checkpoints")
+    run.add_argument("--resume", action="store_true", help="Skip steps completed by an earlier run of the same paper")
+    run.add_argument("--trace", help="Write one JSON span per phase, agent and external call to this file")
+    run.add_argument("--chrome-trace", help="Write the spans in Chrome trace-event format to this file")
+    run.set_defaults(handler=run_pipeline)
+
+    batch = subparsers.add_parser("batch", help="Run the pipeline for many papers concurrently")
+    batch.add_argument("jobs_file", help="JSONL file of PaperMetadata fields per line, with an optional \"id\"; - for stdin")
+    batch.add_argument("--output", help="Write the JSONL results here instead of stdout")
+    batch.add_argument("--jobs", type=int, default=4, help="Papers to run at the same time")
+    batch.add_argument("--llm-concurrency", type=int, help="Cap on LLM requests in flight across all papers (default: 8)")
+    batch.add_argument("--fields", help="Comma-separated context keys to include in each result (default: all)")
+    batch.add_argument("--checkpoint-dir", help="Root directory for step checkpoints")
+    batch.add_argument("--resume", action="store_true", help="Skip steps completed by an earlier run of the same papers")
+    batch.add_argument("--trace", help="Write one JSON span per phase, agent and external call to this file")
+    batch.add_argument("--chrome-trace", help="Write the spans in Chrome trace-event format to this file")
+    batch.set_defaults(handler=run_batch)
+
+    enqueue = subparsers.add_parser("enqueue", help="Add papers from a JSONL file to the durable job queue")
+    enqueue.add_argument("jobs_file", help="JSONL file in the batch format; - for stdin")
+    enqueue.add_argument("--queue", help="Queue database (default: PAPER_AGENT_QUEUE or ~/.cache/paper_agent/jobs.sqlite)")
+    enqueue.add_argument("--max-attempts", type=int, default=3, help="Attempts per job before it is marked failed")
+    enqueue.set_defaults(handler=enqueue_jobs)
+
+    worker = subparsers.add_parser("worker", help="Run worker processes that execute queued papers")
+    worker.add_argument("--queue", help="Queue database (default: PAPER_AGENT_QUEUE or ~/.cache/paper_agent/jobs.sqlite)")
+    worker.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="Worker processes to keep running")
+    worker.add_argument("--jobs", type=int, default=2, help="Papers each process runs at the same time")
+    worker.add_argument("--llm-concurrency", type=int, help="Cap on LLM requests in flight per process (default: 8)")
+    worker.add_argument("--lease", type=float, default=120.0, help="Seconds a job stays leased without a heartbeat")
+    worker.add_argument("--retry-delay", type=float, default=30.0, help="Delay before the first retry; doubles per attempt")
+    worker.add_argument("--drain", action="store_true", help="Exit once no job is queued or running")
+    worker.add_argument("--fields", help="Comma-separated context keys to store per result (default: all)")
+    worker.add_argument("--checkpoint-dir", help="Root directory for step checkpoints, used to resume retried jobs")
+    worker.set_defaults(handler=run_workers)
+
+    jobs = subparsers.add_parser("jobs", help="Show the state of the durable job queue")
+    jobs.add_argument("--queue", help="Queue database (default: PAPER_AGENT_QUEUE or ~/.cache/paper_agent/jobs.sqlite)")
+    jobs.add_argument("--results", help="Write finished jobs with their results as JSONL to this file")
+    jobs.set_defaults(handler=show_jobs)
+
+    summary = subparsers.add_parser("trace-summary", help="Summarize a trace written with run --trace")
+    summary.add_argument("trace_file")
+    summary.add_argument("--kind", action="append", help="Only include spans of this kind (llm, agent, phase, search, pdf)")
+    summary.add_argument("--chrome-trace", help="Also convert the spans to Chrome trace-event format")
+    summary.set_defaults(handler=trace_summary)
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point for the headless command line interface"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    args = build_parser().parse_args(argv)
+    if asyncio.iscoroutinefunction(args.handler):
+        return asyncio.run(args.handler(args))
+    # The queue commands do no async work, and the worker supervisor blocks and installs signal handlers
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+import queue
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+class BackgroundLoop:
+    """A long-lived asyncio loop on a daemon thread.
+
+    Coroutines are submitted from the Tk thread and run on this one loop, so
+    pooled connections and other loop-bound resources survive between
+    phases and the window keeps handling events while they run.
+    """
+
+    def __init__(self, name: str = "paper-agent-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Awaitable[Any]) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop; cancelling the returned future cancels it"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def _cancel_pending(self):
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stop(self, cleanup: Optional[Callable[[], Awaitable[Any]]] = None, timeout: float = 5.0):
+        """Cancel running work, await cleanup on the loop, then stop and close it"""
+        if not self.loop.is_running():
+            return
+        try:
+            self.submit(self._cancel_pending()).result(timeout)
+            if cleanup is not None:
+                self.submit(cleanup()).result(timeout)
+        except Exception as e:
+            logger.error(f"Error shutting down background loop: {str(e)}")
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout)
+            if not self._thread.is_alive():
+                self.loop.close()
+
+class UIQueue:
+    """Thread-safe queue of callbacks the Tk thread drains with `root.after`.
+
+    Tk widgets may only be touched from the thread running the mainloop;
+    work on the background loop posts its UI updates here instead.
+    """
+
+    def __init__(self, root, interval_ms: int = 50, max_batch: int = 500):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._after_id = None
+
+    def post(self, callback: Callable[..., Any], *args: Any):
+        """Run callback(*args) on the Tk thread at the next drain"""
+        self._queue.put((callback, args))
+
+    def wrap(self, callback: Callable[..., Any]) -> Callable[..., None]:
+        """A function that posts its calls to callback instead of running them"""
+        return lambda *args: self.post(callback, *args)
+
+    def drain(self):
+        """Run queued callbacks, bounded per tick so a flood cannot stall the window"""
+        for _ in range(self.max_batch):
+            try:
+                callback, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"Error in UI callback: {str(e)}")
+        self._after_id = self.root.after(self.interval_ms, self.drain)
+
+    def start(self):
+        self.drain()
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
@@ -1,9 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext
-import asyncio
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+from concurrent.futures import Future
+from .background import BackgroundLoop, UIQueue
+from .rendering import changed_range, render_full, render_preview, split_blocks
 from ..models.paper_metadata import PaperMetadata
+from ..utils.deepseek_client import DeepSeekClient
+from ..utils.http_transport import HttpTransport
+from ..utils.llm_cache import LLMCache
+from ..utils.text_store import PaperTextStore
+from ..utils.tracing import trace
 from ..agents.web_crawler import WebCrawlerAgent
 from ..agents.data_collection import DataCollectionAgent
 from ..agents.content_generation import ContentGenerationAgent
@@ -21,8 +28,26 @@ class MainWindow:
         self.root.title("Paper Writing Agent")
         self.root.geometry("1600x800")  # Increased width for side-by-side layout
         
+        # Read and written only on the background loop; the UI gets results through ui_queue
         self.context: Dict[str, Any] = {}
+        self.stream_marks: Dict[str, str] = {}
+        # Text appended between two idle callbacks is inserted with one call per widget
+        self.pending_text: Dict[Any, List[str]] = {}
+        self.pending_tokens: Dict[str, List[str]] = {}
+        self.flush_id: Optional[str] = None
+        # Values of collapsed result previews, by the tag of their expand link
+        self.collapsed: Dict[str, Any] = {}
+        self.transport = HttpTransport()
+        self.cache = LLMCache.from_env()
+        # Created on the first phase, so the window opens without an API key
+        self.deepseek: Optional[DeepSeekClient] = None
+        self.text_store = PaperTextStore.from_env()
+        # Phases run on one long-lived loop; their UI updates come back through ui_queue
+        self.background = BackgroundLoop()
+        self.ui_queue = UIQueue(self.root)
+        self.current_phase: Optional[Future] = None
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
         
     def setup_ui(self):
         """Setup the user interface"""
@@ -65,6 +90,8 @@ class MainWindow:
         ttk.Button(button_frame, text="Generate Content", command=self.generate_content).grid(row=0, column=1, padx=5)
         ttk.Button(button_frame, text="Review", command=self.review).grid(row=0, column=2, padx=5)
         ttk.Button(button_frame, text="Format", command=self.format).grid(row=0, column=3, padx=5)
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel, state=tk.DISABLED)
+        self.cancel_button.grid(row=0, column=4, padx=5)
         
         # Results section
         results_frame = ttk.LabelFrame(left_panel, text="Results", padding="5")
@@ -92,21 +119,99 @@ class MainWindow:
         right_panel.columnconfigure(0, weight=1)
         right_panel.rowconfigure(0, weight=1)
         
+    def schedule_flush(self):
+        if self.flush_id is None:
+            self.flush_id = self.root.after_idle(self.flush_text)
+        
+    def flush_text(self):
+        """Insert all buffered text, one insert per widget and streamed section"""
+        if self.flush_id is not None:
+            self.root.after_cancel(self.flush_id)
+            self.flush_id = None
+        pending, self.pending_text = self.pending_text, {}
+        for widget, parts in pending.items():
+            widget.insert(tk.END, "".join(parts))
+            widget.see(tk.END)
+        tokens, self.pending_tokens = self.pending_tokens, {}
+        mark = None
+        for section, parts in tokens.items():
+            mark = self.stream_marks.get(section)
+            if mark is None:
+                # Sections stream concurrently, so each one appends at its own mark
+                mark = f"stream{len(self.stream_marks)}"
+                self.stream_marks[section] = mark
+                self.paper_text.insert(tk.END, f"\n=== {section} ===\n")
+                self.paper_text.mark_set(mark, "end-1c")
+                self.paper_text.mark_gravity(mark, tk.RIGHT)
+            self.paper_text.insert(mark, "".join(parts))
+        if mark is not None:
+            self.paper_text.see(mark)
+        
     def update_status(self, message: str):
         """Update the status text area"""
-        self.status_text.insert(tk.END, f"{message}\n")
-        self.status_text.see(tk.END)
+        self.pending_text.setdefault(self.status_text, []).append(f"{message}\n")
+        self.schedule_flush()
         
     def update_results(self, message: str):
         """Update the results text area"""
-        self.results_text.insert(tk.END, f"{message}\n")
+        self.pending_text.setdefault(self.results_text, []).append(f"{message}\n")
+        self.schedule_flush()
+        
+    def show_results(self, phase_name: str, results: Dict[str, Any]):
+        """Show a phase's results, collapsing large values behind an expand link"""
+        self.flush_text()
+        self.results_text.insert(tk.END, f"{phase_name} results:\n")
+        for key, value in results.items():
+            text, truncated = render_preview(value)
+            self.results_text.insert(tk.END, f"{key}: ")
+            if not truncated:
+                self.results_text.insert(tk.END, f"{text}\n")
+                continue
+            tag = f"collapsed{len(self.collapsed)}"
+            self.collapsed[tag] = value
+            self.results_text.insert(tk.END, text, (tag,))
+            self.results_text.insert(tk.END, " [show all]", (tag, "expand_link", f"{tag}_link"))
+            self.results_text.insert(tk.END, "\n")
+            self.results_text.tag_bind(f"{tag}_link", "<Button-1>", lambda event, tag=tag: self.expand_result(tag))
+        self.results_text.tag_config("expand_link", foreground="blue", underline=True)
         self.results_text.see(tk.END)
         
+    def expand_result(self, tag: str):
+        """Replace a collapsed preview with the full value"""
+        value = self.collapsed.pop(tag, None)
+        ranges = self.results_text.tag_ranges(tag)
+        if value is None or not ranges:
+            return
+        start, end = ranges[0], ranges[-1]
+        self.results_text.delete(start, end)
+        self.results_text.insert(start, render_full(value))
+        self.results_text.tag_delete(tag, f"{tag}_link")
+        
     def update_paper(self, content: str):
-        """Update the final paper text area"""
+        """Update the final paper text area, rewriting only the sections that changed"""
+        self.flush_text()
+        old = split_blocks(self.paper_text.get("1.0", "end-1c"))
+        new = split_blocks(content)
+        prefix, old_end, new_end = changed_range(old, new)
+        if prefix == old_end == new_end:
+            return
+        start = f"1.0 + {sum(len(block) for block in old[:prefix])} chars"
+        end = f"1.0 + {sum(len(block) for block in old[:old_end])} chars"
+        self.paper_text.delete(start, end)
+        self.paper_text.insert(start, "".join(new[prefix:new_end]))
+        self.paper_text.see(start)
+        
+    def start_streamed_paper(self):
+        """Clear the paper view before sections start streaming into it"""
+        self.flush_text()
         self.paper_text.delete(1.0, tk.END)
-        self.paper_text.insert(tk.END, content)
-        self.paper_text.see(tk.END)
+        self.paper_text.insert(tk.END, "=== Final Paper ===\n")
+        self.stream_marks = {}
+        
+    def append_section_token(self, section: str, delta: str):
+        """Buffer a streamed token for its section in the paper view"""
+        self.pending_tokens.setdefault(section, []).append(delta)
+        self.schedule_flush()
         
     def get_paper_metadata(self) -> PaperMetadata:
         """Get paper metadata from the form"""
@@ -117,91 +222,25 @@ class MainWindow:
         )
         
     async def run_agent(self, agent, phase_name: str):
-        """Run an agent and update the UI"""
+        """Run an agent on the background loop and post its results to the UI"""
+        post = self.ui_queue.post
         try:
-            self.update_status(f"Starting {phase_name} phase...")
-            results = await agent.execute(self.context)
+            post(self.update_status, f"Starting {phase_name} phase...")
+            with trace(phase_name, "agent", agent=agent.name):
+                results = await agent.execute(dict(self.context))
             self.context.update(results)
             
-            # Generate content if this is the content generation phase
-            if phase_name == "Content Generation":
-                self.generate_paper_content()
-            
-            self.update_status(f"{phase_name} phase completed successfully")
-            self.update_results(str(results))
+            post(self.update_status, f"{phase_name} phase completed successfully")
+            post(self.show_results, phase_name, results)
             
             # Update final paper if we have formatted sections
             if "formatted_sections" in results:
                 paper_content = self.format_paper_content(results["formatted_sections"])
-                self.update_paper(paper_content)
+                post(self.update_paper, paper_content)
         except Exception as e:
-            self.update_status(f"Error in {phase_name} phase: {str(e)}")
+            post(self.update_status, f"Error in {phase_name} phase: {str(e)}")
             logger.error(f"Error in {phase_name} phase: {str(e)}")
             
-    def generate_paper_content(self):
-        """Generate paper content from research data"""
-        if "academic_papers" not in self.context:
-            return
-            
-        # Generate outline
-        outline = [
-            {"title": "Introduction", "level": 1},
-            {"title": "Literature Review", "level": 1},
-            {"title": "Methodology", "level": 1},
-            {"title": "Findings and Analysis", "level": 1},
-            {"title": "Discussion", "level": 1},
-            {"title": "Conclusion", "level": 1}
-        ]
-        
-        # Generate sections
-        sections = {
-            "Introduction": {
-                "content": "This paper explores the evolving landscape of AI delegation and orchestration, examining recent developments and their implications for human-AI collaboration.",
-                "citations": []
-            },
-            "Literature Review": {
-                "content": "Recent research has focused on several key aspects of AI delegation:\n\n",
-                "citations": self.context.get("citations", [])
-            },
-            "Methodology": {
-                "content": "This study employs a systematic literature review approach, analyzing recent publications on AI delegation and orchestration.",
-                "citations": []
-            },
-            "Findings and Analysis": {
-                "content": "Key findings from the literature review include:\n\n",
-                "citations": []
-            },
-            "Discussion": {
-                "content": "The research indicates several important trends in AI delegation and orchestration:",
-                "citations": []
-            },
-            "Conclusion": {
-                "content": "The findings suggest significant potential for improved human-AI collaboration through effective delegation and orchestration.",
-                "citations": []
-            }
-        }
-        
-        # Add paper summaries to Literature Review
-        for paper in self.context["academic_papers"]:
-            sections["Literature Review"]["content"] += f"- {paper['title']} ({paper['year']})\n"
-            sections["Literature Review"]["content"] += f"  Authors: {', '.join(paper['authors'])}\n"
-            sections["Literature Review"]["content"] += f"  Key Points: {paper['abstract'][:200]}...\n\n"
-            
-        # Add key findings
-        if "topic_analysis" in self.context:
-            sections["Findings and Analysis"]["content"] += "Key concepts identified in the research:\n"
-            for concept in self.context["topic_analysis"].get("key_concepts", []):
-                sections["Findings and Analysis"]["content"] += f"- {concept}\n"
-                
-        # Update context with generated content
-        self.context["outline"] = outline
-        self.context["sections"] = sections
-        self.context["citations_integrated"] = True
-        
-        # Update the paper display
-        paper_content = self.format_paper_content(sections)
-        self.update_paper(paper_content)
-        
     def format_paper_content(self, sections: Dict[str, Dict[str, Any]]) -> str:
         """Format the paper content for display"""
         paper = []
@@ -239,39 +278,114 @@ class MainWindow:
         
         return "\n".join(paper)
             
+    async def run_phase(self, *steps, context: Optional[Dict[str, Any]] = None):
+        """Run agents in order on the background loop, starting from `context` when given"""
+        if context is not None:
+            self.context = context
+        for agent, phase_name in steps:
+            await self.run_agent(agent, phase_name)
+        if self.cache is not None:
+            stats = self.cache.stats()
+            self.ui_queue.post(self.update_status, f"LLM cache: {stats['hits']} hits, {stats['misses']} misses")
+
+    def submit_phase(self, *steps, context: Optional[Dict[str, Any]] = None) -> bool:
+        """Start a phase in the background unless one is already running"""
+        if self.current_phase is not None and not self.current_phase.done():
+            self.update_status("Another phase is still running; cancel it or wait for it to finish")
+            return False
+        self.current_phase = self.background.submit(self.run_phase(*steps, context=context))
+        self.current_phase.add_done_callback(lambda future: self.ui_queue.post(self.phase_finished, future))
+        self.cancel_button.config(state=tk.NORMAL)
+        return True
+
+    def phase_finished(self, future: Future):
+        """Report how a background phase ended"""
+        if future is self.current_phase:
+            self.cancel_button.config(state=tk.DISABLED)
+        if future.cancelled():
+            self.update_status("Phase cancelled")
+        elif future.exception() is not None:
+            self.update_status(f"Phase failed: {str(future.exception())}")
+
+    def cancel(self):
+        """Cancel the running phase; agents stop at their next await"""
+        if self.current_phase is not None and not self.current_phase.done():
+            self.update_status("Cancelling...")
+            self.current_phase.cancel()
+
+    def client(self) -> Optional[DeepSeekClient]:
+        """The shared DeepSeek client, or None after reporting why it cannot be created"""
+        if self.deepseek is None:
+            try:
+                self.deepseek = DeepSeekClient(transport=self.transport, cache=self.cache)
+            except ValueError as e:
+                self.update_status(f"Error: {str(e)}")
+                return None
+        return self.deepseek
+
     def start_research(self):
         """Start the research phase"""
+        deepseek = self.client()
+        if deepseek is None:
+            return
         paper_metadata = self.get_paper_metadata()
-        self.context = {
+        context = {
             "title": paper_metadata.title,
             "authors": paper_metadata.authors,
             "keywords": paper_metadata.keywords
         }
         
-        web_crawler = WebCrawlerAgent("WebCrawler")
-        data_collector = DataCollectionAgent("DataCollector")
+        web_crawler = WebCrawlerAgent("WebCrawler", deepseek, text_store=self.text_store)
+        web_crawler.on_paper = lambda paper: self.ui_queue.post(
+            self.update_status, f"Found: {paper.get('title', '')} ({paper.get('source', '')})"
+        )
+        data_collector = DataCollectionAgent("DataCollector", deepseek)
         
-        asyncio.run(self.run_agent(web_crawler, "Research"))
-        asyncio.run(self.run_agent(data_collector, "Data Collection"))
+        # The new run's context is swapped in on the loop, not here
+        self.submit_phase(
+            (web_crawler, "Research"),
+            (data_collector, "Data Collection"),
+            context=context
+        )
         
     def generate_content(self):
         """Start the content generation phase"""
-        content_generator = ContentGenerationAgent("ContentGenerator")
-        asyncio.run(self.run_agent(content_generator, "Content Generation"))
+        deepseek = self.client()
+        if deepseek is None:
+            return
+        content_generator = ContentGenerationAgent("ContentGenerator", deepseek)
+        content_generator.on_token = self.ui_queue.wrap(self.append_section_token)
+        if self.submit_phase((content_generator, "Content Generation")):
+            self.start_streamed_paper()
         
     def review(self):
         """Start the review phase"""
-        quality_control = QualityControlAgent("QualityController")
-        expert_review = ExpertReviewAgent("ExpertReviewer")
+        deepseek = self.client()
+        if deepseek is None:
+            return
+        quality_control = QualityControlAgent("QualityController", deepseek)
+        expert_review = ExpertReviewAgent("ExpertReviewer", deepseek)
         
-        asyncio.run(self.run_agent(quality_control, "Quality Control"))
-        asyncio.run(self.run_agent(expert_review, "Expert Review"))
+        self.submit_phase(
+            (quality_control, "Quality Control"),
+            (expert_review, "Expert Review")
+        )
         
     def format(self):
         """Start the formatting phase"""
-        formatter = FormattingAgent("Formatter")
-        asyncio.run(self.run_agent(formatter, "Formatting"))
+        deepseek = self.client()
+        if deepseek is None:
+            return
+        formatter = FormattingAgent("Formatter", deepseek)
+        self.submit_phase((formatter, "Formatting"))
+        
+    def close(self):
+        """Cancel any running phase, release pooled connections and close the window"""
+        self.ui_queue.stop()
+        self.background.stop(cleanup=self.transport.close)
+        self.root.destroy()
         
     def run(self):
         """Start the application"""
-        self.root.mainloop() 
\ No newline at end of file
+        self.ui_queue.start()
+        self.root.mainloop()
\ No newline at end of file
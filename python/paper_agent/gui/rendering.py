@@ -0,0 +1,65 @@
+import re
+import json
+from itertools import islice
+from typing import Any, List, Tuple
+
+_BLOCK_START = re.compile(r"(?=\n=== )")
+
+def render_full(value: Any) -> str:
+    """Complete text of a result value"""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, indent=2, ensure_ascii=False, default=str)
+
+def render_preview(value: Any, max_chars: int = 2000, max_string: int = 300, max_items: int = 10) -> Tuple[str, bool]:
+    """Short text of a result value, and whether anything was left out.
+
+    Long strings, lists and dicts are cut down before serializing, so a
+    result holding full PDF texts never has to be rendered in full.
+    """
+    truncated = False
+
+    def shrink(item: Any) -> Any:
+        nonlocal truncated
+        if isinstance(item, str) and len(item) > max_string:
+            truncated = True
+            return f"{item[:max_string]}... [+{len(item) - max_string} chars]"
+        if isinstance(item, dict):
+            shrunk = {key: shrink(child) for key, child in islice(item.items(), max_items)}
+            if len(item) > max_items:
+                truncated = True
+                shrunk["..."] = f"{len(item) - max_items} more keys"
+            return shrunk
+        if isinstance(item, (list, tuple)):
+            shrunk = [shrink(child) for child in item[:max_items]]
+            if len(item) > max_items:
+                truncated = True
+                shrunk.append(f"... {len(item) - max_items} more items")
+            return shrunk
+        return item
+
+    text = render_full(shrink(value))
+    if len(text) > max_chars:
+        truncated = True
+        text = text[:max_chars] + "..."
+    return text, truncated
+
+def split_blocks(content: str) -> List[str]:
+    """Split paper text into blocks, each starting at a "=== Section ===" header"""
+    return [block for block in _BLOCK_START.split(content) if block]
+
+def changed_range(old: List[str], new: List[str]) -> Tuple[int, int, int]:
+    """Blocks shared at the start, and at the end, of old and new.
+
+    Returns (prefix, old_suffix_start, new_suffix_start): only
+    old[prefix:old_suffix_start] has to be replaced with
+    new[prefix:new_suffix_start].
+    """
+    prefix = 0
+    while prefix < min(len(old), len(new)) and old[prefix] == new[prefix]:
+        prefix += 1
+    old_end, new_end = len(old), len(new)
+    while old_end > prefix and new_end > prefix and old[old_end - 1] == new[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+    return prefix, old_end, new_end
@@ -2,8 +2,36 @@
 Data models for the paper agent system
 """
 
-from .paper_metadata import PaperMetadata
-from .research_result import ResearchResult
-from .content_result import ContentResult
+import importlib
 
-__all__ = ['PaperMetadata', 'ResearchResult', 'ContentResult'] 
\ No newline at end of file
+# The result models need pydantic; PaperMetadata alone should not load it
+_MODEL_MODULES = {
+    'PaperMetadata': '.paper_metadata',
+    'ResearchResult': '.research_result',
+    'TopicAnalysis': '.research_result',
+    'ContentResult': '.content_result',
+    'Outline': '.content_result',
+    'GrammarCheck': '.review_result',
+    'PlagiarismCheck': '.review_result',
+    'FormatCheck': '.review_result',
+    'TechnicalReview': '.review_result'
+}
+
+def __getattr__(name):
+    if name not in _MODEL_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_MODEL_MODULES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+__all__ = [
+    'PaperMetadata',
+    'ResearchResult',
+    'TopicAnalysis',
+    'ContentResult',
+    'Outline',
+    'GrammarCheck',
+    'PlagiarismCheck',
+    'FormatCheck',
+    'TechnicalReview'
+] 
\ No newline at end of file
@@ -1,6 +1,10 @@
 from pydantic import BaseModel
 from typing import List, Dict
 
+class Outline(BaseModel):
+    """Section titles planned before the sections are written"""
+    outline: List[str]
+
 class ContentResult(BaseModel):
     """Results from content generation"""
     outline: List[str]
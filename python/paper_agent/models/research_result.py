@@ -1,6 +1,12 @@
 from pydantic import BaseModel
 from typing import List, Dict, Any
 
+class TopicAnalysis(BaseModel):
+    """Topics and concepts found in the collected papers"""
+    main_topics: List[Any]
+    subtopics: List[Any]
+    key_concepts: List[Any]
+
 class ResearchResult(BaseModel):
     """Results from research phase"""
     papers: List[Dict[str, Any]]
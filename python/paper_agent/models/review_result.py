@@ -0,0 +1,33 @@
+from pydantic import BaseModel
+from typing import List, Any
+
+class GrammarCheck(BaseModel):
+    """Grammar and style check of one section"""
+    issues: List[Any]
+    suggestions: List[Any]
+    overall_quality: float
+
+class PlagiarismCheck(BaseModel):
+    """Plagiarism check of one section"""
+    potential_issues: List[Any]
+    citation_coverage: float
+    recommendations: List[Any]
+    overlap_coverage: float = 0.0
+    sources: List[Any] = []
+
+class FormatCheck(BaseModel):
+    """Content formatted to a citation style"""
+    formatted_content: Any
+    style_compliance: List[Any]
+    issues: List[Any]
+
+class TechnicalReview(BaseModel):
+    """Expert review of one section's technical accuracy"""
+    accuracy_issues: List[Any]
+    suggestions: List[Any]
+    confidence_score: float
+
+class CombinedReview(BaseModel):
+    """Grammar and technical review of one section from a single call"""
+    grammar: GrammarCheck
+    technical_accuracy: TechnicalReview
@@ -0,0 +1,181 @@
+import os
+import logging
+from typing import Dict, Any, List, Optional
+from .models.paper_metadata import PaperMetadata
+from .utils.deepseek_client import DeepSeekClient
+from .utils.http_transport import HttpTransport
+from .utils.llm_cache import LLMCache
+from .utils.text_store import PaperTextStore
+from .utils.checkpoint import CheckpointStore, fingerprint
+from .agents.web_crawler import WebCrawlerAgent
+from .agents.data_collection import DataCollectionAgent
+from .agents.content_generation import ContentGenerationAgent
+from .agents.quality_control import QualityControlAgent
+from .agents.expert_review import ExpertReviewAgent
+from .agents.formatting import FormattingAgent
+from .scheduler import AgentScheduler
+from .utils.tracing import trace
+
+logger = logging.getLogger(__name__)
+
+class AgentNetwork:
+    """Runs the paper writing pipeline across the specialised agents"""
+
+    def __init__(
+        self,
+        paper_metadata: PaperMetadata,
+        transport: Optional[HttpTransport] = None,
+        max_concurrency: Optional[int] = None,
+        cache: Optional[LLMCache] = None,
+        text_store: Optional[PaperTextStore] = None,
+        checkpoints: Optional[CheckpointStore] = None,
+        fused_review: Optional[bool] = None,
+        deepseek: Optional[DeepSeekClient] = None
+    ):
+        self.paper_metadata = paper_metadata
+        self.context: Dict[str, Any] = {
+            "title": paper_metadata.title,
+            "authors": paper_metadata.authors,
+            "keywords": paper_metadata.keywords or []
+        }
+        self.checkpoints = checkpoints if checkpoints is not None else CheckpointStore.for_run(self.context)
+        if deepseek is not None:
+            # A client shared between networks brings its own transport and cache
+            transport = transport or deepseek.transport
+            cache = cache if cache is not None else deepseek.cache
+        # A transport passed in by the caller is shared with others and left open
+        self._owns_transport = transport is None
+        self.transport = transport or HttpTransport()
+        self.cache = cache if cache is not None else LLMCache.from_env()
+        self.deepseek = deepseek or DeepSeekClient(transport=self.transport, cache=self.cache)
+        self.text_store = text_store if text_store is not None else PaperTextStore.from_env()
+        self.agents = {
+            "web_crawler": WebCrawlerAgent(
+                "WebCrawler", self.deepseek, max_concurrency=max_concurrency, text_store=self.text_store
+            ),
+            "data_collection": DataCollectionAgent("DataCollector", self.deepseek, max_concurrency=max_concurrency),
+            "content_generation": ContentGenerationAgent("ContentGenerator", self.deepseek, max_concurrency=max_concurrency),
+            "quality_control": QualityControlAgent("QualityController", self.deepseek, max_concurrency=max_concurrency),
+            "expert_review": ExpertReviewAgent("ExpertReviewer", self.deepseek, max_concurrency=max_concurrency),
+            "formatting": FormattingAgent("Formatter", self.deepseek, max_concurrency=max_concurrency)
+        }
+        if fused_review is None:
+            fused_review = os.getenv("PAPER_AGENT_FUSED_REVIEW", "").lower() in ("1", "true", "yes")
+        if fused_review:
+            # One structured call per section instead of three separate ones
+            from .agents.combined_review import CombinedReviewAgent
+            del self.agents["quality_control"]
+            del self.agents["expert_review"]
+            self.agents["review"] = CombinedReviewAgent("Reviewer", self.deepseek, max_concurrency=max_concurrency)
+            self.agents["formatting"] = self.agents.pop("formatting")
+        self.scheduler = AgentScheduler(self.agents)
+
+    async def run_step(self, name: str) -> Dict[str, Any]:
+        """Run one agent on the current context and merge its results"""
+        with trace(name, "agent", agent=self.agents[name].name):
+            results = await self.agents[name].execute(self.context)
+        self.context.update(results)
+        return results
+
+    async def research_phase(self):
+        logger.info("Starting Research Phase")
+        with trace("research", "phase"):
+            await self.run_step("web_crawler")
+            await self.run_step("data_collection")
+        return self.context
+
+    async def writing_phase(self):
+        logger.info("Starting Writing Phase")
+        with trace("writing", "phase"):
+            await self.run_step("content_generation")
+        return self.context
+
+    async def review_phase(self):
+        logger.info("Starting Review Phase")
+        with trace("review", "phase"):
+            if "review" in self.agents:
+                await self.run_step("review")
+            else:
+                await self.run_step("quality_control")
+                await self.run_step("expert_review")
+        return self.context
+
+    async def finalization_phase(self):
+        logger.info("Starting Finalization Phase")
+        with trace("finalization", "phase"):
+            await self.run_step("formatting")
+        return self.context
+
+    def plan(self):
+        """Stages the scheduler will run, for inspection"""
+        return self.scheduler.plan()
+
+    def step_inputs(self, name: str) -> str:
+        """Fingerprint of the context keys a step depends on.
+
+        Keys the step writes itself are left out: incremental agents read
+        their own earlier results, which are already merged when the step is
+        saved but not yet restored when it is checked on resume.
+        """
+        agent = self.agents[name]
+        return fingerprint(self.context, agent.reads - agent.writes)
+
+    def checkpoint_step(self, name: str, result: Dict[str, Any]):
+        """Save the context delta of a finished step together with its input fingerprint"""
+        if self.checkpoints is not None:
+            self.checkpoints.save(name, result, self.step_inputs(name))
+
+    def restore_checkpoints(self) -> List[str]:
+        """Restore saved steps into the context and return the ones that can be skipped.
+
+        A step whose saved `*_errors` output is not empty is restored but not
+        skipped, so it gets another try at the sections that failed.
+        """
+        completed = []
+        if self.checkpoints is None:
+            return completed
+        for name in self.agents:
+            saved = self.checkpoints.load(name)
+            if saved is None:
+                continue
+            # Inputs that differ from when the step ran mean its output is stale
+            if saved["inputs"] != self.step_inputs(name):
+                logger.info(f"Checkpoint for {name} does not match its inputs, rerunning it")
+                continue
+            self.context.update(saved["delta"])
+            # A step that lost some sections reruns; its restored results let it redo only those
+            failed = [key for key, value in saved["delta"].items() if key.endswith("_errors") and value]
+            if failed:
+                logger.info(f"Checkpoint for {name} recorded failures in {', '.join(failed)}, rerunning it")
+                continue
+            completed.append(name)
+        if completed:
+            logger.info(f"Resuming with completed steps: {', '.join(completed)}")
+        return completed
+
+    async def execute_pipeline(self, resume: bool = False):
+        try:
+            completed = []
+            if resume:
+                completed = self.restore_checkpoints()
+            elif self.checkpoints is not None:
+                self.checkpoints.clear()
+            remaining = [name for name in self.agents if name not in completed]
+            logger.info(f"Execution plan:\n{self.scheduler.describe_plan(remaining)}")
+            with trace("pipeline", "phase", title=self.context.get("title", ""), resumed=completed):
+                await self.scheduler.run(self.context, remaining, on_complete=self.checkpoint_step)
+            logger.info("Paper writing pipeline completed successfully")
+            if self.cache is not None:
+                logger.info(f"LLM cache stats: {self.cache.stats()}")
+            logger.info(f"Structured output stats: {self.deepseek.parse_stats.stats()}")
+            return self.context
+        except Exception as e:
+            logger.error(f"Error in pipeline execution: {str(e)}")
+            raise
+        finally:
+            await self.close()
+
+    async def close(self):
+        """Release the connection pool if this network created it"""
+        if self._owns_transport:
+            await self.transport.close()
@@ -0,0 +1,115 @@
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Callable, List, Optional, Set
+from .agents.base import Agent
+from .utils.tracing import trace
+
+logger = logging.getLogger(__name__)
+
+class AgentScheduler:
+    """Runs agents as soon as the context keys they read have been produced.
+
+    Dependencies come from each agent's declared `reads` and `writes`, taken
+    in registration order: an agent waits for every earlier agent that writes
+    a key it reads, or that reads or writes a key it writes. Agents with no
+    such conflict run concurrently, each on its own snapshot of the context,
+    and their outputs are merged back as they finish.
+    """
+
+    def __init__(self, agents: Dict[str, Agent]):
+        self.agents = agents
+        self.dependencies = self._dependencies()
+
+    def _dependencies(self) -> Dict[str, Set[str]]:
+        names = list(self.agents)
+        dependencies = {}
+        for index, name in enumerate(names):
+            agent = self.agents[name]
+            dependencies[name] = {
+                earlier for earlier in names[:index]
+                if agent.reads & self.agents[earlier].writes
+                or agent.writes & (self.agents[earlier].reads | self.agents[earlier].writes)
+            }
+        return dependencies
+
+    def plan(self, names: Optional[List[str]] = None) -> List[List[str]]:
+        """Group agents into stages; every agent in a stage can run at the same time"""
+        selected = [name for name in self.agents if names is None or name in names]
+        stage_of: Dict[str, int] = {}
+        for name in selected:
+            stage_of[name] = max(
+                (stage_of[dep] + 1 for dep in self.dependencies[name] if dep in stage_of),
+                default=0
+            )
+        stages: List[List[str]] = [[] for _ in range(max(stage_of.values(), default=-1) + 1)]
+        for name in selected:
+            stages[stage_of[name]].append(name)
+        return stages
+
+    def describe_plan(self, names: Optional[List[str]] = None) -> str:
+        """Human-readable form of plan()"""
+        lines = []
+        for index, stage in enumerate(self.plan(names), 1):
+            entries = []
+            for name in stage:
+                deps = sorted(self.dependencies[name] & set(names or self.agents))
+                entries.append(f"{name} (after {', '.join(deps)})" if deps else name)
+            lines.append(f"Stage {index}: {'; '.join(entries)}")
+        return "\n".join(lines)
+
+    def _merge(self, name: str, context: Dict[str, Any], result: Dict[str, Any]):
+        undeclared = set(result) - self.agents[name].writes
+        if undeclared:
+            logger.warning(f"Agent {name} wrote undeclared context keys: {sorted(undeclared)}")
+        context.update(result)
+
+    async def run(
+        self,
+        context: Dict[str, Any],
+        names: Optional[List[str]] = None,
+        on_complete: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """Run the selected agents (all by default), updating context in place.
+
+        on_complete(name, result) is called after each agent's output has
+        been merged, before any agent that depends on it starts.
+        """
+        selected = [name for name in self.agents if names is None or name in names]
+        done: Dict[str, asyncio.Future] = {
+            name: asyncio.get_running_loop().create_future() for name in selected
+        }
+
+        async def run_agent(name: str):
+            try:
+                waited = time.perf_counter()
+                await asyncio.gather(*(done[dep] for dep in self.dependencies[name] if dep in done))
+                with trace(name, "agent", agent=self.agents[name].name) as span:
+                    span.queue_wait = time.perf_counter() - waited
+                    # Each agent reads a snapshot, so concurrent merges cannot change its inputs mid-run
+                    result = await self.agents[name].execute(dict(context))
+                self._merge(name, context, result)
+                if on_complete is not None:
+                    on_complete(name, result)
+                done[name].set_result(result)
+            except asyncio.CancelledError:
+                done[name].cancel()
+                raise
+            except BaseException as e:
+                if not done[name].done():
+                    done[name].set_exception(e)
+                raise
+
+        tasks = [asyncio.ensure_future(run_agent(name)) for name in selected]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for future in done.values():
+                # Avoid "exception was never retrieved" warnings for futures nobody awaited
+                if future.done() and not future.cancelled():
+                    future.exception()
+            raise
+        return context
@@ -0,0 +1,114 @@
+import os
+import json
+import time
+import zlib
+import shutil
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_ROOT = os.path.join(os.path.expanduser("~"), ".cache", "paper_agent", "checkpoints")
+MANIFEST_VERSION = 1
+
+def fingerprint(context: Dict[str, Any], keys: Iterable[str]) -> str:
+    """Stable hash of the given context keys"""
+    payload = json.dumps({key: context.get(key) for key in sorted(keys)}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class CheckpointStore:
+    """Compressed on-disk record of the context delta each pipeline step produced.
+
+    Every step is written to its own zlib-compressed JSON file, then the
+    manifest is replaced atomically, so a crash never leaves a half-written
+    checkpoint behind. The manifest records a SHA-256 of each file and a
+    fingerprint of the inputs the step read; restore() only trusts steps
+    whose file is intact and whose inputs match the context rebuilt so far.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def for_run(
+        cls,
+        run_context: Dict[str, Any],
+        root: Optional[str] = None,
+        run_id: Optional[str] = None
+    ) -> Optional["CheckpointStore"]:
+        """Store for the run described by run_context, or None when checkpoints are disabled.
+
+        Checkpoints are opt-in: root, or PAPER_AGENT_CHECKPOINTS (a directory,
+        or "1" for the default one), has to be set. Runs that may execute at
+        the same time for the same paper, such as batch jobs, must pass a
+        distinct run_id so they never share, and clear, one directory.
+        """
+        root = root or os.getenv("PAPER_AGENT_CHECKPOINTS", "")
+        if root.lower() in ("", "0", "off", "false", "none"):
+            return None
+        if root.lower() in ("1", "on", "true", "yes"):
+            root = DEFAULT_CHECKPOINT_ROOT
+        keyed = dict(run_context, run_id=run_id) if run_id is not None else run_context
+        return cls(os.path.join(root, fingerprint(keyed, keyed)[:16]))
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"version": MANIFEST_VERSION, "steps": {}}
+        if manifest.get("version") != MANIFEST_VERSION:
+            return {"version": MANIFEST_VERSION, "steps": {}}
+        return manifest
+
+    def save(self, step: str, delta: Dict[str, Any], inputs: str):
+        """Persist the context delta produced by a step"""
+        data = zlib.compress(json.dumps(delta, separators=(",", ":"), default=str).encode("utf-8"), 6)
+        filename = f"{step}.json.z"
+        _write_atomic(os.path.join(self.directory, filename), data)
+        manifest = self._read_manifest()
+        manifest["steps"][step] = {
+            "file": filename,
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "inputs": inputs,
+            "saved_at": time.time()
+        }
+        _write_atomic(self.manifest_path, json.dumps(manifest, indent=2).encode("utf-8"))
+        logger.info(f"Checkpointed step {step} ({len(data)} bytes)")
+
+    def load(self, step: str) -> Optional[Dict[str, Any]]:
+        """Return a step's saved delta and input fingerprint, or None if missing or corrupt"""
+        entry = self._read_manifest()["steps"].get(step)
+        if entry is None:
+            return None
+        try:
+            with open(os.path.join(self.directory, entry["file"]), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            logger.warning(f"Checkpoint file for step {step} is missing")
+            return None
+        if hashlib.sha256(data).hexdigest() != entry["sha256"]:
+            logger.warning(f"Checkpoint for step {step} failed its integrity check")
+            return None
+        return {"delta": json.loads(zlib.decompress(data).decode("utf-8")), "inputs": entry["inputs"]}
+
+    def steps(self) -> Dict[str, Dict[str, Any]]:
+        """Manifest entries of all saved steps"""
+        return self._read_manifest()["steps"]
+
+    def clear(self):
+        """Remove every checkpoint of this run"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
@@ -0,0 +1,54 @@
+import os
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("PAPER_AGENT_MAX_CONCURRENCY", "4"))
+
+@dataclass
+class FanOutResult:
+    """Ordered results of a fan-out, with the failures kept apart"""
+    results: Dict[Hashable, Any] = field(default_factory=dict)
+    errors: Dict[Hashable, Exception] = field(default_factory=dict)
+
+    def error_messages(self) -> Dict[Hashable, str]:
+        """Failures as plain strings, for results that are stored or shown"""
+        return {key: f"{type(error).__name__}: {str(error)}" for key, error in self.errors.items()}
+
+async def fan_out(
+    keys: Iterable[Hashable],
+    worker: Callable[[Hashable], Awaitable[Any]],
+    limit: Optional[int] = None,
+    fallback: Optional[Callable[[Hashable, Exception], Any]] = None
+) -> FanOutResult:
+    """Run worker for every key with at most `limit` calls in flight.
+
+    Results keep the order of `keys`. A key whose worker raises is recorded in
+    `errors` and, when `fallback` is given, gets `fallback(key, error)` as its
+    result so callers still receive a complete dict.
+    """
+    keys = list(keys)
+    semaphore = asyncio.Semaphore(max(1, limit or DEFAULT_MAX_CONCURRENCY))
+
+    async def run(key):
+        async with semaphore:
+            return await worker(key)
+
+    outcomes = await asyncio.gather(*(run(key) for key in keys), return_exceptions=True)
+
+    fan_out_result = FanOutResult()
+    for key, outcome in zip(keys, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"Task for {key!r} failed: {str(outcome)}")
+            fan_out_result.errors[key] = outcome
+            if fallback is not None:
+                fan_out_result.results[key] = fallback(key, outcome)
+        elif isinstance(outcome, BaseException):
+            # Cancellation and interpreter exits are not per-key failures
+            raise outcome
+        else:
+            fan_out_result.results[key] = outcome
+    return fan_out_result
@@ -0,0 +1,177 @@
+import re
+import zlib
+import logging
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from .lazy import lazy_import
+from .text_store import parse_arxiv_id
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+# Largest prime below 2**32, so a * x + b stays inside uint64 for 32-bit hashes
+_PRIME = 4294967291
+
+def normalize_title(title: str) -> str:
+    """Lowercase, accent-free title with punctuation and repeated spaces removed"""
+    text = unicodedata.normalize("NFKD", title or "").encode("ascii", "ignore").decode("ascii")
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+def shingles(text: str, size: int = 3) -> "np.ndarray":
+    """32-bit hashes of the distinct word n-grams of a normalized text"""
+    words = normalize_title(text).split()
+    grams = {" ".join(words[i:i + size]) for i in range(max(0, len(words) - size + 1))}
+    return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64, count=len(grams))
+
+class _DisjointSet:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a: int, b: int):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            # The earlier record stays the root so clusters keep input order
+            self.parent[max(a, b)] = min(a, b)
+
+class PaperDeduplicator:
+    """Merges records of the same paper found through different sources.
+
+    Records are grouped when they share an arXiv id (any version), a
+    normalized title, or an abstract whose MinHash signature puts them in the
+    same locality-sensitive hashing band and whose estimated Jaccard
+    similarity reaches `threshold`. Every step is a hash lookup per record,
+    so the cost stays close to linear in the number of papers.
+    """
+
+    # Fields compared with MinHash, in order of preference
+    TEXT_FIELDS = ("summary", "abstract")
+
+    def __init__(
+        self,
+        num_perm: int = 64,
+        bands: int = 16,
+        threshold: float = 0.6,
+        shingle_size: int = 3,
+        min_shingles: int = 5,
+        source_priority: Sequence[str] = ("arXiv", "Google Scholar"),
+        seed: int = 1
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.min_shingles = min_shingles
+        self.source_priority = list(source_priority)
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.randint(0, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, text: str) -> Optional["np.ndarray"]:
+        """MinHash signature of a text, or None when it is too short to compare"""
+        hashed = shingles(text, self.shingle_size)
+        if len(hashed) < self.min_shingles:
+            return None
+        prime = np.uint64(_PRIME)
+        hashed %= prime
+        return ((self._a * hashed[np.newaxis, :] + self._b) % prime).min(axis=1)
+
+    def _text(self, record: Dict[str, Any]) -> str:
+        for field in self.TEXT_FIELDS:
+            value = record.get(field)
+            if isinstance(value, str) and value.strip():
+                return value
+        return ""
+
+    def clusters(self, records: Sequence[Dict[str, Any]]) -> List[List[int]]:
+        """Indices of the records grouped by paper, each group in input order"""
+        groups = _DisjointSet(len(records))
+        exact: Dict[tuple, int] = {}
+        bands: Dict[tuple, List[int]] = {}
+        signatures: Dict[int, np.ndarray] = {}
+
+        for index, record in enumerate(records):
+            keys = []
+            # A Scholar record may link a publisher PDF but an arXiv landing page
+            arxiv_key = parse_arxiv_id(record.get("pdf_url") or "") or parse_arxiv_id(record.get("url") or "")
+            if arxiv_key is not None:
+                keys.append(("arxiv", arxiv_key[0]))
+            title = normalize_title(record.get("title", ""))
+            if title:
+                keys.append(("title", title))
+            for key in keys:
+                groups.union(exact.setdefault(key, index), index)
+
+            signature = self.signature(self._text(record))
+            if signature is None:
+                continue
+            signatures[index] = signature
+            for band in range(self.bands):
+                chunk = signature[band * self.rows:(band + 1) * self.rows]
+                bucket = bands.setdefault((band, chunk.tobytes()), [])
+                for other in bucket:
+                    if groups.find(other) != groups.find(index) and \
+                            np.mean(signatures[other] == signature) >= self.threshold:
+                        groups.union(other, index)
+                bucket.append(index)
+
+        clustered: Dict[int, List[int]] = {}
+        for index in range(len(records)):
+            clustered.setdefault(groups.find(index), []).append(index)
+        return list(clustered.values())
+
+    def _preference(self, record: Dict[str, Any]) -> tuple:
+        source = record.get("source")
+        priority = self.source_priority.index(source) if source in self.source_priority else len(self.source_priority)
+        arxiv_key = parse_arxiv_id(record.get("pdf_url") or "")
+        # Later arXiv versions win over earlier ones from the same source
+        version = int(arxiv_key[1][1:]) if arxiv_key and arxiv_key[1] else 0
+        return priority, -version
+
+    def merge(self, records: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine duplicate records field by field, recording which source supplied each field"""
+        ordered = sorted(records, key=self._preference)
+        merged: Dict[str, Any] = {}
+        provenance: Dict[str, str] = {}
+        for record in ordered:
+            for field, value in record.items():
+                if field in ("source", "sources", "provenance"):
+                    continue
+                if field not in merged or merged[field] in (None, "", [], {}):
+                    merged[field] = value
+                    provenance[field] = record.get("provenance", {}).get(field, record.get("source", ""))
+        sources = []
+        for record in ordered:
+            for source in record.get("sources") or [record.get("source", "")]:
+                if source and source not in sources:
+                    sources.append(source)
+        merged["source"] = ordered[0].get("source", "")
+        merged["sources"] = sources
+        merged["provenance"] = provenance
+        return merged
+
+    def deduplicate(self, records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merge duplicate records, keeping the position of each paper's first record"""
+        records = list(records)
+        clusters = self.clusters(records)
+        merged = [
+            self.merge([records[index] for index in cluster]) if len(cluster) > 1 else records[cluster[0]]
+            for cluster in clusters
+        ]
+        if len(merged) < len(records):
+            logger.info(f"Merged {len(records)} records into {len(merged)} distinct papers")
+        return merged
+
+def deduplicate_papers(records: Iterable[Dict[str, Any]], **kwargs) -> List[Dict[str, Any]]:
+    """Merge records of the same paper using a default PaperDeduplicator"""
+    return PaperDeduplicator(**kwargs).deduplicate(records)
@@ -1,50 +1,321 @@
 import os
+import json
+import time
+import asyncio
 import logging
-import aiohttp
-from typing import List, Dict, Any
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, AsyncIterator
 from dotenv import load_dotenv
+from .http_transport import HttpTransport
+from .llm_cache import LLMCache
+from .rate_limiter import RateLimiter
+from .retry import APIError, RetryPolicy, parse_retry_after
+from .prompt_context import estimate_tokens
+from .structured_output import JSON_MODE, ParseStats, parse_structured, repair_prompt
+from .tracing import Span, get_tracer, trace
 
 logger = logging.getLogger(__name__)
 
+class DeepSeekAPIError(APIError):
+    """Non-200 response from DeepSeek API"""
+
+def estimate_request_tokens(messages: List[Dict[str, str]], params: Dict[str, Any]) -> int:
+    """Rough token count of a request, used to reserve rate limit budget"""
+    prompt_tokens = sum(estimate_tokens(message.get("content", "")) for message in messages)
+    return prompt_tokens + int(params.get("max_tokens", 0))
+
 class DeepSeekClient:
     """Client for interacting with DeepSeek API"""
-    
-    def __init__(self, api_key: str = None):
+
+    def __init__(
+        self,
+        api_key: str = None,
+        transport: Optional[HttpTransport] = None,
+        cache: Optional[LLMCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        max_in_flight: Optional[int] = None
+    ):
         load_dotenv()
         self.api_key = api_key or os.getenv("NEXT_PUBLIC_DEEPSEEK_API_KEY")
-        if not self.api_key:
+        # Replay runs are served entirely from the cache and need no key
+        if not self.api_key and not (cache is not None and cache.replay):
             raise ValueError("DeepSeek API key not found in environment variables")
-        
-        self.base_url = "https://api.deepseek.com/v1"
+
+        # Overridable so benchmarks can point the client at a local stand-in
+        self.base_url = os.getenv("PAPER_AGENT_DEEPSEEK_URL", "https://api.deepseek.com/v1")
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        self._owns_transport = transport is None
+        self.transport = transport or HttpTransport()
+        self.cache = cache
+        self.rate_limiter = rate_limiter or RateLimiter.shared()
+        self.retry_policy = retry_policy or RetryPolicy()
+        # Cap on requests open at once across everything sharing this client
+        self.max_in_flight = max_in_flight or int(os.getenv("PAPER_AGENT_LLM_MAX_IN_FLIGHT", "0")) or None
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self._in_flight_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Time-to-first-token and duration of each streamed completion
+        self.stream_metrics: List[Dict[str, Any]] = []
+        # Outcomes of generate_json across everything sharing this client
+        self.parse_stats = ParseStats()
+
+    @asynccontextmanager
+    async def _request_slot(self) -> AsyncIterator[None]:
+        """Hold one of the max_in_flight request slots, if a cap is set"""
+        if self.max_in_flight is None:
+            yield
+            return
+        loop = asyncio.get_running_loop()
+        if self._in_flight is None or self._in_flight_loop is not loop:
+            # Like the pooled session, a semaphore belongs to the loop that first used it
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+            self._in_flight_loop = loop
+        async with self._in_flight:
+            yield
+
+    async def chat_completion(self, messages: List[Dict[str, str]], model: str = "deepseek-chat", **params) -> Dict[str, Any]:
+        """Make a chat completion request to DeepSeek API, answering from the cache when possible"""
+        with trace("deepseek.chat", "llm", model=model) as span:
+            cache_key = None
+            if self.cache is not None:
+                cache_key = self.cache.make_key(model, messages, params)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    span.set(cache_hit=True)
+                    return cached
+            span.set(cache_hit=False)
+            response = await self._request_completion(messages, model, params)
+            self._record_usage(span, response.get("usage"))
+            if cache_key is not None:
+                self.cache.put(cache_key, response)
+            return response
+
+    @staticmethod
+    def _record_usage(span: Span, usage: Optional[Dict[str, Any]]):
+        usage = usage or {}
+        span.set(
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0)
+        )
+
+    async def _raise_for_status(self, response):
+        if response.status != 200:
+            error_text = await response.text()
+            raise DeepSeekAPIError(
+                f"DeepSeek API error ({response.status}): {error_text}",
+                status=response.status,
+                retry_after=parse_retry_after(response.headers.get("Retry-After"))
+            )
+
+    async def _request_completion(self, messages: List[Dict[str, str]], model: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            return await self.retry_policy.call(lambda: self._post_completion(messages, model, params))
+        except Exception as e:
+            logger.error(f"Error in DeepSeek API call: {str(e)}")
+            raise
+
+    async def _post_completion(self, messages: List[Dict[str, str]], model: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        estimated_tokens = estimate_request_tokens(messages, params)
+        span = get_tracer().current()
+        waited = time.perf_counter()
+        async with self._request_slot():
+            await self.rate_limiter.acquire(estimated_tokens)
+            body = json.dumps({
+                **params,
+                "model": model,
+                "messages": messages,
+                "stream": False
+            }).encode("utf-8")
+            if span is not None:
+                span.queue_wait += time.perf_counter() - waited
+                span.add(attempts=1, bytes_sent=len(body))
+            async with self.transport.request(
+                "POST",
+                f"{self.base_url}/chat/completions",
+                headers=self.headers,
+                data=body
+            ) as response:
+                await self._raise_for_status(response)
+                data = await response.read()
+        if span is not None:
+            span.add(bytes_received=len(data))
+        result = json.loads(data)
+        usage = result.get("usage") or {}
+        self.rate_limiter.record_usage(estimated_tokens, usage.get("total_tokens", 0))
+        return result
 
-    async def chat_completion(self, messages: List[Dict[str, str]], model: str = "deepseek-chat") -> Dict[str, Any]:
-        """Make a chat completion request to DeepSeek API"""
-        async with aiohttp.ClientSession() as session:
+    async def stream_chat_completion(self, messages: List[Dict[str, str]], model: str = "deepseek-chat", **params) -> AsyncIterator[str]:
+        """Stream a chat completion from DeepSeek API, yielding content deltas as they arrive"""
+        with trace("deepseek.stream", "llm", model=model) as span:
+            async for delta in self._stream_chat_completion(span, messages, model, params):
+                yield delta
+
+    async def _stream_chat_completion(
+        self,
+        span: Span,
+        messages: List[Dict[str, str]],
+        model: str,
+        params: Dict[str, Any]
+    ) -> AsyncIterator[str]:
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(model, messages, params)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                span.set(cache_hit=True)
+                yield cached["choices"][0]["message"]["content"]
+                return
+        span.set(cache_hit=False)
+
+        started = time.monotonic()
+        time_to_first_token = None
+        parts = []
+        usage = {}
+        estimated_tokens = estimate_request_tokens(messages, params)
+        attempt = 1
+        while True:
             try:
-                async with session.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=self.headers,
-                    json={
+                waited = time.perf_counter()
+                async with self._request_slot():
+                    await self.rate_limiter.acquire(estimated_tokens)
+                    body = json.dumps({
+                        **params,
                         "model": model,
                         "messages": messages,
-                        "stream": False
-                    }
-                ) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        logger.error(f"DeepSeek API error: {error_text}")
-                        raise Exception(f"DeepSeek API error: {error_text}")
-                    return await response.json()
+                        "stream": True
+                    }).encode("utf-8")
+                    span.queue_wait += time.perf_counter() - waited
+                    span.add(attempts=1, bytes_sent=len(body))
+                    async with self.transport.request(
+                        "POST",
+                        f"{self.base_url}/chat/completions",
+                        headers=self.headers,
+                        data=body
+                    ) as response:
+                        await self._raise_for_status(response)
+                        # Server-sent events: one "data: {json}" line per chunk, ending with "data: [DONE]"
+                        async for line in response.content:
+                            span.add(bytes_received=len(line))
+                            line = line.strip()
+                            if not line.startswith(b"data:"):
+                                continue
+                            data = line[len(b"data:"):].strip()
+                            if data == b"[DONE]":
+                                break
+                            chunk = json.loads(data)
+                            usage = chunk.get("usage") or usage
+                            choices = chunk.get("choices") or [{}]
+                            delta = (choices[0].get("delta") or {}).get("content")
+                            if not delta:
+                                continue
+                            if time_to_first_token is None:
+                                time_to_first_token = time.monotonic() - started
+                            parts.append(delta)
+                            yield delta
+                break
             except Exception as e:
-                logger.error(f"Error in DeepSeek API call: {str(e)}")
-                raise
+                # Once tokens have been handed out the stream cannot be replayed
+                if parts or not self.retry_policy.should_retry(e, attempt):
+                    logger.error(f"Error in DeepSeek streaming call: {str(e)}")
+                    raise
+                delay = self.retry_policy.backoff(e, attempt)
+                logger.warning(f"DeepSeek stream attempt {attempt} failed ({str(e)}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+        self.rate_limiter.record_usage(estimated_tokens, usage.get("total_tokens", 0))
+        self._record_usage(span, usage)
+
+        total_time = time.monotonic() - started
+        self.stream_metrics.append({
+            "model": model,
+            "time_to_first_token": time_to_first_token,
+            "total_time": total_time,
+            "chunks": len(parts)
+        })
+        span.set(time_to_first_token=time_to_first_token, chunks=len(parts))
+        if time_to_first_token is not None:
+            logger.info(f"DeepSeek stream: first token after {time_to_first_token:.2f}s, done after {total_time:.2f}s")
+        if cache_key is not None:
+            self.cache.put(cache_key, {
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(parts)}}]
+            })
+
+    async def stream_text(self, prompt: str, model: str = "deepseek-chat", **params) -> AsyncIterator[str]:
+        """Stream generated text using DeepSeek API"""
+        messages = [{"role": "user", "content": prompt}]
+        async for delta in self.stream_chat_completion(messages, model, **params):
+            yield delta
 
-    async def generate_text(self, prompt: str, model: str = "deepseek-chat") -> str:
+    async def generate_text(self, prompt: str, model: str = "deepseek-chat", **params) -> str:
         """Generate text using DeepSeek API"""
         messages = [{"role": "user", "content": prompt}]
-        response = await self.chat_completion(messages, model)
-        return response["choices"][0]["message"]["content"] 
\ No newline at end of file
+        response = await self.chat_completion(messages, model, **params)
+        return response["choices"][0]["message"]["content"]
+
+    def _uncache(self, prompt: str, model: str, params: Dict[str, Any]):
+        """Drop the cached response to a generate_text call"""
+        if self.cache is not None:
+            self.cache.delete(self.cache.make_key(model, [{"role": "user", "content": prompt}], params))
+
+    async def generate_json(
+        self,
+        prompt: str,
+        schema: Optional[type] = None,
+        default: Any = None,
+        model: str = "deepseek-chat",
+        repair: bool = True,
+        **params
+    ) -> Any:
+        """Generate a JSON object, validated against a pydantic schema when one is given.
+
+        The object is dug out of code fences or prose if need be. Only when
+        that fails, or the object does not fit the schema, is one short
+        repair call made; if the repair fails too, `default` is returned and
+        neither reply is kept in the cache, so the next run asks again.
+        Callers with a cheaper fallback of their own pass repair=False to get
+        `default` straight away.
+        """
+        if JSON_MODE:
+            params.setdefault("response_format", {"type": "json_object"})
+        name = schema.__name__ if schema is not None else "json"
+        with trace("structured_output", "parse", schema=name) as span:
+            result = await self.generate_text(prompt, model, **params)
+            try:
+                value, extracted = parse_structured(result, schema)
+                outcome = "extracted" if extracted else "parsed"
+            except ValueError as e:
+                if not repair:
+                    logger.warning(f"Invalid {name} response ({str(e).splitlines()[0]})")
+                    self._uncache(prompt, model, params)
+                    self.parse_stats.record("failed")
+                    span.set(outcome="failed")
+                    return default
+                logger.warning(f"Invalid {name} response ({str(e).splitlines()[0]}), asking for a repair")
+                self.parse_stats.repair_calls += 1
+                repair_params = {"temperature": 0}
+                if "response_format" in params:
+                    repair_params["response_format"] = params["response_format"]
+                repair = repair_prompt(result, str(e), schema)
+                repaired = await self.generate_text(repair, model, **repair_params)
+                try:
+                    value, _ = parse_structured(repaired, schema)
+                    outcome = "repaired"
+                except ValueError as e:
+                    logger.error(f"Could not repair {name} response: {str(e)}")
+                    logger.error(f"Raw response: {result}")
+                    value, outcome = default, "failed"
+                    # Left cached, both replies would fail the same way on every rerun until they expire
+                    self._uncache(prompt, model, params)
+                    self._uncache(repair, model, repair_params)
+            self.parse_stats.record(outcome)
+            span.set(outcome=outcome)
+            return value
+
+    async def close(self):
+        """Close the transport if this client created it"""
+        if self._owns_transport:
+            await self.transport.close()
@@ -0,0 +1,69 @@
+import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional, AsyncIterator
+from .lazy import lazy_import
+
+aiohttp = lazy_import("aiohttp")
+
+logger = logging.getLogger(__name__)
+
+class HttpTransport:
+    """Shared aiohttp session backed by a keep-alive connection pool"""
+
+    def __init__(
+        self,
+        limit: Optional[int] = None,
+        limit_per_host: Optional[int] = None,
+        keepalive_timeout: float = 60.0,
+        dns_cache_ttl: int = 300,
+        timeout: float = 300.0
+    ):
+        self.limit = limit or int(os.getenv("PAPER_AGENT_HTTP_LIMIT", "100"))
+        self.limit_per_host = limit_per_host or int(os.getenv("PAPER_AGENT_HTTP_LIMIT_PER_HOST", "10"))
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.timeout = timeout
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def get_session(self) -> "aiohttp.ClientSession":
+        """Return the pooled session, creating it on the running loop if needed"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            if self._session is not None and not self._session.closed and self._loop is not loop:
+                # A session cannot outlive the loop it was created on
+                logger.warning("Event loop changed, discarding pooled HTTP session")
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._loop = loop
+        return self._session
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, **kwargs) -> AsyncIterator["aiohttp.ClientResponse"]:
+        """Issue a request over the pooled session"""
+        session = await self.get_session()
+        async with session.request(method, url, **kwargs) as response:
+            yield response
+
+    async def close(self):
+        """Close the pooled session and release its connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+    async def __aenter__(self) -> "HttpTransport":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
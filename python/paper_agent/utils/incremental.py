@@ -0,0 +1,54 @@
+import json
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from .concurrency import FanOutResult, fan_out
+
+logger = logging.getLogger(__name__)
+
+def fingerprint_inputs(*parts: Any) -> str:
+    """Stable hash of everything a per-section result was computed from"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+async def fan_out_changed(
+    fingerprints: Dict[Hashable, str],
+    worker: Callable[[Hashable], Awaitable[Any]],
+    previous_results: Optional[Dict[Hashable, Any]] = None,
+    previous_fingerprints: Optional[Dict[Hashable, str]] = None,
+    limit: Optional[int] = None,
+    fallback: Optional[Callable[[Hashable, Exception], Any]] = None,
+    skipped: Optional[Dict[Hashable, Exception]] = None
+) -> FanOutResult:
+    """Fan out over the keys of `fingerprints`, rerunning only keys whose inputs changed.
+
+    A key keeps its previous result when it has one and its fingerprint
+    matches the one recorded alongside it. Keys in `skipped` are not run and
+    count as failed with the given error. Results follow the order of
+    `fingerprints`; `fallback` works as in fan_out.
+    """
+    previous_results = previous_results or {}
+    previous_fingerprints = previous_fingerprints or {}
+    skipped = {key: error for key, error in (skipped or {}).items() if key in fingerprints}
+    changed = [
+        key for key, value in fingerprints.items()
+        if key not in skipped and (key not in previous_results or previous_fingerprints.get(key) != value)
+    ]
+    if len(changed) < len(fingerprints) - len(skipped):
+        logger.info(f"Reusing {len(fingerprints) - len(skipped) - len(changed)} unchanged results, recomputing {len(changed)}")
+    computed = await fan_out(changed, worker, limit, fallback)
+
+    merged = FanOutResult()
+    for key in fingerprints:
+        if key in skipped:
+            merged.errors[key] = skipped[key]
+            if fallback is not None:
+                merged.results[key] = fallback(key, skipped[key])
+            continue
+        if key in computed.errors:
+            merged.errors[key] = computed.errors[key]
+        if key in computed.results:
+            merged.results[key] = computed.results[key]
+        elif key not in changed:
+            merged.results[key] = previous_results[key]
+    return merged
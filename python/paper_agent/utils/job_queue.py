@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "paper_agent", "jobs.sqlite")
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+def queue_path(path: Optional[str] = None) -> str:
+    """path, or PAPER_AGENT_QUEUE, or the default queue location"""
+    return path or os.getenv("PAPER_AGENT_QUEUE", DEFAULT_QUEUE_PATH)
+
+@dataclass
+class QueuedJob:
+    """A job handed out by JobQueue.lease; `attempts` includes the current one"""
+    id: int
+    job_id: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    owner: str
+
+class JobQueue:
+    """Durable job queue in a SQLite file shared by worker processes.
+
+    A worker leases one job at a time for `lease_seconds` and keeps the
+    lease alive with heartbeats while it works. Leases that stop being
+    renewed, because their worker crashed, was killed or is stuck, expire
+    and the job becomes available again. Every lease counts as an attempt,
+    so a job that keeps failing or keeps taking its worker down is marked
+    failed after `max_attempts`.
+    """
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH, max_attempts: int = 3, timeout: float = 30.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Transactions are managed explicitly; BEGIN IMMEDIATE makes leasing atomic across processes
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL, payload TEXT NOT NULL, "
+            "status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL, "
+            "owner TEXT, lease_expires REAL, available_at REAL NOT NULL, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL, result TEXT, error TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available_at)")
+
+    @classmethod
+    def from_env(cls, path: Optional[str] = None, **kwargs) -> "JobQueue":
+        """Queue at path, PAPER_AGENT_QUEUE or the default location"""
+        return cls(queue_path(path), **kwargs)
+
+    def _transaction(self):
+        return _Transaction(self._conn, self._lock)
+
+    def enqueue(self, payload: Dict[str, Any], job_id: Optional[str] = None, max_attempts: Optional[int] = None) -> int:
+        """Add a job and return its queue id"""
+        return self.enqueue_many([(job_id, payload)], max_attempts)[0]
+
+    def enqueue_many(self, jobs, max_attempts: Optional[int] = None) -> List[int]:
+        """Add (job_id, payload) pairs in one transaction; a missing job_id becomes the queue id"""
+        now = time.time()
+        ids = []
+        with self._transaction() as conn:
+            for job_id, payload in jobs:
+                cursor = conn.execute(
+                    "INSERT INTO jobs (job_id, payload, status, max_attempts, available_at, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (job_id or "", json.dumps(payload, ensure_ascii=False), QUEUED,
+                     max_attempts or self.max_attempts, now, now, now)
+                )
+                if not job_id:
+                    conn.execute("UPDATE jobs SET job_id = ? WHERE id = ?", (str(cursor.lastrowid), cursor.lastrowid))
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def _recover(self, conn: sqlite3.Connection, now: float, where: str, params: tuple) -> int:
+        rows = conn.execute(
+            f"SELECT id, job_id, attempts, max_attempts, owner FROM jobs WHERE status = ? AND {where}",
+            (LEASED, *params)
+        ).fetchall()
+        for row_id, job_id, attempts, max_attempts, owner in rows:
+            if attempts >= max_attempts:
+                logger.error(f"Job {job_id} lost its worker {owner} on its last attempt, giving up")
+                conn.execute(
+                    "UPDATE jobs SET status = ?, owner = NULL, lease_expires = NULL, updated_at = ?, error = ? WHERE id = ?",
+                    (FAILED, now, f"Lease of worker {owner} expired after {attempts} attempts", row_id)
+                )
+            else:
+                logger.warning(f"Recovered job {job_id} from worker {owner}")
+                conn.execute(
+                    "UPDATE jobs SET status = ?, owner = NULL, lease_expires = NULL, available_at = ?, updated_at = ? WHERE id = ?",
+                    (QUEUED, now, now, row_id)
+                )
+        return len(rows)
+
+    def recover_expired(self) -> int:
+        """Requeue (or fail, when out of attempts) jobs whose lease has expired"""
+        now = time.time()
+        with self._transaction() as conn:
+            return self._recover(conn, now, "lease_expires < ?", (now,))
+
+    def recover_owner(self, owner: str) -> int:
+        """Recover the leases of a worker known to be gone, without waiting for them to expire"""
+        now = time.time()
+        with self._transaction() as conn:
+            return self._recover(conn, now, "owner = ?", (owner,))
+
+    def lease(self, owner: str, lease_seconds: float) -> Optional[QueuedJob]:
+        """Take the oldest available job for `lease_seconds`, or None if there is none"""
+        now = time.time()
+        with self._transaction() as conn:
+            self._recover(conn, now, "lease_expires < ?", (now,))
+            row = conn.execute(
+                "SELECT id, job_id, payload, attempts, max_attempts FROM jobs "
+                "WHERE status = ? AND available_at <= ? ORDER BY available_at, id LIMIT 1",
+                (QUEUED, now)
+            ).fetchone()
+            if row is None:
+                return None
+            row_id, job_id, payload, attempts, max_attempts = row
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = ?, owner = ?, lease_expires = ?, updated_at = ? WHERE id = ?",
+                (LEASED, attempts + 1, owner, now + lease_seconds, now, row_id)
+            )
+        return QueuedJob(row_id, job_id, json.loads(payload), attempts + 1, max_attempts, owner)
+
+    def _update_leased(self, job: QueuedJob, assignments: str, params: tuple) -> bool:
+        # Only the current lease holder may change a leased job; the attempt tells
+        # a worker's old lease apart from a newer one it took on the same job
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE id = ? AND status = ? AND owner = ? AND attempts = ?",
+                (*params, time.time(), job.id, LEASED, job.owner, job.attempts)
+            )
+            return cursor.rowcount == 1
+
+    def heartbeat(self, job: QueuedJob, lease_seconds: float) -> bool:
+        """Extend the lease; False means it was lost and the job may be running elsewhere"""
+        return self._update_leased(job, "lease_expires = ?", (time.time() + lease_seconds,))
+
+    def ack(self, job: QueuedJob, result: Dict[str, Any]) -> bool:
+        """Mark the job done with its result"""
+        return self._update_leased(
+            job,
+            "status = ?, owner = NULL, lease_expires = NULL, result = ?, error = NULL",
+            (DONE, json.dumps(result, default=str, ensure_ascii=False))
+        )
+
+    def fail(self, job: QueuedJob, error: str, retry_delay: float = 0.0, retry: bool = True) -> bool:
+        """Record a failed attempt; the job is retried after retry_delay until it runs out of attempts"""
+        if retry and job.attempts < job.max_attempts:
+            return self._update_leased(
+                job,
+                "status = ?, owner = NULL, lease_expires = NULL, available_at = ?, error = ?",
+                (QUEUED, time.time() + retry_delay, error)
+            )
+        return self._update_leased(
+            job,
+            "status = ?, owner = NULL, lease_expires = NULL, error = ?",
+            (FAILED, error)
+        )
+
+    def release(self, job: QueuedJob) -> bool:
+        """Hand an unfinished job back without charging the attempt, e.g. on shutdown"""
+        return self._update_leased(
+            job,
+            "status = ?, owner = NULL, lease_expires = NULL, attempts = attempts - 1, available_at = ?",
+            (QUEUED, time.time())
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """Number of jobs in each status"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {QUEUED: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        counts.update(rows)
+        return counts
+
+    def pending(self) -> int:
+        """Jobs that are queued or being worked on"""
+        counts = self.stats()
+        return counts[QUEUED] + counts[LEASED]
+
+    def results(self, statuses=(DONE, FAILED)) -> Iterator[Dict[str, Any]]:
+        """Finished jobs with their status, attempts, error and result"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, job_id, status, attempts, error, result FROM jobs "
+                f"WHERE status IN ({', '.join('?' for _ in statuses)}) ORDER BY id",
+                tuple(statuses)
+            ).fetchall()
+        for row_id, job_id, status, attempts, error, result in rows:
+            yield {
+                "queue_id": row_id,
+                "id": job_id,
+                "status": status,
+                "attempts": attempts,
+                "error": error,
+                "result": json.loads(result) if result else None
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class _Transaction:
+    """Serializes threads on the connection and holds the database write lock for the block"""
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock):
+        self.conn = conn
+        self.lock = lock
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.lock.acquire()
+        try:
+            self.conn.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self.lock.release()
+            raise
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.conn.execute("ROLLBACK" if exc_type is not None else "COMMIT")
+        finally:
+            self.lock.release()
@@ -0,0 +1,33 @@
+import sys
+import types
+import importlib
+from typing import Any
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module that is imported on first attribute access.
+
+    Once loaded, the real module's namespace is copied onto the stand-in, so
+    later lookups cost the same as on the module itself.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_name"] = name
+
+    def _load(self) -> types.ModuleType:
+        module = importlib.import_module(self._lazy_name)
+        self.__dict__.update(module.__dict__)
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+def lazy_import(name: str) -> types.ModuleType:
+    """The module called name, deferring its import until it is first used"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
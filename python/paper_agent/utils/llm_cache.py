@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "paper_agent", "llm_cache.sqlite")
+
+class CacheMissError(Exception):
+    """Raised in replay mode when a request has no cached response"""
+
+class LLMCache:
+    """On-disk cache of chat completion responses keyed by request content.
+
+    Entries expire after `ttl` seconds and the least recently used ones are
+    evicted once the stored responses exceed `max_bytes`. In replay mode the
+    cache is read-only and a miss raises CacheMissError instead of letting
+    the request go out to the API.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        ttl: Optional[float] = 7 * 24 * 3600,
+        max_bytes: int = 256 * 1024 * 1024,
+        replay: bool = False,
+        timeout: float = 30.0
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.replay = replay
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Batch jobs and worker processes share one cache file; WAL keeps readers off the write lock
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._write() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created_at)")
+            # Running total of stored bytes, kept by triggers so eviction never sums the table
+            conn.execute("CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY CHECK (id = 0), size INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO totals (id, size) SELECT 0, COALESCE(SUM(size), 0) FROM responses")
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_inserted AFTER INSERT ON responses "
+                "BEGIN UPDATE totals SET size = size + new.size WHERE id = 0; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_deleted AFTER DELETE ON responses "
+                "BEGIN UPDATE totals SET size = size - old.size WHERE id = 0; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_resized AFTER UPDATE OF size ON responses "
+                "BEGIN UPDATE totals SET size = size + new.size - old.size WHERE id = 0; END"
+            )
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """Serialize threads on the connection and hold the database write lock for the block"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    @classmethod
+    def from_env(cls) -> Optional["LLMCache"]:
+        """Build the cache described by PAPER_AGENT_LLM_CACHE*, or None when disabled"""
+        path = os.getenv("PAPER_AGENT_LLM_CACHE", DEFAULT_CACHE_PATH)
+        if path.lower() in ("", "0", "off", "false", "none"):
+            return None
+        replay = os.getenv("PAPER_AGENT_LLM_CACHE_REPLAY", "").lower() in ("1", "true", "yes")
+        return cls(path, replay=replay)
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], params: Dict[str, Any]) -> str:
+        """Hash the parts of a request that determine its response"""
+        payload = json.dumps(
+            {"model": model, "messages": messages, "params": params},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for key, or None on a miss.
+
+        A cache that cannot be read, e.g. because another process holds it
+        locked past the timeout, counts as a miss rather than failing the call.
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"LLM cache read failed ({str(e)}), treating it as a miss")
+            row = None
+        expired = row is not None and self.ttl is not None and now - row[1] > self.ttl
+        if row is None or expired:
+            self.misses += 1
+            if expired and not self.replay:
+                self._try_write(lambda conn: conn.execute("DELETE FROM responses WHERE key = ?", (key,)))
+            if self.replay:
+                raise CacheMissError(f"No cached response for request {key[:12]} in replay mode")
+            return None
+        self.hits += 1
+        if not self.replay:
+            self._try_write(lambda conn: conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)))
+        return json.loads(row[0])
+
+    def put(self, key: str, response: Dict[str, Any]):
+        """Store a response and evict old entries beyond the size budget"""
+        if self.replay:
+            return
+        data = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+
+        def store(conn: sqlite3.Connection):
+            conn.execute(
+                "INSERT INTO responses (key, response, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET response = excluded.response, size = excluded.size, "
+                "created_at = excluded.created_at, accessed_at = excluded.accessed_at",
+                (key, data, len(data), now, now)
+            )
+            self._evict(conn)
+
+        if self._try_write(store):
+            self.stores += 1
+
+    def delete(self, key: str):
+        """Drop the cached response for key, if any"""
+        if not self.replay:
+            self._try_write(lambda conn: conn.execute("DELETE FROM responses WHERE key = ?", (key,)))
+
+    def _try_write(self, write: Callable[[sqlite3.Connection], Any]) -> bool:
+        """Run write in a transaction; a failure is logged and skipped since the cache is only an optimisation"""
+        try:
+            with self._write() as conn:
+                write(conn)
+            return True
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"LLM cache write failed ({str(e)}), skipping it")
+            return False
+
+    def _evict(self, conn: sqlite3.Connection):
+        if self.ttl is not None:
+            cursor = conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+            self.evictions += cursor.rowcount
+        total = conn.execute("SELECT size FROM totals WHERE id = 0").fetchone()[0]
+        while total > self.max_bytes:
+            rows = conn.execute("SELECT key, size FROM responses ORDER BY accessed_at LIMIT 64").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                total -= size
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current cache size"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            size = self._conn.execute("SELECT size FROM totals WHERE id = 0").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "errors": self.errors,
+            "entries": entries,
+            "bytes": size
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,151 @@
+import re
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .lazy import lazy_import
+from .dedup import normalize_title
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+# Odd multiplier for the polynomial n-gram hash; arithmetic wraps modulo 2**64
+_BASE = 1099511628211
+
+def word_spans(text: str) -> Tuple[List[str], "np.ndarray"]:
+    """Lowercased words of text and the (start, end) character span of each"""
+    matches = list(_WORD.finditer(text or ""))
+    spans = np.array([match.span() for match in matches], dtype=np.int64).reshape(-1, 2)
+    return [match.group().lower() for match in matches], spans
+
+def word_tokens(text: str) -> List[str]:
+    """Lowercased words of text"""
+    return _WORD.findall((text or "").lower())
+
+def ngram_hashes(words: List[str], size: int) -> "np.ndarray":
+    """64-bit hash of every run of `size` consecutive words, one per start position"""
+    if len(words) < size:
+        return np.zeros(0, dtype=np.uint64)
+    # str hashes are salted per process, which is fine for an index that is never persisted
+    hashed = np.fromiter(map(hash, words), dtype=np.int64, count=len(words)).view(np.uint64)
+    count = len(words) - size + 1
+    combined = np.zeros(count, dtype=np.uint64)
+    base = np.uint64(_BASE)
+    with np.errstate(over="ignore"):
+        for offset in range(size):
+            combined = combined * base + hashed[offset:offset + count]
+    return combined
+
+class OverlapIndex:
+    """Hashed word n-grams of the collected papers, for finding copied passages.
+
+    Each paper's n-gram hashes are deduplicated and kept in one sorted array
+    next to the paper they came from, so looking up all n-grams of a section
+    is a single vectorized binary search.
+    """
+
+    FIELDS = ("summary", "abstract", "pdf_text")
+
+    def __init__(self, papers: Iterable[Dict[str, Any]], ngram_size: int = 8):
+        self.ngram_size = ngram_size
+        self.titles: List[str] = []
+        hashes, owners = [], []
+        for paper in papers:
+            text = "\n".join(
+                paper[field] for field in self.FIELDS
+                if isinstance(paper.get(field), str) and paper[field]
+            )
+            paper_hashes = np.unique(ngram_hashes(word_tokens(text), ngram_size))
+            hashes.append(paper_hashes)
+            owners.append(np.full(len(paper_hashes), len(self.titles), dtype=np.int32))
+            self.titles.append(paper.get("title", ""))
+        if hashes:
+            hashes = np.concatenate(hashes)
+            owners = np.concatenate(owners)
+        else:
+            hashes = np.zeros(0, dtype=np.uint64)
+            owners = np.zeros(0, dtype=np.int32)
+        order = np.argsort(hashes, kind="stable")
+        self.hashes = hashes[order]
+        self.owners = owners[order]
+
+    def _matches(self, query: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+        """Start positions in query matching a paper, and the matched paper for each"""
+        left = np.searchsorted(self.hashes, query, side="left")
+        right = np.searchsorted(self.hashes, query, side="right")
+        found = np.flatnonzero(right > left)
+        if len(found) == 0:
+            return found, found
+        # An n-gram shared by several papers is attributed to each of them
+        repeats = right[found] - left[found]
+        starts = np.repeat(found, repeats)
+        offsets = np.arange(len(starts)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        return starts, self.owners[np.repeat(left[found], repeats) + offsets]
+
+    def _covered(self, starts: "np.ndarray", length: int) -> "np.ndarray":
+        marks = np.zeros(length + 1, dtype=np.int32)
+        np.add.at(marks, starts, 1)
+        np.add.at(marks, np.minimum(starts + self.ngram_size, length), -1)
+        return np.cumsum(marks[:-1]) > 0
+
+    def check(self, text: str, citations: Optional[Iterable[str]] = None, max_spans: int = 20) -> Dict[str, Any]:
+        """Report passages of text that also appear in the collected papers.
+
+        Coverage is the percentage of the section's words inside a matching
+        n-gram. Overlap with a paper whose title is among `citations` counts
+        as cited; citation_coverage is the share of the section that is not
+        uncited overlap.
+        """
+        tokens, spans = word_spans(text)
+        starts, owners = self._matches(ngram_hashes(tokens, self.ngram_size))
+        if len(tokens) == 0 or len(starts) == 0:
+            return {
+                "potential_issues": [],
+                "citation_coverage": 100.0,
+                "recommendations": [],
+                "overlap_coverage": 0.0,
+                "sources": []
+            }
+
+        cited_titles = {normalize_title(citation) for citation in citations or [] if isinstance(citation, str)}
+        sources = []
+        uncited = np.zeros(len(tokens), dtype=bool)
+        for owner in np.unique(owners):
+            covered = self._covered(starts[owners == owner], len(tokens))
+            title = self.titles[owner]
+            cited = normalize_title(title) in cited_titles
+            if not cited:
+                uncited |= covered
+            sources.append({
+                "title": title,
+                "coverage": round(100.0 * float(covered.mean()), 2),
+                "cited": cited
+            })
+        sources.sort(key=lambda source: -source["coverage"])
+
+        covered = self._covered(starts, len(tokens))
+        # Runs of consecutive covered words become the reported spans
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], covered.astype(np.int8), [0]))))
+        issues = []
+        for first, last in zip(edges[::2], edges[1::2] - 1):
+            in_run = (starts >= first) & (starts <= last)
+            issues.append({
+                "start": int(spans[first, 0]),
+                "end": int(spans[last, 1]),
+                "text": text[spans[first, 0]:spans[last, 1]],
+                "words": int(last - first + 1),
+                "sources": [self.titles[owner] for owner in np.unique(owners[in_run])]
+            })
+        issues.sort(key=lambda issue: -issue["words"])
+
+        recommendations = [
+            f"Quote or paraphrase the passages shared with \"{source['title']}\" and cite it"
+            for source in sources if not source["cited"]
+        ]
+        return {
+            "potential_issues": issues[:max_spans],
+            "citation_coverage": round(100.0 * (1.0 - float(uncited.mean())), 2),
+            "recommendations": recommendations,
+            "overlap_coverage": round(100.0 * float(covered.mean()), 2),
+            "sources": sources
+        }
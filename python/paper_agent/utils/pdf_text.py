@@ -0,0 +1,52 @@
+import io
+import os
+import atexit
+import asyncio
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def extract_pdf_text(pdf_data: bytes, max_pages: Optional[int] = None) -> str:
+    """Extract the text of up to max_pages pages from a PDF"""
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(io.BytesIO(pdf_data))
+    pages = reader.pages if max_pages is None else reader.pages[:max_pages]
+    return "\n".join((page.extract_text() or "") for page in pages)
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    """Return the process pool shared by all PDF extraction in this process"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = int(os.getenv("PAPER_AGENT_PDF_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            atexit.register(shutdown_extraction_pool)
+        return _pool
+
+def shutdown_extraction_pool():
+    """Stop the extraction worker processes"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+            _pool = None
+
+async def extract_pdf_text_async(pdf_data: bytes, max_pages: Optional[int] = None) -> str:
+    """Extract PDF text in a worker process so the event loop stays responsive"""
+    loop = asyncio.get_running_loop()
+    try:
+        pool = get_extraction_pool()
+        return await loop.run_in_executor(pool, extract_pdf_text, pdf_data, max_pages)
+    except (BrokenProcessPool, NotImplementedError, PermissionError) as e:
+        # Some sandboxes forbid subprocesses; a thread still keeps the loop free
+        logger.warning(f"PDF process pool unavailable ({str(e)}), extracting in a thread")
+        shutdown_extraction_pool()
+        return await loop.run_in_executor(None, extract_pdf_text, pdf_data, max_pages)
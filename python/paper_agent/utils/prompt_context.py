@@ -0,0 +1,126 @@
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# DeepSeek's tokenizer averages roughly four characters of English per token
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = " ...[truncated]"
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local estimate of how many tokens text will cost"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to roughly max_tokens tokens"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max(0, max_chars - len(TRUNCATION_MARKER))] + TRUNCATION_MARKER
+
+def _to_text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+@dataclass
+class ContextField:
+    """A context entry an agent wants in its prompt.
+
+    `item_fields` keeps only those keys of a dict, or of each dict in a list.
+    `item_tokens` caps every list item separately, so one long record (a full
+    pdf_text, say) cannot crowd out the others. Fields with a higher
+    `priority` are given their share of the budget first.
+    """
+    key: str
+    max_tokens: Optional[int] = None
+    priority: int = 0
+    item_fields: Optional[Sequence[str]] = None
+    item_tokens: Optional[int] = None
+    label: Optional[str] = None
+
+    def select(self, value: Any) -> Any:
+        if not self.item_fields:
+            return value
+        if isinstance(value, dict):
+            return {k: value[k] for k in self.item_fields if k in value}
+        if isinstance(value, list):
+            return [
+                {k: item[k] for k in self.item_fields if k in item} if isinstance(item, dict) else item
+                for item in value
+            ]
+        return value
+
+    def render_item(self, item: Any) -> str:
+        """One already selected list item as a prompt line"""
+        line = "- " + _to_text(item)
+        if self.item_tokens is not None:
+            line = truncate_to_tokens(line, self.item_tokens)
+        return line
+
+    def batches(self, value: List[Any], max_tokens: int) -> List[List[Any]]:
+        """Split a list into consecutive runs that each render within max_tokens.
+
+        An item too large for any batch on its own still gets a batch of its
+        own, where render() truncates it.
+        """
+        batches: List[List[Any]] = []
+        used = max_tokens
+        for item, selected in zip(value, self.select(value)):
+            cost = estimate_tokens(self.render_item(selected)) + 1
+            if used + cost > max_tokens:
+                batches.append([])
+                used = 0
+            batches[-1].append(item)
+            used += cost
+        return batches
+
+    def render(self, value: Any, max_tokens: int) -> str:
+        value = self.select(value)
+        if not isinstance(value, list):
+            return truncate_to_tokens(_to_text(value), max_tokens)
+
+        # Lists keep whole items in order and say how many were left out
+        lines = []
+        used = 0
+        for index, item in enumerate(value):
+            line = self.render_item(item)
+            cost = estimate_tokens(line) + 1
+            if used + cost > max_tokens:
+                lines.append(f"... ({len(value) - index} more omitted)")
+                break
+            lines.append(line)
+            used += cost
+        return "\n".join(lines)
+
+class PromptContext:
+    """Projects a shared context dict onto the fields an agent needs, within a token budget"""
+
+    def __init__(self, fields: List[ContextField], budget: int):
+        self.fields = fields
+        self.budget = budget
+
+    def project(self, context: Dict[str, Any]) -> Dict[str, str]:
+        """Render each declared field that is present, in declaration order"""
+        rendered = {}
+        remaining = self.budget
+        for field in sorted(self.fields, key=lambda f: -f.priority):
+            value = context.get(field.key)
+            if value is None or value == "" or value == [] or value == {}:
+                continue
+            allowance = remaining if field.max_tokens is None else min(field.max_tokens, remaining)
+            if allowance <= 0:
+                logger.debug(f"Dropping context field {field.key}: token budget exhausted")
+                continue
+            text = field.render(value, allowance)
+            rendered[field.key] = text
+            remaining -= estimate_tokens(text)
+        return {field.key: rendered[field.key] for field in self.fields if field.key in rendered}
+
+    def render(self, context: Dict[str, Any]) -> str:
+        """Render the projected fields as labelled prompt lines"""
+        projected = self.project(context)
+        labels = {field.key: field.label or field.key.replace("_", " ").capitalize() for field in self.fields}
+        return "\n".join(f"{labels[key]}:\n{text}" for key, text in projected.items())
@@ -0,0 +1,84 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Token bucket refilled continuously at `per_minute` units per minute.
+
+    Callers reserve units up front and sleep off any deficit, so the bucket
+    holds no event-loop-bound state and can be shared by every loop and
+    thread in the process.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` units and return how long the caller must wait for them"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= min(amount, self.capacity)
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def adjust(self, amount: float):
+        """Return (positive) or take (negative) units after the fact"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+class RateLimiter:
+    """Process-wide request and token budget for DeepSeek API calls"""
+
+    _shared: Optional["RateLimiter"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    @classmethod
+    def shared(cls) -> "RateLimiter":
+        """Return the limiter shared by every client in this process.
+
+        Limits come from PAPER_AGENT_REQUESTS_PER_MINUTE and
+        PAPER_AGENT_TOKENS_PER_MINUTE; without them calls are not throttled
+        and only 429 responses slow the client down.
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                rpm = os.getenv("PAPER_AGENT_REQUESTS_PER_MINUTE", "")
+                tpm = os.getenv("PAPER_AGENT_TOKENS_PER_MINUTE", "")
+                cls._shared = cls(
+                    requests_per_minute=float(rpm) if rpm else None,
+                    tokens_per_minute=float(tpm) if tpm else None
+                )
+            return cls._shared
+
+    async def acquire(self, estimated_tokens: int = 0):
+        """Wait until one request and `estimated_tokens` tokens fit in the budget"""
+        delay = 0.0
+        if self.requests is not None:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens is not None and estimated_tokens:
+            delay = max(delay, self.tokens.reserve(estimated_tokens))
+        if delay > 0:
+            logger.debug(f"Rate limiter delaying request by {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int):
+        """Correct the token budget once the API reports real usage"""
+        if self.tokens is not None and actual_tokens:
+            self.tokens.adjust(estimated_tokens - actual_tokens)
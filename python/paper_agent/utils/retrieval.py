@@ -0,0 +1,110 @@
+import re
+import logging
+from collections import Counter
+from itertools import count, repeat
+from typing import Any, Dict, List, Optional
+from .lazy import lazy_import
+
+np = lazy_import("numpy")
+sparse = lazy_import("scipy.sparse")
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]{2,}")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this to was were which with "
+    "we our their they these those can not no also been into than then there such via using use used".split()
+)
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords or single characters"""
+    return [word for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+
+def _term_counts(text: str) -> Counter:
+    counts = Counter(_WORD.findall(text.lower()))
+    for word in STOPWORDS.intersection(counts):
+        del counts[word]
+    return counts
+
+def chunk_text(text: str, chunk_words: int = 200, overlap: int = 40) -> List[str]:
+    """Split text into overlapping windows of about chunk_words words"""
+    words = text.split()
+    if len(words) <= chunk_words:
+        return [" ".join(words)] if words else []
+    step = max(1, chunk_words - overlap)
+    return [" ".join(words[start:start + chunk_words]) for start in range(0, len(words) - overlap, step)]
+
+class RetrievalIndex:
+    """In-memory BM25 index over passages from the collected papers.
+
+    Okapi BM25 weights are precomputed into a sparse passage-by-term matrix
+    stored column-wise, so scoring a query only sums the columns of its
+    terms.
+    """
+
+    # Paper fields indexed, in the order their passages are added
+    FIELDS = ("summary", "abstract", "pdf_text")
+
+    def __init__(self, passages: List[Dict[str, Any]], k1: float = 1.5, b: float = 0.75):
+        self.passages = passages
+        vocabulary: Dict[str, int] = {}
+        # Every lookup draws a fresh id and setdefault keeps the first one; the
+        # gaps are squeezed out below, which keeps this loop entirely in C calls
+        ids = count()
+        rows, cols, counts = [], [], []
+        lengths = np.zeros(len(passages), dtype=np.float64)
+        for row, passage in enumerate(passages):
+            terms = _term_counts(passage["text"])
+            lengths[row] = sum(terms.values())
+            rows.extend(repeat(row, len(terms)))
+            cols.extend(map(vocabulary.setdefault, terms, ids))
+            counts.extend(terms.values())
+
+        _, cols = np.unique(np.asarray(cols, dtype=np.int64), return_inverse=True)
+        terms_by_id = sorted(vocabulary, key=vocabulary.__getitem__)
+        self.vocabulary = {term: column for column, term in enumerate(terms_by_id)}
+        shape = (len(passages), len(self.vocabulary))
+        if not counts:
+            self.weights = sparse.csc_matrix(shape, dtype=np.float64)
+            return
+        rows = np.asarray(rows)
+        tf = np.asarray(counts, dtype=np.float64)
+        document_frequency = np.bincount(cols, minlength=shape[1])
+        idf = np.log1p((len(passages) - document_frequency + 0.5) / (document_frequency + 0.5))
+        norm = k1 * (1 - b + b * lengths[rows] / max(lengths.mean(), 1.0))
+        values = idf[cols] * tf * (k1 + 1) / (tf + norm)
+        self.weights = sparse.csc_matrix((values, (rows, cols)), shape=shape)
+
+    @classmethod
+    def from_papers(cls, papers: List[Dict[str, Any]], chunk_words: int = 200, overlap: int = 40) -> "RetrievalIndex":
+        """Index the summaries, abstracts and full text of collected papers"""
+        passages = []
+        for paper in papers:
+            for field in cls.FIELDS:
+                text = paper.get(field) or ""
+                if not isinstance(text, str):
+                    continue
+                for chunk in chunk_text(text, chunk_words, overlap):
+                    passages.append({"title": paper.get("title", ""), "field": field, "text": chunk})
+        return cls(passages)
+
+    def search(self, query: str, k: int = 5, max_per_paper: Optional[int] = 2) -> List[Dict[str, Any]]:
+        """Return up to k passages ranked by BM25 score against query"""
+        columns = sorted({self.vocabulary[token] for token in tokenize(query) if token in self.vocabulary})
+        if not columns or not self.passages:
+            return []
+        scores = np.asarray(self.weights[:, columns].sum(axis=1)).ravel()
+        candidates = np.flatnonzero(scores > 0)
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        results = []
+        per_paper: Dict[str, int] = {}
+        for row in ranked:
+            passage = self.passages[row]
+            if max_per_paper is not None and per_paper.get(passage["title"], 0) >= max_per_paper:
+                continue
+            per_paper[passage["title"]] = per_paper.get(passage["title"], 0) + 1
+            results.append(dict(passage, score=float(scores[row])))
+            if len(results) >= k:
+                break
+        return results
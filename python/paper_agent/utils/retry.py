@@ -0,0 +1,73 @@
+import random
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional
+from .lazy import lazy_import
+
+aiohttp = lazy_import("aiohttp")
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+class APIError(Exception):
+    """HTTP error returned by a remote API"""
+
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status in RETRYABLE_STATUSES
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Read a Retry-After header given in seconds"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        # HTTP-date form; fall back to normal backoff
+        return None
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an error is transient and worth another attempt"""
+    if isinstance(error, APIError):
+        return error.retryable
+    return isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError))
+
+class RetryPolicy:
+    """Retry transient failures with jittered exponential backoff"""
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, error: BaseException, attempt: int) -> bool:
+        """Whether to try again after `error` on the given 1-based attempt"""
+        return attempt < self.max_attempts and is_retryable(error)
+
+    def backoff(self, error: BaseException, attempt: int) -> float:
+        """Delay before the next attempt, honouring Retry-After when present"""
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            return min(self.max_delay, retry_after) + random.uniform(0, self.base_delay)
+        # Full jitter keeps concurrent callers from retrying in lockstep
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    async def call(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Await func(), retrying it while failures are retryable"""
+        attempt = 1
+        while True:
+            try:
+                return await func()
+            except Exception as e:
+                if not self.should_retry(e, attempt):
+                    raise
+                delay = self.backoff(e, attempt)
+                logger.warning(f"Attempt {attempt} failed ({str(e)}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
@@ -0,0 +1,134 @@
+import os
+import re
+import json
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Ask the API for a JSON object response; set PAPER_AGENT_JSON_MODE=0 for endpoints without it
+JSON_MODE = os.getenv("PAPER_AGENT_JSON_MODE", "1").lower() not in ("0", "false", "no", "off")
+
+# Longest piece of a bad response quoted back in a repair prompt
+MAX_REPAIR_CHARS = 12000
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)```", re.DOTALL)
+
+def extract_json(text: str) -> Tuple[Any, bool]:
+    """Parse the JSON value in a model response.
+
+    Returns the value and whether it had to be dug out of code fences or
+    surrounding prose. Raises ValueError if there is no complete JSON value.
+    """
+    stripped = (text or "").strip()
+    try:
+        return json.loads(stripped), False
+    except json.JSONDecodeError:
+        pass
+    for match in _FENCE.finditer(stripped):
+        try:
+            return json.loads(match.group(1).strip()), True
+        except json.JSONDecodeError:
+            continue
+    # The first object or array that decodes, e.g. after "Here is the JSON:"
+    decoder = json.JSONDecoder()
+    start = 0
+    while True:
+        start = _next_bracket(stripped, start)
+        if start < 0:
+            break
+        try:
+            return decoder.raw_decode(stripped, start)[0], True
+        except json.JSONDecodeError:
+            # Skip the whole bracketed span; a value nested in a truncated one is only a fragment
+            start = _span_end(stripped, start)
+            if start < 0:
+                break
+    raise ValueError("no complete JSON value in the response")
+
+def _next_bracket(text: str, start: int) -> int:
+    positions = [position for position in (text.find("{", start), text.find("[", start)) if position >= 0]
+    return min(positions) if positions else -1
+
+def _span_end(text: str, start: int) -> int:
+    """Index just past the bracket closing the one at start, or -1 if it is never closed"""
+    depth = 0
+    in_string = False
+    escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return index + 1
+    return -1
+
+def validate(value: Any, schema: Optional[type]) -> Any:
+    """value checked against a pydantic model and dumped back to plain data; ValueError if invalid"""
+    if schema is None:
+        return value
+    # pydantic's ValidationError is a ValueError
+    return schema.model_validate(value).model_dump()
+
+def parse_structured(text: str, schema: Optional[type] = None) -> Tuple[Any, bool]:
+    """extract_json followed by validate"""
+    value, extracted = extract_json(text)
+    return validate(value, schema), extracted
+
+def repair_prompt(text: str, error: str, schema: Optional[type] = None) -> str:
+    """A short prompt asking for a broken response to be turned into valid JSON.
+
+    It carries only the broken output, the error and the expected shape, not
+    the original prompt, so it costs a fraction of the call it repairs.
+    """
+    if len(text) > MAX_REPAIR_CHARS:
+        text = text[:MAX_REPAIR_CHARS]
+    shape = "a single valid JSON value"
+    if schema is not None:
+        shape = f"a single JSON object matching this JSON schema:\n{json.dumps(schema.model_json_schema(), separators=(',', ':'))}"
+    return f"""Repair the following output so that it is {shape}
+
+Keep its content, fix only the structure. Reply with the JSON alone.
+
+Error: {error}
+
+Output:
+{text}"""
+
+class ParseStats:
+    """How often structured responses parsed directly, needed extraction or repair, or were lost"""
+
+    def __init__(self):
+        self.requests = 0
+        self.parsed = 0
+        self.extracted = 0
+        self.repaired = 0
+        self.failed = 0
+        self.repair_calls = 0
+
+    def record(self, outcome: str):
+        self.requests += 1
+        setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "parsed": self.parsed,
+            "extracted": self.extracted,
+            "repaired": self.repaired,
+            "failed": self.failed,
+            "repair_calls": self.repair_calls,
+            "failure_rate": self.failed / self.requests if self.requests else 0.0,
+            "repair_rate": self.repair_calls / self.requests if self.requests else 0.0
+        }
@@ -0,0 +1,179 @@
+import os
+import re
+import json
+import mmap
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_ROOT = os.path.join(os.path.expanduser("~"), ".cache", "paper_agent", "paper_text")
+
+_ID = r"(\d{4}\.\d{4,5}|[a-z][a-z\-]*(?:\.[A-Z]{2})?/\d{7})(v\d+)?"
+# Only arXiv abstract and PDF URLs, or a whole string that is an id: other
+# URLs, such as DOIs, can contain fragments that look like arXiv ids
+_ARXIV_URL = re.compile(
+    r"(?:https?://)?(?:[\w\-]+\.)*arxiv\.org/(?:abs|pdf)/" + _ID + r"(?:\.pdf)?/?(?:[?#]|$)", re.IGNORECASE
+)
+_ARXIV_ID = re.compile(r"(?:arxiv:)?" + _ID, re.IGNORECASE)
+
+def parse_arxiv_id(url_or_id: str) -> Optional[Tuple[str, str]]:
+    """Split an arXiv URL or id into (id, version); version is "" when unversioned"""
+    text = (url_or_id or "").strip()
+    match = _ARXIV_URL.match(text) or _ARXIV_ID.fullmatch(text)
+    if match is None:
+        return None
+    return match.group(1), match.group(2) or ""
+
+class PaperTextStore:
+    """Local store of text extracted from arXiv PDFs, keyed by arXiv id and version.
+
+    Entries are zlib-compressed files, except those over `mmap_threshold`
+    bytes of text, which are kept as plain UTF-8 so they can be memory-mapped
+    instead of read and inflated in full. A SQLite index tracks extraction
+    metadata and access times; the least recently used entries are deleted
+    once the files exceed `quota_bytes`.
+    """
+
+    def __init__(
+        self,
+        root: str = DEFAULT_STORE_ROOT,
+        quota_bytes: int = 1024 * 1024 * 1024,
+        mmap_threshold: int = 4 * 1024 * 1024
+    ):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.mmap_threshold = mmap_threshold
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "arxiv_id TEXT NOT NULL, version TEXT NOT NULL, filename TEXT NOT NULL, "
+            "compressed INTEGER NOT NULL, size INTEGER NOT NULL, metadata TEXT NOT NULL, "
+            "stored_at REAL NOT NULL, accessed_at REAL NOT NULL, "
+            "PRIMARY KEY (arxiv_id, version))"
+        )
+        self._conn.commit()
+
+    @classmethod
+    def from_env(cls) -> Optional["PaperTextStore"]:
+        """Build the store described by PAPER_AGENT_TEXT_STORE*, or None when disabled"""
+        root = os.getenv("PAPER_AGENT_TEXT_STORE", DEFAULT_STORE_ROOT)
+        if root.lower() in ("", "0", "off", "false", "none"):
+            return None
+        quota_mb = int(os.getenv("PAPER_AGENT_TEXT_STORE_QUOTA_MB", "1024"))
+        return cls(root, quota_bytes=quota_mb * 1024 * 1024)
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.root, filename)
+
+    def _lookup(self, arxiv_id: str, version: str):
+        return self._conn.execute(
+            "SELECT filename, compressed, metadata FROM entries WHERE arxiv_id = ? AND version = ?",
+            (arxiv_id, version)
+        ).fetchone()
+
+    def _touch(self, arxiv_id: str, version: str):
+        self._conn.execute(
+            "UPDATE entries SET accessed_at = ? WHERE arxiv_id = ? AND version = ?",
+            (time.time(), arxiv_id, version)
+        )
+        self._conn.commit()
+
+    def get(self, arxiv_id: str, version: str = "") -> Optional[str]:
+        """Return the stored text, or None if this paper has not been extracted"""
+        with self._lock:
+            row = self._lookup(arxiv_id, version)
+            if row is None or not os.path.exists(self._path(row[0])):
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touch(arxiv_id, version)
+        filename, compressed, _ = row
+        if compressed:
+            with open(self._path(filename), "rb") as f:
+                return zlib.decompress(f.read()).decode("utf-8")
+        with open(self._path(filename), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return ""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return mapped[:].decode("utf-8")
+
+    def open_mapped(self, arxiv_id: str, version: str = "") -> Optional[mmap.mmap]:
+        """Memory-map an uncompressed entry's UTF-8 bytes; None if absent or compressed"""
+        with self._lock:
+            row = self._lookup(arxiv_id, version)
+            if row is None or row[1]:
+                return None
+            self._touch(arxiv_id, version)
+        with open(self._path(row[0]), "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def metadata(self, arxiv_id: str, version: str = "") -> Optional[Dict[str, Any]]:
+        """Return the extraction metadata stored with an entry"""
+        with self._lock:
+            row = self._lookup(arxiv_id, version)
+        return json.loads(row[2]) if row is not None else None
+
+    def put(self, arxiv_id: str, version: str, text: str, metadata: Optional[Dict[str, Any]] = None):
+        """Store extracted text, then evict old entries beyond the disk quota"""
+        data = text.encode("utf-8")
+        compressed = len(data) <= self.mmap_threshold
+        if compressed:
+            data = zlib.compress(data, 6)
+        filename = re.sub(r"[^\w.\-]", "_", f"{arxiv_id}{version}") + (".txt.z" if compressed else ".txt")
+        path = self._path(filename)
+        # Write to a temporary file first so readers never see a partial entry
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        now = time.time()
+        metadata = dict(metadata or {}, text_length=len(text))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(arxiv_id, version, filename, compressed, size, metadata, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (arxiv_id, version, filename, int(compressed), len(data), json.dumps(metadata, default=str), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.quota_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT arxiv_id, version, filename, size FROM entries ORDER BY accessed_at"
+        ).fetchall()
+        for arxiv_id, version, filename, size in rows:
+            if total <= self.quota_bytes:
+                break
+            try:
+                os.remove(self._path(filename))
+            except FileNotFoundError:
+                pass
+            self._conn.execute("DELETE FROM entries WHERE arxiv_id = ? AND version = ?", (arxiv_id, version))
+            total -= size
+            logger.debug(f"Evicted stored text for arXiv {arxiv_id}{version}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current disk usage"""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
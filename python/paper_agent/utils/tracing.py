@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Span:
+    """One timed unit of work: a phase, an agent run or a single external call.
+
+    `start` is wall-clock seconds since the epoch; `duration` and
+    `queue_wait` are seconds. `queue_wait` is time spent waiting for a slot
+    (rate limiter, dependencies) before the work itself began.
+    """
+    name: str
+    kind: str
+    span_id: str
+    parent_id: Optional[str] = None
+    agent: Optional[str] = None
+    start: float = 0.0
+    duration: float = 0.0
+    queue_wait: float = 0.0
+    thread: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def set(self, **attributes: Any):
+        """Record attributes on the span"""
+        self.attributes.update(attributes)
+
+    def add(self, **counters: float):
+        """Increase numeric attributes, such as bytes or token counts"""
+        for key, value in counters.items():
+            self.attributes[key] = self.attributes.get(key, 0) + (value or 0)
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("paper_agent_span", default=None)
+
+class Tracer:
+    """Collects finished spans in memory, up to `max_spans` of the most recent.
+
+    Spans are only kept while the tracer is enabled, i.e. when something is
+    going to export them; otherwise they are still timed and handed to the
+    code that opened them, then dropped. Parent spans are tracked with a
+    context variable, so spans opened in tasks spawned by a span are nested
+    under it and inherit its agent.
+    """
+
+    def __init__(self, max_spans: int = 100000, enabled: bool = False):
+        self.spans: "deque[Span]" = deque(maxlen=max_spans)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+
+    def enable(self, enabled: bool = True):
+        """Start or stop keeping finished spans"""
+        self.enabled = enabled
+
+    @contextmanager
+    def span(self, name: str, kind: str, agent: Optional[str] = None, **attributes: Any) -> Iterator[Span]:
+        """Time the enclosed block as a span; exceptions are recorded and re-raised"""
+        parent = _current_span.get()
+        current = Span(
+            name=name,
+            kind=kind,
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent is not None else None,
+            agent=agent or (parent.agent if parent is not None else None),
+            start=time.time(),
+            thread=threading.get_ident(),
+            attributes=attributes
+        )
+        token = _current_span.set(current)
+        started = time.perf_counter()
+        try:
+            yield current
+        except GeneratorExit:
+            # A consumer that stops reading a stream early is not an error
+            raise
+        except BaseException as e:
+            current.error = f"{type(e).__name__}: {str(e)}"
+            raise
+        finally:
+            current.duration = time.perf_counter() - started
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # An async generator finalized from another context; nothing to restore
+                pass
+            if self.enabled:
+                with self._lock:
+                    self.spans.append(current)
+
+    def current(self) -> Optional[Span]:
+        """The innermost open span in this context"""
+        return _current_span.get()
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+    def snapshot(self) -> List[Span]:
+        with self._lock:
+            return list(self.spans)
+
+    def write_jsonl(self, path: str):
+        """Write one JSON object per span"""
+        with open(path, "w", encoding="utf-8") as f:
+            for span in self.snapshot():
+                f.write(json.dumps(asdict(span), default=str) + "\n")
+
+    def write_chrome_trace(self, path: str):
+        """Write spans in the Chrome trace-event format (chrome://tracing, Perfetto)"""
+        write_chrome_trace(self.snapshot(), path)
+
+_tracer = Tracer()
+
+def get_tracer() -> Tracer:
+    """The process-wide tracer"""
+    return _tracer
+
+def trace(name: str, kind: str, agent: Optional[str] = None, **attributes: Any):
+    """Shorthand for get_tracer().span(...)"""
+    return _tracer.span(name, kind, agent, **attributes)
+
+def load_jsonl(path: str) -> List[Span]:
+    """Read spans written by Tracer.write_jsonl"""
+    spans = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                spans.append(Span(**json.loads(line)))
+    return spans
+
+def write_chrome_trace(spans: Iterable[Span], path: str):
+    """Write spans as complete ("X") trace events, one track per agent"""
+    tracks: Dict[str, int] = {}
+    events = []
+    for span in spans:
+        track = span.agent or span.kind
+        tid = tracks.setdefault(track, len(tracks) + 1)
+        events.append({
+            "name": span.name,
+            "cat": span.kind,
+            "ph": "X",
+            "ts": span.start * 1e6,
+            "dur": span.duration * 1e6,
+            "pid": os.getpid(),
+            "tid": tid,
+            "args": dict(span.attributes, queue_wait=span.queue_wait, error=span.error)
+        })
+    events.extend(
+        {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": track}}
+        for track, tid in tracks.items()
+    )
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+def _percentile(values: List[float], percentile: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    # Nearest-rank, so p95 of a handful of calls is one of the observed values
+    rank = max(1, int(-(-percentile * len(ordered) // 100)))
+    return ordered[rank - 1]
+
+def summarize(spans: Iterable[Span]) -> List[Dict[str, Any]]:
+    """Latency percentiles and token totals per (agent, kind)"""
+    groups: Dict[tuple, List[Span]] = {}
+    for span in spans:
+        groups.setdefault((span.agent or "-", span.kind), []).append(span)
+    rows = []
+    for (agent, kind), members in sorted(groups.items()):
+        durations = [span.duration for span in members]
+        rows.append({
+            "agent": agent,
+            "kind": kind,
+            "count": len(members),
+            "errors": sum(1 for span in members if span.error),
+            "cache_hits": sum(1 for span in members if span.attributes.get("cache_hit")),
+            "p50": _percentile(durations, 50),
+            "p95": _percentile(durations, 95),
+            "queue_wait": sum(span.queue_wait for span in members),
+            "prompt_tokens": sum(span.attributes.get("prompt_tokens", 0) or 0 for span in members),
+            "completion_tokens": sum(span.attributes.get("completion_tokens", 0) or 0 for span in members),
+            "bytes": sum(
+                (span.attributes.get("bytes_sent", 0) or 0) + (span.attributes.get("bytes_received", 0) or 0)
+                for span in members
+            )
+        })
+    return rows
+
+def format_summary(rows: List[Dict[str, Any]]) -> str:
+    """Render summarize() rows as a fixed-width table"""
+    header = f"{'agent':<20} {'kind':<10} {'count':>6} {'err':>4} {'hits':>5} {'p50 s':>8} {'p95 s':>8} {'wait s':>8} {'prompt tok':>11} {'compl tok':>10} {'bytes':>12}"
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        lines.append(
+            f"{row['agent'][:20]:<20} {row['kind'][:10]:<10} {row['count']:>6} {row['errors']:>4} {row['cache_hits']:>5} "
+            f"{row['p50']:>8.3f} {row['p95']:>8.3f} {row['queue_wait']:>8.2f} "
+            f"{row['prompt_tokens']:>11} {row['completion_tokens']:>10} {row['bytes']:>12}"
+        )
+    llm = [row for row in rows if row["kind"] == "llm"]
+    lines.append(
+        f"Total tokens: {sum(row['prompt_tokens'] for row in llm)} prompt, "
+        f"{sum(row['completion_tokens'] for row in llm)} completion"
+    )
+    return "\n".join(lines)
@@ -0,0 +1,249 @@
+import os
+import time
+import signal
+import socket
+import asyncio
+import logging
+import multiprocessing
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+from .batch import BatchJob, BatchRunner
+from .models.paper_metadata import PaperMetadata
+from .utils.job_queue import JobQueue, QueuedJob
+from .utils.pdf_text import shutdown_extraction_pool
+
+logger = logging.getLogger(__name__)
+
+# Exit code of a worker that cannot start at all (bad configuration); it is not restarted
+EXIT_FATAL = 2
+
+@dataclass
+class WorkerConfig:
+    """Settings shared by every worker process; plain values so it pickles for spawn"""
+    queue_path: str
+    jobs: int = 2
+    max_in_flight: Optional[int] = None
+    lease_seconds: float = 120.0
+    poll_interval: float = 1.0
+    retry_delay: float = 30.0
+    drain: bool = False
+    result_fields: Optional[List[str]] = None
+    checkpoint_root: Optional[str] = None
+    fused_review: Optional[bool] = None
+
+class Worker:
+    """Pulls jobs from the queue and runs up to `jobs` pipelines at once in this process.
+
+    While a job runs its lease is renewed every quarter of `lease_seconds`;
+    if the lease is lost the job is cancelled here, since another worker may
+    already have picked it up. A retried job resumes from the checkpoints
+    of its earlier attempts.
+    """
+
+    def __init__(self, config: WorkerConfig, owner: Optional[str] = None):
+        self.config = config
+        self.owner = owner or worker_name(os.getpid())
+        self.queue = JobQueue.from_env(config.queue_path)
+        self.runner = BatchRunner(
+            max_in_flight=config.max_in_flight,
+            result_fields=config.result_fields,
+            checkpoint_root=config.checkpoint_root,
+            fused_review=config.fused_review
+        )
+        # Shared by every job in this process; built here so a bad configuration fails at startup
+        self.deepseek, self.text_store = self.runner.open_clients()
+        self._stopping: Optional[asyncio.Event] = None
+
+    def stop(self):
+        """Stop leasing new jobs and hand running ones back to the queue"""
+        logger.info(f"Worker {self.owner} stopping")
+        if self._stopping is not None:
+            self._stopping.set()
+
+    async def _call(self, function, *args):
+        # SQLite may wait on another process's write lock; keep heartbeats of other jobs running meanwhile
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    async def _heartbeat(self, job: QueuedJob, task: "asyncio.Task"):
+        interval = self.config.lease_seconds / 4
+        while True:
+            await asyncio.sleep(interval)
+            if not await self._call(self.queue.heartbeat, job, self.config.lease_seconds):
+                logger.error(f"Worker {self.owner} lost the lease on job {job.job_id}, cancelling it")
+                task.cancel()
+                return
+
+    async def process(self, job: QueuedJob):
+        """Run one leased job and ack, fail or release it"""
+        logger.info(f"Worker {self.owner} running job {job.job_id} (attempt {job.attempts}/{job.max_attempts})")
+        try:
+            batch_job = BatchJob(job.id, job.job_id, metadata=PaperMetadata(**job.payload))
+        except TypeError as e:
+            batch_job = BatchJob(job.id, job.job_id, error=f"Invalid payload for job {job.job_id}: {str(e)}")
+        task = asyncio.ensure_future(self.runner.execute(
+            batch_job, self.deepseek, self.text_store,
+            resume=job.attempts > 1,
+            # The queue id is unique even when the same job id was enqueued twice
+            run_id=f"queue-{job.id}"
+        ))
+        heartbeat = asyncio.ensure_future(self._heartbeat(job, task))
+        try:
+            record = await task
+        except asyncio.CancelledError:
+            if heartbeat.done() and not heartbeat.cancelled():
+                # The lease was lost; whoever holds it now owns the job
+                return
+            # Shutting down: hand the job back for another worker
+            await self._call(self.queue.release, job)
+            raise
+        finally:
+            heartbeat.cancel()
+        if record["status"] == "ok":
+            await self._call(self.queue.ack, job, record["result"])
+        else:
+            # Back off more with every attempt, so a struggling API is not hammered
+            delay = self.config.retry_delay * 2 ** (job.attempts - 1)
+            await self._call(self.queue.fail, job, record["error"], delay, record["status"] != "invalid")
+
+    async def _slot(self):
+        while not self._stopping.is_set():
+            job = await self._call(self.queue.lease, self.owner, self.config.lease_seconds)
+            if job is None:
+                if self.config.drain and await self._call(self.queue.pending) == 0:
+                    return
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.config.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            stop = asyncio.ensure_future(self._stopping.wait())
+            run = asyncio.ensure_future(self.process(job))
+            await asyncio.wait([stop, run], return_when=asyncio.FIRST_COMPLETED)
+            stop.cancel()
+            if not run.done():
+                run.cancel()
+            try:
+                await run
+            except asyncio.CancelledError:
+                if not self._stopping.is_set():
+                    raise
+            except Exception as e:
+                # Queue errors are left to lease expiry; the job will come back
+                logger.error(f"Worker {self.owner} could not finish job {job.job_id}: {str(e)}")
+
+    async def run(self):
+        """Work until stopped, or with `drain` until no job is queued or running"""
+        self._stopping = asyncio.Event()
+        try:
+            await asyncio.gather(*(self._slot() for _ in range(max(1, self.config.jobs))))
+        finally:
+            await self.deepseek.close()
+            self.queue.close()
+            logger.info(f"Worker {self.owner} structured output stats: {self.deepseek.parse_stats.stats()}")
+
+def worker_name(pid: int) -> str:
+    return f"{socket.gethostname()}:{pid}"
+
+def run_worker_process(config: WorkerConfig, log_level: int = logging.INFO):
+    """Entry point of one worker process"""
+    logging.basicConfig(level=log_level, format='%(asctime)s - %(process)d - %(name)s - %(levelname)s - %(message)s')
+    # Ctrl-C reaches the whole process group; the supervisor decides when workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        worker = Worker(config)
+    except Exception as e:
+        logger.error(f"Worker could not start: {str(e)}")
+        raise SystemExit(EXIT_FATAL)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGTERM, worker.stop)
+        await worker.run()
+
+    try:
+        asyncio.run(main())
+    finally:
+        # multiprocessing joins a child's own children before atexit runs, so the
+        # PDF pool has to be stopped here or the worker never exits
+        shutdown_extraction_pool()
+
+class WorkerPool:
+    """Keeps `processes` worker processes running against one queue.
+
+    A worker that dies is replaced and the leases it held are recovered at
+    once instead of waiting for them to expire. Workers are started with
+    the spawn method, so each gets a fresh interpreter and event loop.
+    """
+
+    def __init__(self, config: WorkerConfig, processes: int = 2, restart_delay: float = 1.0):
+        self.config = config
+        self.processes = max(1, processes)
+        self.restart_delay = restart_delay
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: Dict[int, Any] = {}
+        self._stopping = False
+
+    def _start(self, slot: int):
+        process = self._context.Process(
+            target=run_worker_process,
+            args=(self.config, logging.getLogger().getEffectiveLevel()),
+            name=f"paper-agent-worker-{slot}"
+        )
+        process.start()
+        self._workers[slot] = process
+        logger.info(f"Started worker {process.pid} in slot {slot}")
+
+    def stop(self, *_):
+        self._stopping = True
+        for process in self._workers.values():
+            if process.is_alive():
+                process.terminate()
+
+    def run(self) -> int:
+        """Supervise the workers until they all exit; returns non-zero if any could not start"""
+        queue = JobQueue.from_env(self.config.queue_path)
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        fatal = False
+        try:
+            for slot in range(self.processes):
+                self._start(slot)
+            while self._workers:
+                time.sleep(self.config.poll_interval)
+                for slot, process in list(self._workers.items()):
+                    if process.is_alive():
+                        continue
+                    process.join()
+                    del self._workers[slot]
+                    recovered = queue.recover_owner(worker_name(process.pid))
+                    if process.exitcode == 0 or self._stopping:
+                        continue
+                    if process.exitcode == EXIT_FATAL:
+                        fatal = True
+                        continue
+                    logger.error(
+                        f"Worker {process.pid} exited with code {process.exitcode}, "
+                        f"recovered {recovered} jobs; restarting it"
+                    )
+                    time.sleep(self.restart_delay)
+                    self._start(slot)
+                # Catch leases left behind by workers on other machines or from earlier runs
+                queue.recover_expired()
+        finally:
+            self.stop()
+            for process in self._workers.values():
+                process.join()
+            queue.close()
+        logger.info(f"Workers finished, queue: {queue_summary(self.config.queue_path)}")
+        return 1 if fatal else 0
+
+def queue_summary(path: str) -> Dict[str, int]:
+    queue = JobQueue.from_env(path)
+    try:
+        return queue.stats()
+    finally:
+        queue.close()
+
+def job_payload(metadata: PaperMetadata) -> Dict[str, Any]:
+    """The queue payload describing a paper"""
+    return asdict(metadata)
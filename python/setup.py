@@ -9,6 +9,8 @@ setup(
         "arxiv",
         "scholarly",
         "pydantic",
+        "numpy",
+        "scipy",
         "python-dotenv",
     ],
     python_requires=">=3.8",
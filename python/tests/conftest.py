@@ -0,0 +1,31 @@
+from contextlib import asynccontextmanager
+import pytest
+from benchmarks.mock_server import MockConfig, MockServer
+from paper_agent.agents.web_crawler import WebCrawlerAgent
+
+@pytest.fixture
+def mock_server(monkeypatch):
+    """Async context manager serving the local mock DeepSeek and arXiv endpoints.
+
+    Inside it the pipeline talks to the mock and stays off the shared LLM
+    cache, text store and checkpoint directories.
+    """
+
+    @asynccontextmanager
+    async def serve(**config):
+        server = MockServer(MockConfig(**{"papers": 4, "sections": 3, "section_words": 80, "pdf_pages": 1, **config}))
+        base_url = await server.start()
+        monkeypatch.setenv("NEXT_PUBLIC_DEEPSEEK_API_KEY", "mock-key")
+        monkeypatch.setenv("PAPER_AGENT_DEEPSEEK_URL", f"{base_url}/v1")
+        monkeypatch.setenv("PAPER_AGENT_LLM_CACHE", "off")
+        monkeypatch.setenv("PAPER_AGENT_TEXT_STORE", "off")
+        monkeypatch.setenv("PAPER_AGENT_CHECKPOINTS", "off")
+        monkeypatch.setattr(WebCrawlerAgent, "sources", ["arXiv"])
+        monkeypatch.setattr(WebCrawlerAgent, "max_results", server.config.papers)
+        monkeypatch.setattr(WebCrawlerAgent, "arxiv_url", f"{base_url}/api/query")
+        try:
+            yield server
+        finally:
+            await server.stop()
+
+    return serve
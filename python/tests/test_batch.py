@@ -0,0 +1,9 @@
+from paper_agent.batch import DEFAULT_MAX_IN_FLIGHT, BatchRunner
+
+def test_llm_concurrency_is_capped_by_default(monkeypatch):
+    monkeypatch.delenv("PAPER_AGENT_LLM_MAX_IN_FLIGHT", raising=False)
+    assert BatchRunner().max_in_flight == DEFAULT_MAX_IN_FLIGHT
+    monkeypatch.setenv("PAPER_AGENT_LLM_MAX_IN_FLIGHT", "3")
+    assert BatchRunner().max_in_flight == 3
+    # The command line flag wins over the environment
+    assert BatchRunner(max_in_flight=16).max_in_flight == 16
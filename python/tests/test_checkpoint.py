@@ -0,0 +1,42 @@
+import os
+from paper_agent.utils.checkpoint import CheckpointStore, fingerprint
+
+def test_round_trip(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    store.save("content_generation", {"sections": {"Intro": "text"}}, "inputs")
+    assert CheckpointStore(str(tmp_path)).load("content_generation") == {
+        "delta": {"sections": {"Intro": "text"}},
+        "inputs": "inputs"
+    }
+    assert store.load("formatting") is None
+
+def test_corrupt_or_missing_files_are_not_trusted(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    store.save("a", {"value": 1}, "inputs")
+    store.save("b", {"value": 2}, "inputs")
+    with open(os.path.join(str(tmp_path), store.steps()["a"]["file"]), "r+b") as f:
+        f.write(b"garbage")
+    os.remove(os.path.join(str(tmp_path), store.steps()["b"]["file"]))
+    assert store.load("a") is None
+    assert store.load("b") is None
+
+def test_clear_removes_every_step(tmp_path):
+    store = CheckpointStore(str(tmp_path / "run"))
+    store.save("a", {"value": 1}, "inputs")
+    store.clear()
+    assert store.steps() == {}
+
+def test_fingerprint_covers_only_the_given_keys():
+    context = {"title": "T", "sections": {"Intro": "text"}}
+    assert fingerprint(context, {"title"}) == fingerprint(dict(context, sections={}), {"title"})
+    assert fingerprint(context, {"sections"}) != fingerprint(dict(context, sections={}), {"sections"})
+
+def test_for_run_is_opt_in_and_keyed_by_run_id(monkeypatch, tmp_path):
+    context = {"title": "T", "authors": [], "keywords": []}
+    monkeypatch.delenv("PAPER_AGENT_CHECKPOINTS", raising=False)
+    assert CheckpointStore.for_run(context) is None
+    root = str(tmp_path)
+    first = CheckpointStore.for_run(context, root, run_id="1")
+    second = CheckpointStore.for_run(context, root, run_id="2")
+    assert first.directory != second.directory
+    assert CheckpointStore.for_run(context, root, run_id="1").directory == first.directory
@@ -0,0 +1,18 @@
+from paper_agent.utils.dedup import deduplicate_papers
+
+ABSTRACT = (
+    "We study how language model agents delegate subtasks to specialist tools and how an "
+    "orchestrator verifies their answers before combining them into a final response"
+)
+
+def test_dedup_merges_arxiv_versions_titles_and_near_duplicate_abstracts():
+    records = [
+        {"title": "Delegating Agents", "pdf_url": "http://arxiv.org/pdf/2401.00001v1", "summary": ABSTRACT, "source": "arXiv"},
+        {"title": "Delegating agents.", "url": "https://scholar.example/x", "abstract": ABSTRACT, "source": "Google Scholar"},
+        {"title": "Delegating Agents (v2)", "pdf_url": "http://arxiv.org/pdf/2401.00001v2", "source": "arXiv"},
+        {"title": "Orchestration at scale", "abstract": ABSTRACT.replace("final response", "final answer"), "source": "Google Scholar"},
+        {"title": "Something unrelated", "abstract": "Auctions with budget constrained bidders and reserve prices", "source": "Google Scholar"}
+    ]
+    merged = deduplicate_papers(records)
+    assert len(merged) == 2
+    assert merged[0]["pdf_url"].endswith("v2")
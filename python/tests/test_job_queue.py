@@ -0,0 +1,66 @@
+import time
+from paper_agent.utils.job_queue import DONE, FAILED, LEASED, QUEUED, JobQueue
+
+def make_queue(tmp_path, **kwargs) -> JobQueue:
+    return JobQueue(str(tmp_path / "jobs.sqlite"), **kwargs)
+
+def test_lease_and_ack(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue({"title": "A"}, job_id="a")
+    job = queue.lease("worker-1", 60)
+    assert (job.job_id, job.payload, job.attempts) == ("a", {"title": "A"}, 1)
+    assert queue.lease("worker-2", 60) is None
+    assert queue.ack(job, {"ok": True})
+    assert queue.stats()[DONE] == 1
+    assert list(queue.results())[0]["result"] == {"ok": True}
+
+def test_jobs_are_leased_once_across_connections(tmp_path):
+    first, second = make_queue(tmp_path), make_queue(tmp_path)
+    first.enqueue_many([(None, {"n": n}) for n in range(5)])
+    leased = [first.lease("w1", 60), second.lease("w2", 60), first.lease("w1", 60), second.lease("w2", 60)]
+    assert len({job.id for job in leased}) == 4
+    assert first.stats()[LEASED] == 4 and first.stats()[QUEUED] == 1
+
+def test_expired_lease_is_recovered_and_the_old_holder_loses_it(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue({"title": "A"})
+    stale = queue.lease("worker-1", 0.01)
+    time.sleep(0.05)
+    current = queue.lease("worker-2", 60)
+    assert current.id == stale.id and current.attempts == 2
+    assert not queue.heartbeat(stale, 60)
+    assert not queue.ack(stale, {})
+    assert queue.ack(current, {})
+
+def test_failed_jobs_are_retried_until_out_of_attempts(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2)
+    queue.enqueue({"title": "A"})
+    job = queue.lease("w", 60)
+    assert queue.fail(job, "boom")
+    assert queue.stats()[QUEUED] == 1
+    job = queue.lease("w", 60)
+    assert queue.fail(job, "boom again")
+    assert queue.stats()[FAILED] == 1
+    assert list(queue.results())[0]["error"] == "boom again"
+
+def test_retry_delay_and_no_retry(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue({"title": "A"})
+    queue.enqueue({"title": "B"})
+    queue.fail(queue.lease("w", 60), "later", retry_delay=60)
+    queue.fail(queue.lease("w", 60), "invalid", retry=False)
+    assert queue.lease("w", 60) is None
+    assert queue.stats() == {QUEUED: 1, LEASED: 0, DONE: 0, FAILED: 1}
+
+def test_release_does_not_charge_an_attempt(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue({"title": "A"})
+    assert queue.release(queue.lease("w", 60))
+    assert queue.lease("w", 60).attempts == 1
+
+def test_recover_owner(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue({"title": "A"})
+    queue.lease("crashed", 600)
+    assert queue.recover_owner("crashed") == 1
+    assert queue.lease("other", 60) is not None
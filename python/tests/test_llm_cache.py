@@ -0,0 +1,97 @@
+import json
+import sqlite3
+import pytest
+from paper_agent.utils.deepseek_client import DeepSeekClient
+from paper_agent.utils.llm_cache import CacheMissError, LLMCache
+
+MESSAGES = [{"role": "user", "content": "Say hello"}]
+
+def response(text: str):
+    return {"choices": [{"index": 0, "message": {"role": "assistant", "content": text}}]}
+
+def test_key_depends_on_model_messages_and_params():
+    key = LLMCache.make_key("deepseek-chat", MESSAGES, {"temperature": 0})
+    assert key == LLMCache.make_key("deepseek-chat", [dict(MESSAGES[0])], {"temperature": 0})
+    assert key != LLMCache.make_key("deepseek-reasoner", MESSAGES, {"temperature": 0})
+    assert key != LLMCache.make_key("deepseek-chat", MESSAGES, {"temperature": 1})
+
+def test_hit_and_miss(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.sqlite"))
+    assert cache.get("a") is None
+    cache.put("a", response("hello"))
+    assert cache.get("a") == response("hello")
+    assert (cache.hits, cache.misses, cache.stores) == (1, 1, 1)
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.sqlite"), ttl=60)
+    cache.put("a", response("hello"))
+    cache.ttl = -1
+    assert cache.get("a") is None
+    cache.ttl = 60
+    assert cache.get("a") is None
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    entry = response("x" * 100)
+    # Room for two entries, not three
+    cache = LLMCache(str(tmp_path / "cache.sqlite"), max_bytes=len(json.dumps(entry)) * 5 // 2)
+    cache.put("a", entry)
+    cache.put("b", entry)
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a") is not None
+    cache.put("c", entry)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.evictions == 1
+
+def test_replay_is_read_only_and_raises_on_miss(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    LLMCache(path).put("a", response("hello"))
+    replay = LLMCache(path, replay=True)
+    assert replay.get("a") == response("hello")
+    replay.put("b", response("ignored"))
+    with pytest.raises(CacheMissError):
+        replay.get("b")
+
+@pytest.mark.asyncio
+async def test_client_answers_repeated_requests_from_the_cache(mock_server, tmp_path):
+    async with mock_server() as server:
+        deepseek = DeepSeekClient(cache=LLMCache(str(tmp_path / "cache.sqlite")))
+        try:
+            first = await deepseek.generate_text("Generate a detailed outline for a paper")
+            second = await deepseek.generate_text("Generate a detailed outline for a paper")
+        finally:
+            await deepseek.close()
+    assert first == second
+    assert server.stats.chat_calls == 1
+
+def test_running_size_follows_inserts_overwrites_and_evictions(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = LLMCache(path, max_bytes=10 ** 6)
+    cache.put("a", response("x" * 100))
+    cache.put("b", response("y" * 10))
+    cache.put("a", response("z"))
+    summed = cache._conn.execute("SELECT SUM(size) FROM responses").fetchone()[0]
+    assert cache.stats()["bytes"] == summed
+    cache.max_bytes = 1
+    cache.put("c", response("w"))
+    assert cache.stats()["bytes"] == 0
+    # A second handle on the same file sees the same total
+    assert LLMCache(path).stats()["bytes"] == 0
+
+def test_locked_cache_is_skipped_rather_than_failing(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = LLMCache(path, timeout=0.05)
+    cache.put("a", response("hello"))
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        cache.put("b", response("lost"))
+        # Readers are not blocked by the other writer, only the access time update is skipped
+        assert cache.get("a") == response("hello")
+        assert cache.get("b") is None
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+    assert cache.stores == 1
+    assert cache.errors == 2
@@ -0,0 +1,17 @@
+from paper_agent.utils.overlap import OverlapIndex
+
+ABSTRACT = (
+    "We study how language model agents delegate subtasks to specialist tools and how an "
+    "orchestrator verifies their answers before combining them into a final response"
+)
+
+def test_overlap_index_finds_copied_passages_and_counts_citations():
+    index = OverlapIndex([{"title": "Delegating Agents", "abstract": ABSTRACT}], ngram_size=5)
+    copied = "As shown before, language model agents delegate subtasks to specialist tools and how an orchestrator works."
+    uncited = index.check(copied, citations=[])
+    assert uncited["overlap_coverage"] > 0
+    assert uncited["sources"][0]["title"] == "Delegating Agents"
+    assert uncited["potential_issues"][0]["text"].startswith("language model agents delegate")
+    cited = index.check(copied, citations=["Delegating Agents"])
+    assert cited["citation_coverage"] > uncited["citation_coverage"]
+    assert index.check("Entirely original words about auctions and prices here.")["overlap_coverage"] == 0.0
@@ -0,0 +1,42 @@
+import pytest
+from paper_agent.models.paper_metadata import PaperMetadata
+from paper_agent.network import AgentNetwork
+from paper_agent.utils.checkpoint import CheckpointStore
+
+def llm_calls(server) -> int:
+    return server.stats.chat_calls + server.stats.stream_calls
+
+def metadata() -> PaperMetadata:
+    return PaperMetadata(title="Resuming Agent Pipelines", authors=["Tester"], keywords=["checkpoints"])
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fused_review", [False, True])
+async def test_resume_after_complete_run_sends_no_llm_calls(mock_server, tmp_path, fused_review):
+    store = str(tmp_path / "checkpoints")
+    async with mock_server() as server:
+        first = AgentNetwork(metadata(), checkpoints=CheckpointStore(store), fused_review=fused_review)
+        expected = await first.execute_pipeline()
+        calls, queries = llm_calls(server), server.stats.arxiv_queries
+        assert calls > 0
+
+        second = AgentNetwork(metadata(), checkpoints=CheckpointStore(store), fused_review=fused_review)
+        assert sorted(second.restore_checkpoints()) == sorted(second.agents)
+
+        third = AgentNetwork(metadata(), checkpoints=CheckpointStore(store), fused_review=fused_review)
+        resumed = await third.execute_pipeline(resume=True)
+        assert llm_calls(server) == calls
+        assert server.stats.arxiv_queries == queries
+    assert resumed["sections"] == expected["sections"]
+    assert resumed["formatted_sections"] == expected["formatted_sections"]
+
+@pytest.mark.asyncio
+async def test_resume_reruns_steps_whose_inputs_changed(mock_server, tmp_path):
+    store = str(tmp_path / "checkpoints")
+    async with mock_server():
+        await AgentNetwork(metadata(), checkpoints=CheckpointStore(store)).execute_pipeline()
+
+    network = AgentNetwork(metadata(), checkpoints=CheckpointStore(store))
+    network.context["keywords"] = ["something else"]
+    completed = network.restore_checkpoints()
+    # The crawler searches by keyword, so it and everything after it is stale
+    assert "web_crawler" not in completed
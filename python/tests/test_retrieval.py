@@ -0,0 +1,17 @@
+from paper_agent.utils.retrieval import RetrievalIndex
+
+ABSTRACT = (
+    "We study how language model agents delegate subtasks to specialist tools and how an "
+    "orchestrator verifies their answers before combining them into a final response"
+)
+
+def test_bm25_ranks_the_matching_passage_first():
+    index = RetrievalIndex.from_papers([
+        {"title": "Agents", "abstract": ABSTRACT},
+        {"title": "Auctions", "abstract": "Budget constrained bidders in repeated auctions with reserve prices"},
+        {"title": "Tools", "abstract": "Specialist tools for retrieval and calculation"}
+    ])
+    results = index.search("orchestrator verifies delegate answers", k=2)
+    assert results[0]["title"] == "Agents"
+    assert all(result["title"] != "Auctions" for result in results)
+    assert index.search("nothing matches zyzzyva") == []
@@ -0,0 +1,59 @@
+import pytest
+from paper_agent.agents.quality_control import QualityControlAgent
+from paper_agent.agents.combined_review import CombinedReviewAgent
+from paper_agent.agents.expert_review import ExpertReviewAgent
+from paper_agent.agents.formatting import FormattingAgent
+from paper_agent.utils.deepseek_client import DeepSeekClient
+
+# Callers may pass sections as {content, citations} dicts rather than plain text
+SECTIONS = {
+    "Introduction": {"content": "In practice agents delegate tasks to specialist tools and check their answers.", "citations": []},
+    "Conclusion": "Orchestration improves reliability."
+}
+PAPERS = [{"title": "A paper", "abstract": "Many systems show that agents delegate tasks to specialist tools and check their answers carefully."}]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("agent_class", [QualityControlAgent, CombinedReviewAgent])
+async def test_review_accepts_dict_sections(mock_server, agent_class):
+    async with mock_server():
+        deepseek = DeepSeekClient()
+        try:
+            agent = agent_class("Reviewer", deepseek)
+            result = await agent.execute({"sections": SECTIONS, "citations": [], "academic_papers": PAPERS})
+        finally:
+            await deepseek.close()
+    assert set(result["grammar_check"]) == set(SECTIONS)
+    assert set(result["plagiarism_check"]) == set(SECTIONS)
+    assert result["plagiarism_check"]["Introduction"]["overlap_coverage"] > 0
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("agent_class, field", [(ExpertReviewAgent, "technical_accuracy"), (FormattingAgent, "formatted_sections")])
+async def test_review_and_formatting_send_dict_sections_as_text(mock_server, agent_class, field):
+    async with mock_server() as server:
+        deepseek = DeepSeekClient()
+        try:
+            agent = agent_class("Reviewer", deepseek)
+            result = await agent.execute({"sections": SECTIONS})
+        finally:
+            await deepseek.close()
+    assert set(result[field]) == set(SECTIONS)
+    assert server.stats.injected_errors == 0
+    if agent_class is FormattingAgent:
+        # The mock echoes the formatted text, which must be the content rather than the dict
+        assert result[field]["Introduction"]["formatted_content"] == SECTIONS["Introduction"]["content"]
+
+@pytest.mark.asyncio
+async def test_invalid_combined_review_falls_back_without_a_repair_call(mock_server, monkeypatch):
+    async with mock_server() as server:
+        reply = server.reply
+        monkeypatch.setattr(server, "reply", lambda kind, prompt: '{"grammar": {}}' if kind == "combined_review" else reply(kind, prompt))
+        deepseek = DeepSeekClient()
+        try:
+            agent = CombinedReviewAgent("Reviewer", deepseek)
+            result = await agent.execute({"sections": {"Conclusion": "Orchestration improves reliability."}})
+        finally:
+            await deepseek.close()
+    assert server.stats.calls_by_kind == {"combined_review": 1, "grammar": 1, "technical": 1}
+    assert result["grammar_check"]["Conclusion"]["overall_quality"] == 8
+    assert result["technical_accuracy"]["Conclusion"]["confidence_score"] == 7
+    assert deepseek.parse_stats.stats()["repair_calls"] == 0
@@ -0,0 +1,54 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from paper_agent.agents.base import Agent
+from paper_agent.scheduler import AgentScheduler
+
+class StubAgent(Agent):
+    """Writes fixed values after a short delay, recording what it saw"""
+
+    def __init__(self, name, reads, writes, delay=0.0):
+        super().__init__(name, deepseek=SimpleNamespace(transport=None))
+        self.reads = frozenset(reads)
+        self.writes = frozenset(writes)
+        self.delay = delay
+        self.seen = None
+
+    async def execute(self, context):
+        self.seen = dict(context)
+        await asyncio.sleep(self.delay)
+        return {key: f"{self.name}:{key}" for key in self.writes}
+
+def agents():
+    return {
+        "crawl": StubAgent("crawl", {"title"}, {"papers"}),
+        "topics": StubAgent("topics", {"papers"}, {"topics"}),
+        "write": StubAgent("write", {"topics", "papers"}, {"sections"}),
+        "grammar": StubAgent("grammar", {"sections"}, {"grammar"}, delay=0.2),
+        "review": StubAgent("review", {"sections"}, {"review"}, delay=0.2),
+        "format": StubAgent("format", {"sections", "grammar", "review"}, {"formatted"})
+    }
+
+def test_plan_groups_independent_agents():
+    scheduler = AgentScheduler(agents())
+    assert scheduler.plan() == [["crawl"], ["topics"], ["write"], ["grammar", "review"], ["format"]]
+    assert scheduler.plan(["grammar", "review", "format"]) == [["grammar", "review"], ["format"]]
+
+@pytest.mark.asyncio
+async def test_run_merges_outputs_before_dependents_start():
+    stubs = agents()
+    completed = []
+    context = await AgentScheduler(stubs).run({"title": "T"}, on_complete=lambda name, result: completed.append(name))
+    assert context["formatted"] == "format:formatted"
+    assert stubs["format"].seen["grammar"] == "grammar:grammar"
+    assert stubs["format"].seen["review"] == "review:review"
+    assert completed.index("format") == len(completed) - 1
+    # Siblings each get their own snapshot, without the other's output
+    assert "review" not in stubs["grammar"].seen and "grammar" not in stubs["review"].seen
+
+@pytest.mark.asyncio
+async def test_independent_agents_run_concurrently():
+    stubs = agents()
+    started = asyncio.get_running_loop().time()
+    await AgentScheduler(stubs).run({"title": "T"}, ["grammar", "review"])
+    assert asyncio.get_running_loop().time() - started < 0.35
@@ -0,0 +1,51 @@
+import pytest
+from paper_agent.models.paper_metadata import PaperMetadata
+from paper_agent.network import AgentNetwork
+from paper_agent.utils.checkpoint import CheckpointStore
+
+def metadata() -> PaperMetadata:
+    return PaperMetadata(title="Failing Sections", authors=["Tester"], keywords=["errors"])
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fused_review", [False, True])
+async def test_failed_section_is_marked_skipped_and_retried_on_resume(mock_server, tmp_path, fused_review):
+    store = str(tmp_path / "checkpoints")
+    async with mock_server(reject_prompts=("Write the Section 2 section",)) as server:
+        network = AgentNetwork(metadata(), checkpoints=CheckpointStore(store), fused_review=fused_review)
+        context = await network.execute_pipeline()
+        assert list(context["formatted_sections"]) == ["Section 1", "Section 2", "Section 3"]
+        assert set(context["section_errors"]) == {"Section 2"}
+        assert set(context["formatting_errors"]) == {"Section 2"}
+        assert set(context["review_errors"]) == {"Section 2"}
+        assert context["document_structure"] == "Incomplete"
+        # The placeholder is not sent for review or formatting
+        reviews = server.stats.calls_by_kind.get("combined_review" if fused_review else "technical", 0)
+        assert reviews == 2
+        assert server.stats.calls_by_kind["format"] == 2
+
+        server.config.reject_prompts = ()
+        before = dict(server.stats.calls_by_kind)
+        resumed = await AgentNetwork(
+            metadata(), checkpoints=CheckpointStore(store), fused_review=fused_review
+        ).execute_pipeline(resume=True)
+        calls = {kind: count - before.get(kind, 0) for kind, count in server.stats.calls_by_kind.items()}
+    # Only the lost section is written, reviewed and formatted again
+    assert calls.get("outline", 0) == 0
+    assert calls["section"] == 1
+    assert calls["format"] == 1
+    assert calls["combined_review" if fused_review else "technical"] == 1
+    assert resumed["section_errors"] == {}
+    assert resumed["formatting_errors"] == {}
+    assert resumed["document_structure"] == "Finalized"
+    assert resumed["sections"]["Section 1"] == context["sections"]["Section 1"]
+    assert not resumed["sections"]["Section 2"].startswith("[Section could not be generated")
+
+@pytest.mark.asyncio
+async def test_failed_formatting_keeps_the_section_text(mock_server):
+    async with mock_server(sections=2, reject_prompts=("Format the following content",)):
+        context = await AgentNetwork(metadata(), checkpoints=None).execute_pipeline()
+    assert list(context["formatted_sections"]) == ["Section 1", "Section 2"]
+    assert set(context["formatting_errors"]) == {"Section 1", "Section 2"}
+    assert context["formatting_fingerprints"] == {}
+    assert context["formatted_sections"]["Section 1"]["formatted_content"] == context["sections"]["Section 1"]
+    assert context["document_structure"] == "Incomplete"
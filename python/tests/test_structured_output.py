@@ -0,0 +1,90 @@
+import pytest
+from paper_agent.models.review_result import GrammarCheck
+from paper_agent.utils.deepseek_client import DeepSeekClient
+from paper_agent.utils.llm_cache import LLMCache
+from paper_agent.utils.structured_output import extract_json, parse_structured, repair_prompt
+
+GRAMMAR_PROMPT = "Check the following text for grammar, style, and academic writing standards: text"
+
+@pytest.mark.parametrize("text, expected, extracted", [
+    ('{"a": 1}', {"a": 1}, False),
+    ('Sure:\n```json\n{"a": [1, 2]}\n```\nDone.', {"a": [1, 2]}, True),
+    ('Use {braces} sparingly. Result: {"a": "}"} ok', {"a": "}"}, True),
+    ("[1, 2] and more", [1, 2], True),
+])
+def test_extract_json(text, expected, extracted):
+    assert extract_json(text) == (expected, extracted)
+
+@pytest.mark.parametrize("text", ['{"a": {"b": 1}, "c": [', "no json here", ""])
+def test_extract_json_rejects_incomplete_values(text):
+    with pytest.raises(ValueError):
+        extract_json(text)
+
+def test_parse_structured_validates_against_the_schema():
+    value, _ = parse_structured('{"issues": [], "suggestions": ["x"], "overall_quality": "8"}', GrammarCheck)
+    assert value == {"issues": [], "suggestions": ["x"], "overall_quality": 8.0}
+    with pytest.raises(ValueError):
+        parse_structured('{"issues": []}', GrammarCheck)
+
+def test_repair_prompt_carries_the_schema_not_the_original_prompt():
+    prompt = repair_prompt('{"issues": [', "truncated", GrammarCheck)
+    assert prompt.startswith("Repair")
+    assert "overall_quality" in prompt and '{"issues": [' in prompt
+
+@pytest.mark.asyncio
+async def test_wrapped_replies_are_extracted_without_a_repair_call(mock_server):
+    async with mock_server(rate_malformed=1.0) as server:
+        deepseek = DeepSeekClient()
+        try:
+            result = await deepseek.generate_json(GRAMMAR_PROMPT, GrammarCheck)
+        finally:
+            await deepseek.close()
+    assert result["overall_quality"] == 8
+    assert server.stats.calls_by_kind == {"grammar": 1}
+    assert deepseek.parse_stats.stats()["extracted"] == 1
+
+@pytest.mark.asyncio
+async def test_broken_replies_get_one_repair_call(mock_server):
+    async with mock_server(rate_broken=1.0) as server:
+        deepseek = DeepSeekClient()
+        try:
+            result = await deepseek.generate_json(GRAMMAR_PROMPT, GrammarCheck)
+        finally:
+            await deepseek.close()
+    assert result["overall_quality"] == 8
+    assert server.stats.calls_by_kind == {"grammar": 1, "repair": 1}
+    stats = deepseek.parse_stats.stats()
+    assert (stats["repaired"], stats["repair_calls"], stats["failed"]) == (1, 1, 0)
+
+@pytest.mark.asyncio
+async def test_failed_repair_returns_the_default(mock_server, monkeypatch):
+    async with mock_server(rate_broken=1.0) as server:
+        reply = server.reply
+        # A repair that comes back without the required fields
+        monkeypatch.setattr(server, "reply", lambda kind, prompt: "{}" if kind == "repair" else reply(kind, prompt))
+        deepseek = DeepSeekClient()
+        try:
+            result = await deepseek.generate_json(GRAMMAR_PROMPT, GrammarCheck, default={"fallback": True})
+        finally:
+            await deepseek.close()
+    assert result == {"fallback": True}
+    stats = deepseek.parse_stats.stats()
+    assert (stats["failed"], stats["repair_calls"], stats["failure_rate"]) == (1, 1, 1.0)
+
+@pytest.mark.asyncio
+async def test_failed_replies_are_not_replayed_from_the_cache(mock_server, monkeypatch, tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.sqlite"))
+    async with mock_server(rate_broken=1.0) as server:
+        reply = server.reply
+        monkeypatch.setattr(server, "reply", lambda kind, prompt: "{}" if kind == "repair" else reply(kind, prompt))
+        deepseek = DeepSeekClient(cache=cache)
+        try:
+            assert await deepseek.generate_json(GRAMMAR_PROMPT, GrammarCheck, default={}) == {}
+            assert cache.stats()["entries"] == 0
+            # The next attempt goes back to the API and succeeds once the replies are good again
+            server.config.rate_broken = 0.0
+            result = await deepseek.generate_json(GRAMMAR_PROMPT, GrammarCheck, default={})
+        finally:
+            await deepseek.close()
+    assert result["overall_quality"] == 8
+    assert server.stats.calls_by_kind == {"grammar": 2, "repair": 1}
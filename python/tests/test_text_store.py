@@ -0,0 +1,30 @@
+import pytest
+from paper_agent.utils.dedup import deduplicate_papers
+from paper_agent.utils.text_store import parse_arxiv_id
+
+@pytest.mark.parametrize("value, expected", [
+    ("http://arxiv.org/abs/2401.00001v1", ("2401.00001", "v1")),
+    ("https://arxiv.org/pdf/2401.00001v2.pdf", ("2401.00001", "v2")),
+    ("https://export.arxiv.org/abs/hep-th/9901001", ("hep-th/9901001", "")),
+    ("2401.12345", ("2401.12345", "")),
+    ("arXiv:2401.12345v3", ("2401.12345", "v3")),
+])
+def test_parse_arxiv_id(value, expected):
+    assert parse_arxiv_id(value) == expected
+
+@pytest.mark.parametrize("value", [
+    "https://doi.org/10.1016/0605.33002",
+    "https://example.com/papers/1234567",
+    "https://example.com/2401.12345.pdf",
+    "https://www.semanticscholar.org/arxiv.org/abs/2401.00001",
+    "",
+])
+def test_parse_arxiv_id_ignores_other_urls(value):
+    assert parse_arxiv_id(value) is None
+
+def test_arxiv_like_fragments_in_other_urls_do_not_merge_papers():
+    records = [
+        {"title": "Graph methods for protein folding", "url": "https://doi.org/10.1016/0605.33002", "source": "Google Scholar"},
+        {"title": "Auction design under uncertainty", "url": "https://example.org/10.1016/0605.33002", "source": "Google Scholar"}
+    ]
+    assert len(deduplicate_papers(records)) == 2
@@ -0,0 +1,17 @@
+from paper_agent.utils.tracing import Tracer
+
+def test_spans_are_kept_only_while_enabled():
+    tracer = Tracer()
+    with tracer.span("outer", "phase") as span:
+        span.add(tokens=3)
+        assert tracer.current() is span
+    assert span.attributes == {"tokens": 3}
+    assert tracer.snapshot() == []
+
+    tracer.enable()
+    with tracer.span("outer", "phase", agent="Writer"):
+        with tracer.span("inner", "llm") as inner:
+            pass
+    outer, = [span for span in tracer.snapshot() if span.name == "outer"]
+    assert inner.parent_id == outer.span_id
+    assert inner.agent == "Writer"
@@ -0,0 +1,21 @@
+import time
+import pytest
+from paper_agent.agents.web_crawler import WebCrawlerAgent
+from paper_agent.utils.deepseek_client import DeepSeekClient
+
+@pytest.mark.asyncio
+async def test_source_timeout_keeps_papers_whose_pdfs_were_still_downloading(mock_server, monkeypatch):
+    async with mock_server(papers=3, pdf_delay=3) as server:
+        monkeypatch.setattr(WebCrawlerAgent, "arxiv_timeout", 0.5)
+        deepseek = DeepSeekClient()
+        try:
+            started = time.monotonic()
+            result = await WebCrawlerAgent("WebCrawler", deepseek).execute({"title": "Timeouts", "keywords": []})
+            elapsed = time.monotonic() - started
+        finally:
+            await deepseek.close()
+    papers = result["academic_papers"]
+    assert len(papers) == 3
+    assert all(paper["pdf_text"] == "" for paper in papers)
+    assert server.stats.pdf_downloads == 3
+    assert elapsed < 2.5